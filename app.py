@@ -1,8 +1,5 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-import plotly.express as px
-import plotly.graph_objects as go
+from data_access import table, auto_refresh, audit_action
 
 # --- Config ---
 st.set_page_config(
@@ -11,6 +8,8 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+auto_refresh()
+audit_action("Page View", "Globus Medical Sterile Ops", once=True)
 
 # --- Styling ---
 st.markdown("""
@@ -41,22 +40,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Data Loading ---
-@st.cache_data
-def load_data():
-    conn = sqlite3.connect("globus_sterile.db")
-    inventory = pd.read_sql("SELECT * FROM inventory", conn)
-    procurement = pd.read_sql("SELECT * FROM procurement", conn)
-    production = pd.read_sql("SELECT * FROM production", conn)
-    conn.close()
-    return inventory, procurement, production
-
-inventory, procurement, production = load_data()
-
-# --- Validations for Missing Columns ---
-# Ensure columns exist before using them to prevent errors if source changed
-required_inv_cols = ['Total_Value', 'Stock_Quantity', 'Category']
-required_proc_cols = ['Compliance', 'Discrepancy_Flag', 'Defective_Units']
-required_prod_cols = ['Delay_Hours', 'Job_Status']
+# Dashboards read the small summary tables materialized by data_processor.py, so the
+# home page cost does not grow with the fact tables. Memory-mapped from the shared
+# Arrow snapshot (one copy for every session) by data_access, projected to the columns
+# the KPIs use; each chart section reads its own columns when it is reached.
+wip = table("summary_wip", columns=["WIP_Step", "Delay_Status", "Rows"])
+stock = table("summary_inventory_category", columns=["Category", "Stock_Quantity", "Total_Value"])
+suppliers = table("summary_supplier_quality", columns=["Compliance_Known", "Compliant", "Discrepancies"])
 
 # --- Dashboard ---
 st.title("🏥 Globus Medical | Sterile Operations Suite")
@@ -66,39 +56,35 @@ st.markdown("### Executive Dashboard - JR105344 Candidate Project")
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
 # 1. Total Inventory Value
-total_val = inventory['Total_Value'].sum() if 'Total_Value' in inventory.columns else 0
+total_val = stock['Total_Value'].sum()
 kpi1.metric("📦 Inventory Value", f"${total_val:,.0f}", delta="1.2%")
 
 # 2. Compliance Rate
-if 'Compliance' in procurement.columns:
-    comp_rate = (procurement['Compliance'].value_counts(normalize=True).get('Yes', 0) * 100)
-else:
-    comp_rate = 0
+known = suppliers['Compliance_Known'].sum()
+comp_rate = suppliers['Compliant'].sum() / known * 100 if known else 0
 kpi2.metric("✅ Supplier Compliance", f"{comp_rate:.1f}%", delta="-0.5%")
 
 # 3. Production Efficiency (On Time Jobs)
-if 'Delay_Status' in production.columns:
-    on_time_pct = (production['Delay_Status'].value_counts(normalize=True).get('On Time', 0) * 100)
-else:
-    on_time_pct = 0
+total_jobs = wip['Rows'].sum()
+on_time_pct = wip.loc[wip['Delay_Status'] == 'On Time', 'Rows'].sum() / total_jobs * 100 if total_jobs else 0
 kpi3.metric("⚙️ On-Time Production", f"{on_time_pct:.1f}%", delta="2.4%")
 
 # 4. Open Discrepancies
-if 'Discrepancy_Flag' in procurement.columns:
-    discrepancies = procurement['Discrepancy_Flag'].sum()
-else:
-    discrepancies = 0
+discrepancies = int(suppliers['Discrepancies'].sum())
 kpi4.metric("⚠️ Open PO Issues", f"{discrepancies}", delta="-5", delta_color="inverse")
 
 st.markdown("---")
 
+# Plotly Express is imported only once the KPIs above have been sent to the browser
+import plotly.express as px
+
 # Charts Row 1
 col1, col2 = st.columns([2, 1])
 
 with col1:
     st.subheader("Production Throughput by WIP Step")
-    if 'WIP_Step' in production.columns:
-        wip_counts = production.groupby('WIP_Step')['Job_ID'].count().reset_index()
+    if not wip.empty:
+        wip_counts = wip.groupby('WIP_Step')['Rows'].sum().reset_index(name='Job_ID')
         fig_wip = px.bar(wip_counts, x='WIP_Step', y='Job_ID', color='WIP_Step', 
                          title="Batch Volume per Step", text_auto=True,
                          color_discrete_sequence=px.colors.sequential.Blues_r)
@@ -109,9 +95,8 @@ with col1:
 
 with col2:
     st.subheader("Inventory by Category")
-    if 'Category' in inventory.columns:
-        cat_dist = inventory.groupby('Category')['Stock_Quantity'].sum().reset_index()
-        fig_pie = px.pie(cat_dist, values='Stock_Quantity', names='Category', hole=0.4,
+    if not stock.empty:
+        fig_pie = px.pie(stock, values='Stock_Quantity', names='Category', hole=0.4,
                            title="Stock Distribution",
                            color_discrete_sequence=px.colors.sequential.RdBu)
         st.plotly_chart(fig_pie, use_container_width=True)
@@ -123,21 +108,23 @@ col3, col4 = st.columns(2)
 
 with col3:
     st.subheader("Recent Production Delays")
-    if 'Delay_Hours' in production.columns:
-        delays = production[production['Delay_Hours'] > 0].copy()
-        if not delays.empty:
-            fig_hist = px.histogram(delays, x='Delay_Hours', nbins=20, 
-                                    title="Distribution of Production Delays (Hours)",
-                                    color_discrete_sequence=['#ff6b6b'])
-            st.plotly_chart(fig_hist, use_container_width=True)
-        else:
-            st.success("No delays recorded!")
+    delays = (table("summary_delays", columns=["Delay_Bin_Hours", "Rows"]).rename(columns={"Rows": "Jobs"})
+              .sort_values("Delay_Bin_Hours", ignore_index=True))
+    if not delays.empty:
+        # Pre-binned in ETL (DELAY_BIN_MINUTES wide bins)
+        fig_hist = px.bar(delays, x='Delay_Bin_Hours', y='Jobs',
+                          title="Distribution of Production Delays (Hours)",
+                          color_discrete_sequence=['#ff6b6b'])
+        fig_hist.update_layout(bargap=0.05)
+        st.plotly_chart(fig_hist, use_container_width=True)
+    else:
+        st.success("No delays recorded!")
 
 with col4:
     st.subheader("Procurement Quality Trend")
-    if 'Order_Date' in procurement.columns and 'Defective_Units' in procurement.columns:
-        procurement['Month'] = pd.to_datetime(procurement['Order_Date']).dt.to_period('M').astype(str)
-        quality_trend = procurement.groupby('Month')['Defective_Units'].sum().reset_index()
+    quality_trend = (table("summary_monthly_quality", columns=["Month", "Defective_Units"])
+                     .sort_values("Month", ignore_index=True))
+    if not quality_trend.empty:
         fig_line = px.line(quality_trend, x='Month', y='Defective_Units', markers=True,
                            title="Defective Units Over Time",
                            line_shape='spline',
@@ -0,0 +1,206 @@
+import atexit
+import json
+import queue
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import db
+
+# --- Configuration ---
+# Audit events (ETL runs, report generation, dashboard actions) are appended to their
+# own SQLite file, so logging never waits on an ETL write transaction in the data DB.
+# Events are partitioned by month (audit_YYYYMM tables, each indexed on Timestamp,
+# User and Action), so range queries only touch the months they cover and years of
+# retention can be archived a month at a time. Triggers make every partition
+# append-only: UPDATE and DELETE are rejected.
+AUDIT_DB_PATH = "audit.db"
+PARTITION_PREFIX = "audit_"
+LABELS_TABLE = "audit_labels"  # distinct users / actions, for the dashboard filters
+BATCH_SIZE = 1_000             # most events written per transaction
+SYSTEM_USER = "System"
+
+COLUMNS = {
+    "Id": "INTEGER PRIMARY KEY",
+    "Timestamp": "TIMESTAMP NOT NULL",
+    "User": "TEXT NOT NULL",
+    "Action": "TEXT NOT NULL",
+    "Status": "TEXT",
+    "Source": "TEXT",
+    "Detail": "TEXT",
+}
+INDEXES = [["Timestamp"], ["User", "Timestamp"], ["Action", "Timestamp"]]
+
+
+def epoch(ts):
+    """Naive local datetime -> epoch seconds, like every TIMESTAMP column (see db.encode_rows)."""
+    return int(ts.replace(tzinfo=timezone.utc).timestamp())
+
+def partition(seconds):
+    """Partition table holding events at `seconds` (epoch), e.g. audit_202601."""
+    return f"{PARTITION_PREFIX}{datetime.fromtimestamp(seconds, timezone.utc):%Y%m}"
+
+def init_partition(conn, table):
+    cols = ", ".join(f'"{col}" {decl}' for col, decl in COLUMNS.items())
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({cols})')
+    for cols in INDEXES:
+        name = f"ix_{table}_" + "_".join(c.lower() for c in cols)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(cols)})')
+    for op in ("UPDATE", "DELETE"):
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS "{table}_no_{op.lower()}" BEFORE {op} ON "{table}" '
+                     f"BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END")
+
+def partitions(conn, start=None, end=None):
+    """Partition tables overlapping [start, end) epoch seconds, newest first."""
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name DESC",
+        (PARTITION_PREFIX + "[0-9][0-9][0-9][0-9][0-9][0-9]",))]
+    first = partition(start) if start is not None else ""
+    last = partition(end - 1) if end is not None else "~"
+    return [name for name in names if first <= name <= last]
+
+
+# --- Writer ---
+class AuditWriter:
+    """Batched, non-blocking audit writer.
+
+    record() only enqueues the event; a daemon thread drains the queue and appends
+    everything that accumulated (up to BATCH_SIZE) in one transaction, so callers never
+    wait on disk and batches grow with the event rate.
+    """
+
+    def __init__(self, path=None, batch_size=BATCH_SIZE):
+        self.path = path or AUDIT_DB_PATH
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._partitions = set()
+        self._labels = set()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, action, user=SYSTEM_USER, status="Success", source=None, detail=None, timestamp=None):
+        """Queue one event; `detail` (a dict) is stored as JSON, `timestamp` defaults to now."""
+        ts = epoch(timestamp or datetime.now())
+        if detail is not None and not isinstance(detail, str):
+            detail = json.dumps(detail, sort_keys=True, default=str)
+        self._queue.put((ts, user, action, status, source, detail))
+
+    def flush(self):
+        """Block until every event queued so far has been written."""
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = db.connect(self.path)
+        try:
+            while True:
+                events = [self._queue.get()]
+                while len(events) < self.batch_size:
+                    try:
+                        events.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in events
+                events = [e for e in events if e is not None]
+                try:
+                    self._write(conn, events)
+                except Exception as exc:  # keep the writer alive; the failure is visible on stderr
+                    print(f"Audit write failed ({len(events)} events): {exc!r}", file=sys.stderr)
+                for _ in range(len(events) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, events):
+        by_partition = {}
+        for event in events:
+            by_partition.setdefault(partition(event[0]), []).append(event)
+        with conn:
+            for table, rows in by_partition.items():
+                if table not in self._partitions:
+                    init_partition(conn, table)
+                    self._partitions.add(table)
+                conn.executemany(f'INSERT INTO "{table}" (Timestamp, User, Action, Status, Source, Detail) '
+                                 f"VALUES (?, ?, ?, ?, ?, ?)", rows)
+            labels = {("User", e[1]) for e in events} | {("Action", e[2]) for e in events}
+            if labels - self._labels:
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{LABELS_TABLE}" '
+                             f"(Kind TEXT, Value TEXT, PRIMARY KEY (Kind, Value)) WITHOUT ROWID")
+                conn.executemany(f'INSERT OR IGNORE INTO "{LABELS_TABLE}" (Kind, Value) VALUES (?, ?)',
+                                 labels - self._labels)
+                self._labels |= labels
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def writer():
+    """The process-wide writer (started on first use, flushed at exit)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+def log(action, **event):
+    """Queue an audit event on the process-wide writer; see AuditWriter.record."""
+    writer().record(action, **event)
+
+def flush():
+    if _writer is not None:
+        _writer.flush()
+
+
+# --- Reading ---
+def labels(conn, kind):
+    """Every user (kind="User") or action (kind="Action") ever logged, sorted."""
+    try:
+        return [r[0] for r in conn.execute(f'SELECT Value FROM "{LABELS_TABLE}" WHERE Kind = ? ORDER BY Value', (kind,))]
+    except sqlite3.OperationalError:  # nothing logged yet
+        return []
+
+def read(conn, start, end, user=None, action=None, before=None, limit=50):
+    """Newest-first page of events with start <= Timestamp < end (epoch seconds).
+
+    Keyset pagination: `before` is the (Timestamp, Id) of the last event of the previous
+    page. Only partitions overlapping the range are queried, newest first, each with an
+    index range scan, until `limit` events are found.
+    """
+    where, params = ["Timestamp >= ?", "Timestamp < ?"], [start, end]
+    if user:
+        where.append("User = ?")
+        params.append(user)
+    if action:
+        where.append("Action = ?")
+        params.append(action)
+    if before:
+        where.append("(Timestamp, Id) < (?, ?)")
+        params += list(before)
+    frames, remaining = [], limit
+    for table in partitions(conn, start, end):
+        if before and table > partition(before[0]):
+            continue
+        frame = pd.read_sql(f'SELECT * FROM "{table}" WHERE {" AND ".join(where)} '
+                            f"ORDER BY Timestamp DESC, Id DESC LIMIT ?", conn, params=params + [remaining])
+        frames.append(frame)
+        remaining -= len(frame)
+        if remaining <= 0:
+            break
+    events = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(COLUMNS))
+    events['Timestamp'] = pd.to_datetime(events['Timestamp'], unit='s')
+    return events
+
+def cursor(events):
+    """The `before` key that continues after the last event of a read() page."""
+    last = events.iloc[-1]
+    return int(last['Timestamp'].timestamp()), int(last['Id'])
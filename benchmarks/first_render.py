@@ -0,0 +1,61 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+
+# --- Cold time-to-first-render ---
+# Runs one dashboard page once in this (fresh) process with Streamlit's AppTest and
+# records when its elements are sent to the browser. Streamlit itself is imported
+# first, as on a running server; everything the page imports and caches is cold.
+# Called by run_benchmarks.py in a new process per page; prints one JSON object.
+
+# Elements that carry data (the first one is what a user waits for); titles, markdown
+# and layout blocks are sent before any query runs
+CONTENT_ELEMENTS = {"metric", "plotly_chart", "arrow_data_frame", "arrow_table", "table", "alert"}
+
+
+def measure(page, work_dir):
+    timings = {"first_element": None, "first_content": None}
+    enqueue = ForwardMsgQueue.enqueue
+
+    def record(queue, msg):
+        if msg.HasField("delta") and msg.delta.HasField("new_element"):
+            elapsed = time.perf_counter() - start
+            kind = msg.delta.new_element.WhichOneof("type")
+            if timings["first_element"] is None:
+                timings["first_element"] = elapsed
+            if timings["first_content"] is None and kind in CONTENT_ELEMENTS:
+                timings["first_content"] = elapsed
+        return enqueue(queue, msg)
+
+    ForwardMsgQueue.enqueue = record
+    start = time.perf_counter()
+    # The page would import these itself; they are imported here only to point them at work_dir
+    import audit
+    import db
+    import snapshot
+    db.DB_PATH = os.path.join(work_dir, "benchmark.db")
+    snapshot.SNAPSHOT_DIR = os.path.join(work_dir, "snapshots")
+    snapshot.CURRENT_FILE = os.path.join(snapshot.SNAPSHOT_DIR, "CURRENT")
+    audit.AUDIT_DB_PATH = os.path.join(work_dir, "audit.db")
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600).run()
+    timings["full_render"] = time.perf_counter() - start
+    timings["exceptions"] = [e.message for e in app.exception]
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold time-to-first-render of one dashboard page")
+    parser.add_argument("page", help="Page script relative to the repository root, e.g. app.py")
+    parser.add_argument("--work-dir", default=os.path.join(ROOT, ".benchmarks"))
+    args = parser.parse_args()
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(json.dumps(measure(args.page, os.path.abspath(args.work_dir))))
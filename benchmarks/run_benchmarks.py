@@ -0,0 +1,266 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pyarrow.compute as pc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import audit
+import data_processor
+import db
+import instrumentation
+import snapshot
+import source_cache
+from synthetic_data import generate
+
+# --- Benchmark harness ---
+# Times and memory-profiles each ETL stage and the main page queries against a
+# synthetic dataset, and appends one JSON record per run to the results file.
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.jsonl")
+
+# Representative queries issued by app.py and pages/*.py
+PAGE_QUERIES = [
+    ("app: summary_wip", "SELECT * FROM summary_wip", ()),
+    ("app: summary_supplier_quality", "SELECT * FROM summary_supplier_quality", ()),
+    # One-day viewport from the synthetic schedule origin (2023-01-02 08:00)
+    ("scheduler: viewport jobs",
+     "SELECT Job_ID, Machine_ID, Job_Status, Operation_Type, Part_ID, Scheduled_Start, Scheduled_End FROM production "
+     "WHERE Scheduled_Start >= ? AND Scheduled_Start < ? AND Scheduled_End > ? "
+     "AND Machine_ID IN (SELECT Code FROM dim_machine_id WHERE Value IN (?, ?)) "
+     "AND Job_Status IN (SELECT Code FROM dim_job_status WHERE Value IN (?, ?))",
+     (1672646400 - 86400, 1672732800, 1672646400, "M01", "M02", "Completed", "Delayed")),
+    ("scheduler: recommended batches",
+     "SELECT Batch_ID, Machine_ID, WIP_Step, COUNT(*) AS Jobs, MIN(Planned_Start) AS Planned_Start "
+     "FROM batch_plan GROUP BY Batch_ID ORDER BY Planned_Start, Batch_ID LIMIT 100", ()),
+    ("lot_tracker: bottlenecks", "SELECT WIP_Step, AVG(Avg_Queue) AS Avg_Queue, MAX(Max_Queue) AS Max_Queue "
+                                 "FROM wip_queue_depth GROUP BY WIP_Step", ()),
+    ("scheduler: machine utilization", "SELECT * FROM machine_utilization WHERE Basis = ?", ("Scheduled",)),
+    ("lot_tracker: first page", "SELECT * FROM production WHERE Job_ID > ? ORDER BY Job_ID LIMIT 51", ("",)),
+    ("po: supplier scorecard", "SELECT * FROM supplier_scorecard WHERE Window_Days = ? ORDER BY On_Time_Rate DESC", (90,)),
+    ("po: discrepancies", "SELECT * FROM procurement WHERE Discrepancy_Flag = 1", ()),
+    ("inventory: all", "SELECT * FROM inventory", ()),
+    ("compliance: non-compliant POs", "SELECT * FROM procurement "
+     "WHERE Compliance IN (SELECT Code FROM dim_compliance WHERE Value IN (?))", ("No",)),
+    ("compliance: recall lots by supplier/window",
+     "SELECT * FROM lot_genealogy WHERE Supplier = ? AND Received >= ? AND Received < ? "
+     "ORDER BY Received, Job_ID LIMIT 1000",
+     ("Supplier_0000", 1669852800, 1672531200)),
+    ("compliance: POs feeding quarantined lots",
+     "SELECT * FROM po_genealogy WHERE Failed_Jobs > 0 ORDER BY Failed_Jobs DESC, PO_ID LIMIT 500", ()),
+    ("compliance: quarantined lots by supplier",
+     "SELECT Supplier, COUNT(*) AS POs, SUM(Failed_Jobs) AS Failed_Jobs FROM po_genealogy "
+     "WHERE Failed_Jobs > 0 GROUP BY Supplier ORDER BY Failed_Jobs DESC", ()),
+    ("compliance: failed jobs", "SELECT * FROM production "
+     "WHERE Job_Status IN (SELECT Code FROM dim_job_status WHERE Value IN (?))", ("Failed",)),
+]
+
+# (table, filter column, values) read through the Arrow snapshot, as the pages do
+SNAPSHOT_READS = [
+    ("procurement", None, None),
+    ("inventory", None, None),
+    ("procurement", "Compliance", ["No"]),
+    ("production", "Job_Status", ["Failed"]),
+]
+
+# Audit log range reads issued by the Compliance page: (label, filters)
+AUDIT_READS = [
+    ("latest page", {}),
+    ("user filter", {"user": "user_07"}),
+    ("action filter", {"action": "Page View"}),
+]
+AUDIT_ACTIONS = ["Page View", "Lot Search", "Recall Query", "Recall Trace", "ETL Run", "Report Generated"]
+
+# Dashboard scripts timed from a cold process (first_render.py)
+RENDER_PAGES = ["app.py"] + sorted(os.path.join("pages", f) for f in os.listdir(os.path.join(ROOT, "pages"))
+                                   if f.endswith(".py"))
+
+
+class Stage(instrumentation.Stage):
+    """Pipeline stage timer that prints its result and appends it (with RSS growth) to `results`."""
+
+    def __init__(self, results, name):
+        super().__init__(name, on_exit=self._report)
+        self.results = results
+
+    def _report(self, record):
+        record = {"stage": self.name, "seconds": round(self.seconds, 4),
+                  "peak_rss_mb": round(record["peak_rss_mb"], 1),
+                  "rss_delta_mb": round((self.peak_rss - self.start_rss) / 2**20, 1)}
+        if self.rows_out is not None:
+            record["rows"] = self.rows_out
+        self.results.append(record)
+        print(f"  {self.name:<40} {self.seconds:9.3f}s  peak {record['peak_rss_mb']:8.1f} MB")
+
+
+def configure(work_dir, files):
+    """Point the pipeline at the synthetic files and a scratch DB/cache/reports directory."""
+    data_processor.FILES = files
+    data_processor.REPORTS_DIR = os.path.join(work_dir, "reports")
+    db.DB_PATH = os.path.join(work_dir, "benchmark.db")
+    source_cache.CACHE_DIR = os.path.join(work_dir, "cache")
+    source_cache.INDEX_FILE = os.path.join(source_cache.CACHE_DIR, "index.json")
+    snapshot.SNAPSHOT_DIR = os.path.join(work_dir, "snapshots")
+    snapshot.CURRENT_FILE = os.path.join(snapshot.SNAPSHOT_DIR, "CURRENT")
+    audit.AUDIT_DB_PATH = os.path.join(work_dir, "audit.db")
+
+
+def run(args):
+    work_dir = os.path.abspath(args.work_dir)
+    data_dir = os.path.join(work_dir, f"data-{args.jobs}-{args.pos}-{args.parts}-{args.seed}")
+    results = []
+
+    print(f"Benchmarking {args.jobs:,} jobs / {args.pos:,} POs / {args.parts:,} parts in {work_dir}")
+    if not os.path.exists(os.path.join(data_dir, "production.csv")):
+        with Stage(results, "generate_synthetic_data"):
+            files = generate(data_dir, args.jobs, args.pos, args.parts, seed=args.seed)
+    else:
+        files = {name: os.path.join(data_dir, f) for name, f in
+                 [("inventory", "inventory.xlsx"), ("procurement", "procurement.csv"), ("production", "production.csv")]}
+    configure(work_dir, files)
+    source_cache.clear()
+    for path in (db.DB_PATH, audit.AUDIT_DB_PATH):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    if not args.skip_in_memory:
+        # Each source parsed alone with each engine; load_data reads all three in parallel,
+        # so its cold time should track the slowest single read rather than their sum
+        for engine in data_processor.ENGINES:
+            for name, path in data_processor.FILES.items():
+                with Stage(results, f"read {name} ({engine})") as stage:
+                    stage.rows_out = len(data_processor.read_source(name, path, engine))
+        with Stage(results, "load_data (cold cache, pandas)") as stage:
+            frames = data_processor.load_data(refresh=True, engine="pandas")
+            stage.rows_out = sum(len(f) for f in frames)
+        # Whole-frame path: load_data -> transform_data -> save_to_db
+        with Stage(results, "load_data (cold cache)") as stage:
+            frames = data_processor.load_data(refresh=True)
+            stage.rows_out = sum(len(f) for f in frames)
+        with Stage(results, "load_data (warm cache)"):
+            frames = data_processor.load_data()
+        with Stage(results, "transform_data") as stage:
+            frames = data_processor.transform_data(*frames)
+            stage.rows_out = sum(len(f) for f in frames)
+        with Stage(results, "save_to_db"):
+            data_processor.save_to_db(*frames)
+        del frames
+
+    # Streaming incremental path used by data_processor.main()
+    with Stage(results, "incremental_load (full rebuild)"):
+        data_processor.incremental_load(full=True, chunksize=args.chunksize)
+    with Stage(results, "incremental_load (unchanged inputs)"):
+        data_processor.incremental_load(chunksize=args.chunksize)
+    conn = db.connect()
+    with Stage(results, "build_supplier_scorecard") as stage:
+        with conn:
+            stage.rows_out = data_processor.build_supplier_scorecard(conn)
+    with Stage(results, "build_genealogy") as stage:
+        with conn:
+            stage.rows_out = data_processor.build_genealogy(conn)
+    with Stage(results, "build_batch_plan") as stage:
+        with conn:
+            stage.rows_out = data_processor.build_batch_plan(conn)
+    with Stage(results, "build_interval_analytics") as stage:
+        with conn:
+            stage.rows_in = data_processor.build_interval_analytics(conn)
+    conn.close()
+    with Stage(results, "generate_reports"):
+        data_processor.generate_reports(workers=args.workers)
+    with Stage(results, "publish_snapshot") as stage:
+        stage.rows_out = data_processor.publish_snapshot(instrumentation.PipelineRun())
+
+    conn = db.connect()
+    for name, sql, params in PAGE_QUERIES:
+        with Stage(results, f"query {name}") as stage:
+            stage.rows_out = len(db.read_sql(sql, conn, params=list(params), compact=True))
+    conn.close()
+    # The same whole-table reads served from the memory-mapped snapshot (data_access.table)
+    version = snapshot.current_version()
+    for table, column, values in SNAPSHOT_READS:
+        with Stage(results, f"snapshot {table}" + (f" ({column} filter)" if column else "")) as stage:
+            mapped = snapshot.open_table(version, table)
+            if column:
+                mapped = mapped.filter(pc.field(column).isin(values))
+            stage.rows_out = len(mapped.to_pandas())
+
+    # Audit log: events spread evenly over three years of retention, then paged reads
+    if args.audit_events:
+        writer = audit.AuditWriter()
+        first = datetime(2023, 1, 1)
+        step = timedelta(days=3 * 365) / args.audit_events
+        with Stage(results, f"audit write ({args.audit_events:,} events)") as stage:
+            for i in range(args.audit_events):
+                writer.record(AUDIT_ACTIONS[i % len(AUDIT_ACTIONS)], user=f"user_{i % 50:02d}", source="benchmark",
+                              detail={"i": i}, timestamp=first + i * step)
+            writer.close()
+            stage.rows_out = args.audit_events
+        conn = db.connect(audit.AUDIT_DB_PATH)
+        start, end = audit.epoch(first), audit.epoch(first + timedelta(days=3 * 365))
+        for label, filters in AUDIT_READS:
+            with Stage(results, f"audit read {label}") as stage:
+                page = audit.read(conn, start, end, limit=50, **filters)
+                page = audit.read(conn, start, end, before=audit.cursor(page), limit=50, **filters)
+                stage.rows_out = len(page)
+        conn.close()
+
+    # Cold time-to-first-render: each page runs once in a fresh process (nothing imported,
+    # cached or memory-mapped yet); "seconds" is the time until its first data element
+    if not args.skip_render:
+        for page in RENDER_PAGES:
+            out = subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "first_render.py"), page,
+                                  "--work-dir", work_dir], cwd=ROOT, capture_output=True, text=True, check=True)
+            timing = json.loads(out.stdout.splitlines()[-1])
+            label = f"first render {os.path.basename(page)}"
+            results.append({"stage": label, "seconds": round(timing["first_content"] or 0, 4),
+                            "first_element_seconds": round(timing["first_element"] or 0, 4),
+                            "full_render_seconds": round(timing["full_render"], 4), "exceptions": timing["exceptions"]})
+            print(f"  {label:<40} {timing['first_content'] or 0:9.3f}s  full {timing['full_render']:7.3f}s"
+                  + (f"  {len(timing['exceptions'])} exception(s)" if timing["exceptions"] else ""))
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scale": {"jobs": args.jobs, "pos": args.pos, "parts": args.parts, "seed": args.seed,
+                  "chunksize": args.chunksize, "audit_events": args.audit_events},
+        "stages": results,
+    }
+    with open(args.output, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {args.output}")
+    return record
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Globus Sterile Ops pipeline on synthetic data")
+    parser.add_argument("--jobs", type=int, default=100_000, help="Production jobs (scale up to 10,000,000)")
+    parser.add_argument("--pos", type=int, default=10_000, help="Purchase orders (scale up to 1,000,000)")
+    parser.add_argument("--parts", type=int, default=5_000, help="Inventory SKUs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=int, default=data_processor.CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Report generation processes")
+    parser.add_argument("--audit-events", type=int, default=200_000, help="Audit events written and paged (0 to skip)")
+    parser.add_argument("--skip-in-memory", action="store_true",
+                        help="Skip the whole-frame load/transform/save stages (use at 10M-job scale)")
+    parser.add_argument("--skip-render", action="store_true", help="Skip the cold time-to-first-render page runs")
+    parser.add_argument("--work-dir", default=os.path.join(ROOT, ".benchmarks"))
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON-lines file the run record is appended to")
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    run(parser.parse_args())
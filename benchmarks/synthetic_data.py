@@ -0,0 +1,167 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# --- Synthetic source files at production scale ---
+# Writes the three sources with the exact column layout of the bundled Dataset/ files,
+# generated in fixed-size chunks so 10M-job histories fit in bounded memory.
+CHUNK_ROWS = 500_000
+OPERATIONS = ['Grinding', 'Lathe', 'Milling', 'Drilling', 'Additive']
+JOB_STATUSES = ['Completed', 'Delayed', 'Failed', 'Pending']
+JOB_STATUS_P = [0.62, 0.18, 0.10, 0.10]
+EFFICIENCY = ['Low Efficiency', 'Moderate Efficiency', 'High Efficiency', 'Optimal Efficiency']
+EFFICIENCY_P = [0.65, 0.18, 0.16, 0.01]
+ITEM_CATEGORIES = ['Office Supplies', 'MRO', 'Electronics', 'Raw Materials', 'Packaging']
+ORDER_STATUSES = ['Delivered', 'Partially Delivered', 'Pending', 'Cancelled']
+ORDER_STATUS_P = [0.72, 0.10, 0.10, 0.08]
+SPARE_PART_TYPES = ['Fast Moving Item', 'One Off', 'Just In Time']
+LOCATIONS = ['Company Site Office', 'Centralized', 'Regional Store']
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _chunks(total):
+    for start in range(0, total, CHUNK_ROWS):
+        yield start, min(CHUNK_ROWS, total - start)
+
+
+def write_production(path, jobs, machines, rng, start='2023-01-02 08:00:00'):
+    origin = np.datetime64(start, 'm')
+    # Jobs are laid out back to back per machine, interleaved across machines
+    machine_clock = np.zeros(machines, dtype=np.int64)
+    width = len(str(jobs))
+    for offset, n in _chunks(jobs):
+        ids = np.arange(offset, offset + n)
+        machine = ids % machines
+        processing = rng.integers(30, 121, n)
+        gaps = rng.integers(0, 30, n)
+        # Cumulative start times per machine within the chunk
+        step = pd.Series(processing + gaps)
+        by_machine = step.groupby(machine)
+        sched_start = machine_clock[machine] + (by_machine.cumsum() - step).to_numpy()
+        machine_clock += by_machine.sum().reindex(range(machines), fill_value=0).to_numpy()
+        sched_start = origin + sched_start.astype('timedelta64[m]')
+        sched_end = sched_start + processing.astype('timedelta64[m]')
+        status = rng.choice(JOB_STATUSES, n, p=JOB_STATUS_P)
+        start_shift = rng.integers(-10, 16, n).astype('timedelta64[m]')
+        end_shift = rng.integers(-5, 31, n).astype('timedelta64[m]')
+        actual_start = pd.Series(sched_start + start_shift).dt.strftime(DATE_FORMAT)
+        actual_end = pd.Series(sched_end + start_shift + end_shift).dt.strftime(DATE_FORMAT)
+        pending = status == 'Pending'
+        actual_start[pending] = ''
+        actual_end[pending] = ''
+        chunk = pd.DataFrame({
+            'Job_ID': np.char.add('J', np.char.zfill(ids.astype(str), width)),
+            'Machine_ID': np.char.add('M', np.char.zfill((machine + 1).astype(str), 2)),
+            'Operation_Type': rng.choice(OPERATIONS, n),
+            'Material_Used': rng.uniform(1, 5, n).round(2),
+            'Processing_Time': processing,
+            'Energy_Consumption': rng.uniform(2, 15, n).round(2),
+            'Machine_Availability': rng.integers(80, 100, n),
+            'Scheduled_Start': pd.Series(sched_start).dt.strftime(DATE_FORMAT),
+            'Scheduled_End': pd.Series(sched_end).dt.strftime(DATE_FORMAT),
+            'Actual_Start': actual_start,
+            'Actual_End': actual_end,
+            'Job_Status': status,
+            'Optimization_Category': rng.choice(EFFICIENCY, n, p=EFFICIENCY_P),
+        })
+        chunk.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+
+
+def write_procurement(path, pos, suppliers, rng):
+    names = [f"Supplier_{i:04d}" for i in range(suppliers)]
+    first_day = np.datetime64('2022-01-01')
+    for offset, n in _chunks(pos):
+        ids = np.arange(offset + 1, offset + n + 1)
+        order_date = first_day + rng.integers(0, 730, n).astype('timedelta64[D]')
+        delivery = order_date + rng.integers(-5, 21, n).astype('timedelta64[D]')
+        unit_price = rng.uniform(5, 100, n).round(2)
+        defects = rng.integers(0, 250, n).astype(float)
+        defects[rng.random(n) < 0.6] = 0
+        defects[rng.random(n) < 0.05] = np.nan
+        chunk = pd.DataFrame({
+            'PO_ID': np.char.add('PO-', np.char.zfill(ids.astype(str), 8)),
+            'Supplier': rng.choice(names, n),
+            'Order_Date': pd.Series(order_date).dt.strftime('%Y-%m-%d'),
+            'Delivery_Date': pd.Series(delivery).dt.strftime('%Y-%m-%d'),
+            'Item_Category': rng.choice(ITEM_CATEGORIES, n),
+            'Order_Status': rng.choice(ORDER_STATUSES, n, p=ORDER_STATUS_P),
+            'Quantity': rng.integers(50, 2000, n),
+            'Unit_Price': unit_price,
+            'Negotiated_Price': (unit_price * rng.uniform(0.85, 1.0, n)).round(2),
+            'Defective_Units': defects,
+            'Compliance': np.where(rng.random(n) < 0.8, 'Yes', 'No'),
+        })
+        chunk.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+
+
+def write_inventory(path, parts, rng):
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    sheet = workbook.add_worksheet('Sheet1')
+    header = ['Item Code', 'Item Description', 'Part No.', 'Part Description', 'Model', 'Unit Of Measurement',
+              'Spare Part Type', 'Location', 'Specify', 'Part Category', 'Is Expiry date Required', 'Min Nos',
+              'Max Nos', 'Minimum Price Per Nos (RM)', 'Maximum Price Per Nos (RM)', 'Brand', 'Status',
+              'Expiry Age (In Month)', 'Current Stock Level']
+    sheet.write_row(0, 0, header)
+    row = 1
+    for offset, n in _chunks(parts):
+        ids = np.arange(offset, offset + n)
+        item = rng.integers(0, 40, n)
+        min_price = rng.uniform(10, 2000, n).round(2)
+        columns = [
+            [f"BP{i:04d}" for i in item],
+            [f"Item group {i}" for i in item],
+            [f"01-{i // 1_000_000 % 10_000:04d}-{i // 1000 % 1000:04d}-{i % 1000:03d}" for i in ids],
+            [f"Spare part {i}" for i in ids],
+            [f"Model {m}" for m in rng.integers(0, 300, n)],
+            ['Unit'] * n,
+            rng.choice(SPARE_PART_TYPES, n).tolist(),
+            rng.choice(LOCATIONS, n).tolist(),
+            [None] * n,
+            ['Biomedical'] * n,
+            rng.choice(['Yes', 'No'], n).tolist(),
+            rng.integers(1, 5, n).tolist(),
+            rng.integers(5, 60, n).tolist(),
+            min_price.tolist(),
+            (min_price * rng.uniform(1.0, 1.6, n)).round(2).tolist(),
+            [f"Brand {b}" for b in rng.integers(0, 150, n)],
+            ['Active'] * n,
+            rng.choice([0.0, 12.0, 24.0], n).tolist(),
+            rng.integers(0, 60, n).tolist(),
+        ]
+        for values in zip(*columns):
+            sheet.write_row(row, 0, values)
+            row += 1
+    workbook.close()
+
+
+def generate(out_dir, jobs=100_000, pos=10_000, parts=5_000, machines=None, suppliers=None, seed=42):
+    """Write inventory/procurement/production files under `out_dir`; returns a FILES-style dict."""
+    rng = np.random.default_rng(seed)
+    machines = machines or max(5, min(200, jobs // 20_000))
+    suppliers = suppliers or max(5, min(2_000, pos // 500))
+    os.makedirs(out_dir, exist_ok=True)
+    files = {
+        "inventory": os.path.join(out_dir, "inventory.xlsx"),
+        "procurement": os.path.join(out_dir, "procurement.csv"),
+        "production": os.path.join(out_dir, "production.csv"),
+    }
+    write_inventory(files["inventory"], parts, rng)
+    write_procurement(files["procurement"], pos, suppliers, rng)
+    write_production(files["production"], jobs, machines, rng)
+    return files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Globus Sterile Ops source files")
+    parser.add_argument("out_dir")
+    parser.add_argument("--jobs", type=int, default=100_000, help="Production jobs (up to 10M)")
+    parser.add_argument("--pos", type=int, default=10_000, help="Purchase orders (up to 1M)")
+    parser.add_argument("--parts", type=int, default=5_000, help="Inventory SKUs")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for name, path in generate(args.out_dir, args.jobs, args.pos, args.parts, seed=args.seed).items():
+        print(f"{name}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
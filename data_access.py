@@ -0,0 +1,250 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pyarrow.compute as pc
+import streamlit as st
+
+import audit
+import db
+import snapshot
+
+# --- Shared data access for app.py and pages/ ---
+# Each server process keeps a small pool of read-only SQLite connections shared by
+# every session; in WAL mode their readers run concurrently, so one slow query does
+# not hold up the others. Query results are cached by (sql, params, data version):
+# PRAGMA data_version changes whenever another connection (the ETL) commits, so a
+# refresh invalidates every cached result without any explicit cache clearing. Its
+# value is per connection, so it is always read from one dedicated connection that
+# runs nothing else (the auto-refresh polls never wait behind a query). Each session
+# gets its own copy of a cached result, so results are compacted first: dimension
+# columns become categoricals and numerics are downcast (db.read_sql(compact=True)).
+POOL_SIZE = 4
+
+def _read_only_connection():
+    conn = sqlite3.connect(db.DB_PATH, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+@st.cache_resource
+def _version_connection():
+    return _read_only_connection(), threading.Lock()
+
+@st.cache_resource
+def _pool():
+    pool = queue.Queue()
+    for _ in range(POOL_SIZE):
+        pool.put(_read_only_connection())
+    return pool
+
+@contextmanager
+def get_connection():
+    """Borrow a read-only connection from the pool (blocks while all of them are busy)."""
+    pool = _pool()
+    conn = pool.get()
+    try:
+        yield conn
+    finally:
+        pool.put(conn)
+
+def data_version():
+    conn, lock = _version_connection()
+    with lock:
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_query(sql, params, version):
+    with get_connection() as conn:
+        return db.read_sql(sql, conn, params=list(params), compact=True)
+
+def query(sql, params=()):
+    """Run a read-only query; results are shared across sessions until the DB changes."""
+    return _cached_query(sql, tuple(params), data_version())
+
+# --- Arrow snapshot ---
+# Tables the ETL publishes to snapshot.py are memory-mapped once per server process
+# and shared by every session; a new snapshot version is picked up on the next rerun.
+# Projection and filters run on the Arrow table, so only the rows and columns a page
+# asks for are materialized as a DataFrame. Without a snapshot, reads go to SQLite.
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _mapped_table(version, table):
+    return snapshot.open_table(version, table)
+
+def snapshot_table(table):
+    """The memory-mapped pyarrow.Table of the live snapshot, or None if it is not published."""
+    version = snapshot.current_version()
+    return _mapped_table(version, table) if version else None
+
+def table(name, columns=None, where=None, arrow=False):
+    """Read a whole table (optionally projected / filtered) from the shared snapshot.
+
+    where: {column: [values]}, rows matching any value of every column.
+    arrow: return the pyarrow.Table itself (e.g. for st.dataframe, which takes Arrow
+    without a pandas copy) when the snapshot is available.
+    """
+    mapped = snapshot_table(name)
+    if mapped is None:
+        clauses, params = ["1"], []
+        for column, values in (where or {}).items():
+            sql, values = in_filter(name, column, values)
+            clauses.append(sql)
+            params += values
+        col_list = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        return query(f'SELECT {col_list} FROM "{name}" WHERE {" AND ".join(clauses)}', params)
+    for column, values in (where or {}).items():
+        mapped = mapped.filter(pc.field(column).isin(list(values)))
+    if columns:
+        mapped = mapped.select(columns)
+    return mapped if arrow else mapped.to_pandas()
+
+# --- Auto refresh ---
+# Open dashboards poll a cheap data stamp (snapshot version + PRAGMA data_version)
+# from a timed fragment and rerun the page when it changes, so a refresh by
+# `data_processor.py --watch` shows up within seconds without a manual reload.
+REFRESH_POLL_SECONDS = 5
+
+def data_stamp():
+    """Changes whenever the ETL publishes a snapshot or commits to the database."""
+    return snapshot.current_version(), data_version()
+
+def auto_refresh(seconds=REFRESH_POLL_SECONDS):
+    """Rerun the page whenever data_stamp() changes; call once per page after set_page_config."""
+    st.session_state["data_stamp"] = data_stamp()
+
+    @st.fragment(run_every=seconds)
+    def _poll():
+        if data_stamp() != st.session_state.get("data_stamp"):
+            st.rerun()
+
+    _poll()
+
+# --- Audit log ---
+# Dashboard actions are queued on the process-wide batched writer (audit.py), so
+# logging never delays a rerun. The log is read through its own read-only connection
+# and is not cached: it changes with every event.
+
+@st.cache_resource
+def _audit_connection():
+    conn = sqlite3.connect(audit.AUDIT_DB_PATH, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn, threading.Lock()
+
+def current_user():
+    """The signed-in user's email when Streamlit authentication is configured, else "Viewer"."""
+    try:
+        if st.user.is_logged_in:
+            return st.user.get("email") or st.user.get("name") or "Viewer"
+    except Exception:  # no auth configured / no session context
+        pass
+    return "Viewer"
+
+def audit_action(action, page, detail=None, once=False):
+    """Log a dashboard action; with once=True an identical event is logged once per session."""
+    if once:
+        seen = st.session_state.setdefault("audited", set())
+        key = (action, page, repr(detail))
+        if key in seen:
+            return
+        seen.add(key)
+    audit.log(action, user=current_user(), source=page, detail=detail)
+
+def audit_events(start, end, user=None, action=None, before=None, limit=50):
+    """A newest-first page of audit events (see audit.read)."""
+    conn, lock = _audit_connection()
+    with lock:
+        return audit.read(conn, start, end, user=user, action=action, before=before, limit=limit)
+
+audit_cursor = audit.cursor  # `before` key continuing after the last event of an audit_events() page
+
+def audit_labels(kind):
+    conn, lock = _audit_connection()
+    with lock:
+        return audit.labels(conn, kind)
+
+def _coded(table, column):
+    return column in db.coded_columns(table)
+
+def in_filter(table, column, values):
+    """Return an SQL `column IN (...)` fragment and its parameters.
+
+    For CATEGORY columns the labels are looked up in the dimension, so the fact table is
+    still filtered by its (indexed) integer codes.
+    """
+    values = list(values)
+    if not values:
+        return "0", []
+    placeholders = ", ".join("?" * len(values))
+    if _coded(table, column):
+        return f'"{column}" IN (SELECT Code FROM "{db.dimension_table(column)}" WHERE Value IN ({placeholders}))', values
+    return f'"{column}" IN ({placeholders})', values
+
+def distinct_values(table, column):
+    if _coded(table, column):
+        sql = (f'SELECT Value AS "{column}" FROM "{db.dimension_table(column)}" '
+               f'WHERE Code IN (SELECT DISTINCT "{column}" FROM "{table}") ORDER BY 1')
+    else:
+        sql = f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL ORDER BY 1'
+    return query(sql)[column].astype(object).tolist()
+
+def _prefix_bounds(prefix):
+    # [prefix, prefix_next) covers every string starting with prefix, so a B-tree index applies
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+# A search branch with more matches than this filters production in Job_ID order until
+# it has a page, instead of collecting and sorting every match
+SEARCH_SORT_LIMIT = 10_000
+
+def _matches(source, where, params):
+    """How many rows of `source` match `where`, counted up to SEARCH_SORT_LIMIT."""
+    sql = f"SELECT COUNT(*) AS n FROM (SELECT 1 FROM {source} WHERE {where} LIMIT ?)"
+    return int(query(sql, list(params) + [SEARCH_SORT_LIMIT])["n"].iloc[0])
+
+def search_lots(term, after="", limit=50, columns="*"):
+    """Keyset-paginated lot search over Job_ID / Part_ID / Machine_ID, ordered by Job_ID.
+
+    Terms of 3+ characters use the FTS5 trigram index (case-insensitive substring);
+    shorter terms, or databases without FTS5, use indexed prefix ranges instead.
+    Machine_ID is matched the same way against its (small) dimension table.
+    Each way of matching is its own `Job_ID > after ORDER BY Job_ID LIMIT n` branch, so
+    no branch reads more than one page needs: a selective branch sorts its few matches,
+    a broad one (see SEARCH_SORT_LIMIT) filters rows in Job_ID order, and each matching
+    machine reads the (Machine_ID, Job_ID) index in order. The branches are merged (and
+    de-duplicated) by rowid before the final sort.
+    Fetches limit + 1 rows so the caller can tell whether another page exists.
+    """
+    term = term.strip()
+    fts = db.search_table("production")
+    literal = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{literal}%" if len(term) >= 3 else f"{literal}%"
+    search_cols = db.SCHEMA["production"]["search"]
+    branches = []
+    if not term:
+        branches.append(("1", []))
+    elif len(term) >= 3 and not query("SELECT name FROM sqlite_master WHERE name = ?", (fts,)).empty:
+        phrase = '"' + term.replace('"', '""') + '"'
+        if _matches(fts, f"{fts} MATCH ?", [phrase]) < SEARCH_SORT_LIMIT:
+            branches.append((f"rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)", [phrase]))
+        else:
+            scan = " OR ".join(f"\"{col}\" LIKE ? ESCAPE '\\'" for col in search_cols)
+            branches.append((f"({scan})", [pattern] * len(search_cols)))
+    else:
+        for col in search_cols:
+            for variant in dict.fromkeys([term, term.upper()]):
+                bounds = list(_prefix_bounds(variant))
+                where = f'"{col}" >= ? AND "{col}" < ?'
+                if _matches("production", where, bounds) >= SEARCH_SORT_LIMIT:
+                    where = f'+"{col}" >= ? AND +"{col}" < ?'  # unary + keeps the planner off the column's index
+                branches.append((where, bounds))
+    if term:
+        codes = query(f"SELECT Code FROM {db.dimension_table('Machine_ID')} WHERE Value LIKE ? ESCAPE '\\'",
+                      (pattern,))["Code"].tolist()
+        branches += [("Machine_ID = ?", [int(code)]) for code in codes]
+    selects, params = [], []
+    for where, values in branches:
+        selects.append(f"SELECT rowid FROM (SELECT rowid, Job_ID FROM production "
+                       f"WHERE {where} AND Job_ID > ? ORDER BY Job_ID LIMIT ?)")
+        params += values + [after, limit + 1]
+    return query(f"SELECT {columns} FROM production WHERE rowid IN ({' UNION ALL '.join(selects)}) "
+                 f"ORDER BY Job_ID LIMIT ?", params + [limit + 1])
@@ -1,11 +1,27 @@
 import pandas as pd
-import sqlite3
+import hashlib
+import importlib.util
 import os
-from datetime import datetime
+import queue
+import threading
+import argparse
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import xlsxwriter
+import audit
+import db
+import instrumentation
+import intervals
+import scheduler
+import snapshot
+import source_cache
 
 # --- Configuration ---
-DB_PATH = "globus_sterile.db"
 REPORTS_DIR = "reports"
 FILES = {
     "inventory": "Dataset/Medical Spare Parts/KL HKL - Spare Part Inventories.xlsx",
@@ -13,23 +29,180 @@ FILES = {
     "production": "Dataset/Production:Batch Scheduling/hybrid_manufacturing_categorical.csv"
 }
 
+# Natural key of each source: (column in the raw file, column in the DB table)
+SOURCE_KEYS = {
+    "inventory": ("Part No.", "Part_ID"),
+    "procurement": ("PO_ID", "PO_ID"),
+    "production": ("Job_ID", "Job_ID")
+}
+
+# Sources whose rows are linked to inventory Part_IDs (see link_parts)
+LINKED_SOURCES = ["procurement", "production"]
+
+# Rows per chunk when streaming the CSV sources (bounds peak memory)
+CHUNK_SIZE = 100_000
+
+# ETL bookkeeping tables (incremental mode)
+STATE_TABLE = "etl_sources"
+ROW_HASH_TABLE = "etl_row_hashes"
+
 # --- 1. Load Data ---
-def load_data():
+# Only the raw columns the transforms and the DB schema use are parsed, with explicit
+# dtypes, so every engine yields identical frames (and row hashes) and nothing is
+# inferred per chunk. Counts are float64 so a blank cell parses the same everywhere.
+SOURCE_DTYPES = {
+    "inventory": {
+        "Item Code": "str", "Item Description": "str", "Part No.": "str", "Part Description": "str", "Model": "str",
+        "Unit Of Measurement": "str", "Spare Part Type": "str", "Location": "str", "Specify": "str",
+        "Part Category": "str", "Is Expiry date Required": "str", "Min Nos": "float64", "Max Nos": "float64",
+        "Minimum Price Per Nos (RM)": "float64", "Maximum Price Per Nos (RM)": "float64", "Brand": "str",
+        "Status": "str", "Expiry Age (In Month)": "float64", "Current Stock Level": "float64",
+    },
+    "procurement": {
+        "PO_ID": "str", "Supplier": "str", "Order_Date": "str", "Delivery_Date": "str", "Item_Category": "str",
+        "Order_Status": "str", "Quantity": "float64", "Unit_Price": "float64", "Negotiated_Price": "float64",
+        "Defective_Units": "float64", "Compliance": "str",
+    },
+    "production": {
+        "Job_ID": "str", "Machine_ID": "str", "Operation_Type": "str", "Material_Used": "float64",
+        "Processing_Time": "float64", "Energy_Consumption": "float64", "Machine_Availability": "float64",
+        "Scheduled_Start": "str", "Scheduled_End": "str", "Actual_Start": "str", "Actual_End": "str",
+        "Job_Status": "str", "Optimization_Category": "str",
+    },
+}
+# "fast": pyarrow's multithreaded CSV reader, and calamine for the workbook when
+# python-calamine is installed (openpyxl otherwise); "pandas": the default parsers.
+ENGINES = ["fast", "pandas"]
+ARROW_TYPES = {"str": pa.string(), "float64": pa.float64()}
+# pandas' default NA markers, so pyarrow treats the same cells as missing
+NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>",
+             "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+PREFETCH_CHUNKS = 2  # chunks each background reader may parse ahead of the load loop
+
+def _excel_engine():
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+def _arrow_csv(name, path, block_size=None):
+    dtypes = SOURCE_DTYPES[name]
+    convert = pacsv.ConvertOptions(column_types={c: ARROW_TYPES[t] for c, t in dtypes.items()},
+                                   include_columns=list(dtypes), null_values=NA_VALUES, strings_can_be_null=True)
+    read = pacsv.ReadOptions(block_size=block_size) if block_size else None
+    return convert, read
+
+def read_source(name, path, engine="fast"):
+    """Parse a whole source file with `engine`, keeping only SOURCE_DTYPES columns."""
+    dtypes = SOURCE_DTYPES[name]
+    if not path.endswith('.csv'):
+        return pd.read_excel(path, usecols=list(dtypes), dtype=dtypes,
+                             engine=_excel_engine() if engine == "fast" else None)[list(dtypes)]
+    if engine == "fast":
+        convert, _ = _arrow_csv(name, path)
+        return pacsv.read_csv(path, convert_options=convert).to_pandas()
+    return pd.read_csv(path, usecols=list(dtypes), dtype=dtypes)[list(dtypes)]
+
+def read_csv_chunks(name, path, chunksize, engine="fast"):
+    """Yield a CSV source in frames of `chunksize` rows (the last may be shorter)."""
+    dtypes = SOURCE_DTYPES[name]
+    if engine != "fast":
+        for chunk in pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=chunksize):
+            yield chunk[list(dtypes)]
+        return
+    # Arrow parses fixed-size blocks; batches are regrouped into chunksize-row frames
+    convert, read = _arrow_csv(name, path, block_size=16 << 20)
+    reader = pacsv.open_csv(path, read_options=read, convert_options=convert)
+    pending, rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield table.slice(0, chunksize).to_pandas()
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending, schema=reader.schema).to_pandas()
+
+def load_source(name, refresh=False, engine="fast"):
+    # Parsed sources are served from the Parquet cache while the file is unchanged
+    path = FILES[name]
+    return source_cache.read_cached(name, path, lambda p: read_source(name, p, engine), refresh=refresh)
+
+def iter_source(name, chunksize=None, refresh=False, engine="fast"):
+    """Yield a source in chunks of at most `chunksize` rows (CSV only; the workbook is read whole)."""
+    path = FILES[name]
+    if path.endswith('.csv'):
+        yield from source_cache.iter_cached(name, path, lambda p, n: read_csv_chunks(name, p, n, engine),
+                                            chunksize or CHUNK_SIZE, refresh=refresh)
+    else:
+        yield load_source(name, refresh=refresh, engine=engine)
+
+class Prefetch:
+    """Iterate `chunks` on a background thread, at most `depth` items ahead of the consumer.
+
+    Parsing (pyarrow, and pandas' C parser for the most part) releases the GIL, so
+    several sources are read concurrently while the caller works through one of them.
+    Exceptions raised by the reader are re-raised by the consumer; close() stops it early.
+    """
+
+    _DONE = object()
+
+    def __init__(self, chunks, depth=PREFETCH_CHUNKS):
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, chunks):
+        try:
+            for chunk in chunks:
+                if not self._put(chunk):
+                    break
+        except BaseException as exc:
+            self._put(exc)
+            return
+        finally:
+            close = getattr(chunks, "close", None)
+            if close and self._stop.is_set():
+                close()
+        self._put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+def load_data(refresh=False, engine="fast"):
     print("Loading data...")
     try:
-        inventory = pd.read_excel(FILES["inventory"])
-        procurement = pd.read_csv(FILES["procurement"])
-        production = pd.read_csv(FILES["production"])
+        # One thread per source: wall time is about that of the slowest source
+        with ThreadPoolExecutor(max_workers=len(FILES)) as pool:
+            frames = list(pool.map(lambda name: load_source(name, refresh, engine),
+                                   ["inventory", "procurement", "production"]))
+        inventory, procurement, production = frames
         return inventory, procurement, production
     except Exception as e:
         print(f"Error loading data: {e}")
         return None, None, None
 
 # --- 2. Transform Data ---
-def transform_data(inventory, procurement, production):
-    print("Transforming data...")
-
-    # --- INVENTORY ---
+def transform_inventory(inventory):
     # Col mapping: 'Part No.' -> Part_ID, 'Current Stock Level' -> Stock_Quantity, 'Brand' -> Supplier
     inventory = inventory.rename(columns={
         'Part No.': 'Part_ID',
@@ -44,12 +217,39 @@ def transform_data(inventory, procurement, production):
     inventory['Stock_Quantity'] = pd.to_numeric(inventory['Stock_Quantity'], errors='coerce').fillna(0)
     inventory['Unit_Cost'] = pd.to_numeric(inventory['Unit_Cost'], errors='coerce').fillna(0)
     
-    # Calculate Value and Reorder Point
+    # Calculate Value (reorder points need demand history: see build_inventory_analytics)
     inventory['Total_Value'] = inventory['Stock_Quantity'] * inventory['Unit_Cost']
-    inventory['Reorder_Point'] = (inventory['Stock_Quantity'] * 0.3).astype(int) # Simple logic
-    inventory['Reorder_Status'] = np.where(inventory['Stock_Quantity'] <= inventory['Reorder_Point'], 'Reorder Now', 'OK')
+    return inventory
+
+# Jobs and POs link to parts on a consistent-hash ring: each part owns PART_LINK_REPLICAS
+# points and a key links to the owner of the first point after its hash, so adding or
+# removing one part only moves the keys on that part's arcs (about 1/N of them)
+PART_LINK_REPLICAS = 64
+
+@functools.lru_cache(maxsize=4)
+def _part_ring(part_ids):
+    """(sorted ring points, owning Part_ID of each) for a tuple of Part_IDs."""
+    owners = pd.Series(np.repeat(np.array(part_ids, dtype=object), PART_LINK_REPLICAS))
+    replicas = pd.Series(np.tile(np.arange(PART_LINK_REPLICAS), len(part_ids))).astype(str)
+    points = pd.util.hash_pandas_object((owners + '#' + replicas).astype(str), index=False).to_numpy()
+    order = np.argsort(points, kind='stable')
+    return points[order], owners.to_numpy()[order]
 
-    # --- PROCUREMENT ---
+def link_parts(keys, part_ids):
+    """Deterministic Part_ID for each key (Job_ID / PO_ID): a stable hash of the key onto the part ring.
+
+    The sources share no part number, so jobs and POs are linked to inventory this way;
+    the same inputs always give the same links (see check_part_links for part list changes).
+    """
+    part_ids = tuple(np.sort(pd.Series(part_ids, dtype=object).dropna().astype(str).unique()))
+    if len(part_ids) == 0:
+        return pd.Series('UNKNOWN', index=keys.index)
+    points, owners = _part_ring(part_ids)
+    hashes = pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy()
+    slots = np.searchsorted(points, hashes, side='right') % len(points)
+    return pd.Series(owners[slots], index=keys.index)
+
+def transform_procurement(procurement, part_ids):
     # PO_ID, Supplier, Order_Date, Delivery_Date, Order_Status, Defective_Units, Compliance
     procurement['Order_Date'] = pd.to_datetime(procurement['Order_Date'], errors='coerce')
     procurement['Delivery_Date'] = pd.to_datetime(procurement['Delivery_Date'], errors='coerce')
@@ -58,7 +258,11 @@ def transform_data(inventory, procurement, production):
     procurement['Discrepancy_Flag'] = (procurement['Defective_Units'] > 0) | (procurement['Order_Status'] != 'Delivered')
     procurement['Days_To_Deliver'] = (procurement['Delivery_Date'] - procurement['Order_Date']).dt.days
 
-    # --- PRODUCTION ---
+    # Part received on the PO (the lots jobs consume: see build_genealogy)
+    procurement['Part_ID'] = link_parts(procurement['PO_ID'], part_ids)
+    return procurement
+
+def transform_production(production, part_ids):
     # Map Operation Steps
     op_map = {
         'Grinding': 'Cleaning',
@@ -79,79 +283,1015 @@ def transform_data(inventory, procurement, production):
     production['Delay_Hours'] = (production['Actual_End'] - production['Scheduled_End']).dt.total_seconds() / 3600
     production['Delay_Status'] = np.where(production['Delay_Hours'] > 0, 'Delayed', 'On Time')
 
-    # Simulate Linking Production to Inventory (Part_ID)
-    # We don't have a direct link, so we'll assign random Part_IDs from inventory to Jobs for the demo
-    if 'Part_ID' in inventory.columns and not inventory.empty:
-        part_ids = inventory['Part_ID'].unique()
-        production['Part_ID'] = np.random.choice(part_ids, size=len(production))
-    else:
-        production['Part_ID'] = 'UNKNOWN'
+    # Part the job processes
+    production['Part_ID'] = link_parts(production['Job_ID'], part_ids)
+    return production
 
+def transform_data(inventory, procurement, production):
+    print("Transforming data...")
+    inventory = transform_inventory(inventory)
+    part_ids = inventory['Part_ID'].unique() if 'Part_ID' in inventory.columns else []
+    procurement = transform_procurement(procurement, part_ids)
+    production = transform_production(production, part_ids)
     return inventory, procurement, production
 
 # --- 3. Save to SQLite ---
+def insert_rows(conn, table, df):
+    cols = list(db.SCHEMA[table]["columns"])
+    col_list = ', '.join(f'"{c}"' for c in cols)
+    conn.executemany(f'INSERT OR REPLACE INTO "{table}" ({col_list}) VALUES ({", ".join("?" * len(cols))})',
+                     db.encode_rows(df, table, conn))
+
 def save_to_db(inventory, procurement, production):
-    print(f"Saving to {DB_PATH}...")
-    conn = sqlite3.connect(DB_PATH)
+    print(f"Saving to {db.DB_PATH}...")
+    conn = db.connect()
     
-    inventory.to_sql('inventory', conn, if_exists='replace', index=False)
-    procurement.to_sql('procurement', conn, if_exists='replace', index=False)
-    production.to_sql('production', conn, if_exists='replace', index=False)
+    with conn:
+        # sqlite3 only opens a transaction implicitly before DML, so the DROP/CREATE
+        # statements below would otherwise commit on their own
+        conn.execute("BEGIN IMMEDIATE")
+        for table in list(FILES) + list(SUMMARIES):
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        db.init_schema(conn)
+        insert_rows(conn, 'inventory', inventory)
+        insert_rows(conn, 'procurement', procurement)
+        insert_rows(conn, 'production', production)
+        init_summaries(conn)
+        build_inventory_analytics(conn)
+        build_supplier_scorecard(conn)
+        build_genealogy(conn)
+        build_batch_plan(conn)
     
     conn.close()
     print("Database saved.")
 
+# --- 3b. Incremental Load ---
+# Each source is fingerprinted by size/mtime (cheap) and SHA-256 (on stat change).
+# Rows are hashed by their natural key, so only added/changed rows are transformed
+# and upserted, and rows that disappeared from the source are deleted.
+def init_state(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            source TEXT PRIMARY KEY,
+            path TEXT,
+            size INTEGER,
+            mtime_ns INTEGER,
+            sha256 TEXT,
+            row_count INTEGER,
+            loaded_at TEXT
+        )""")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ROW_HASH_TABLE} (
+            source TEXT,
+            row_key TEXT,
+            row_hash INTEGER,
+            PRIMARY KEY (source, row_key)
+        ) WITHOUT ROWID""")
+
+def source_fingerprint(conn, name):
+    """Return (fingerprint, changed) for a source file compared to the last load."""
+    path = FILES[name]
+    stat = os.stat(path)
+    row = conn.execute(f"SELECT size, mtime_ns, sha256 FROM {STATE_TABLE} WHERE source = ?", (name,)).fetchone()
+    fingerprint = {"source": name, "path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+    if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+        fingerprint["sha256"] = row[2]
+        return fingerprint, False
+    fingerprint["sha256"] = source_cache.content_hash(path)
+    return fingerprint, not (row and row[2] == fingerprint["sha256"])
+
+def save_fingerprint(conn, fingerprint, row_count=None):
+    conn.execute(f"""
+        INSERT INTO {STATE_TABLE} (source, path, size, mtime_ns, sha256, row_count, loaded_at)
+        VALUES (:source, :path, :size, :mtime_ns, :sha256, :row_count, :loaded_at)
+        ON CONFLICT(source) DO UPDATE SET
+            path = excluded.path, size = excluded.size, mtime_ns = excluded.mtime_ns, sha256 = excluded.sha256,
+            row_count = COALESCE(excluded.row_count, row_count), loaded_at = excluded.loaded_at
+        """, {**fingerprint, "row_count": row_count, "loaded_at": datetime.now().isoformat(timespec='seconds')})
+
+def row_hashes(raw):
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy().view(np.int64)
+
+def diff_rows(conn, name, raw):
+    """Stage the key/hash of every raw row and return the rows that are new or changed."""
+    raw_key, _ = SOURCE_KEYS[name]
+    raw = raw.dropna(subset=[raw_key]).drop_duplicates(subset=[raw_key], keep='last')
+    staged = list(zip(raw[raw_key].astype(str), row_hashes(raw).tolist()))
+    conn.executemany("INSERT OR REPLACE INTO _etl_stage (row_key, row_hash) VALUES (?, ?)", staged)
+    changed_keys = {k for (k,) in conn.execute(f"""
+        SELECT s.row_key FROM _etl_stage s
+        LEFT JOIN {ROW_HASH_TABLE} h ON h.source = ? AND h.row_key = s.row_key
+        WHERE h.row_hash IS NULL OR h.row_hash != s.row_hash""", (name,))}
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {ROW_HASH_TABLE} (source, row_key, row_hash)
+        SELECT ?, s.row_key, s.row_hash FROM _etl_stage s
+        LEFT JOIN {ROW_HASH_TABLE} h ON h.source = ? AND h.row_key = s.row_key
+        WHERE h.row_hash IS NULL OR h.row_hash != s.row_hash""", (name, name))
+    conn.execute("INSERT OR IGNORE INTO _etl_seen (row_key) SELECT row_key FROM _etl_stage")
+    conn.execute("DELETE FROM _etl_stage")
+    return raw[raw[raw_key].astype(str).isin(changed_keys)]
+
+def upsert_rows(conn, table, df):
+    """INSERT ... ON CONFLICT DO UPDATE the given rows, keyed by the table's primary key."""
+    if df.empty:
+        return 0
+    key = db.primary_key(table)
+    cols = list(db.SCHEMA[table]["columns"])
+    col_list = ', '.join(f'"{c}"' for c in cols)
+    updates = ', '.join(f'"{c}" = excluded."{c}"' for c in cols if c != key)
+    conn.executemany(
+        f'INSERT INTO "{table}" ({col_list}) VALUES ({", ".join("?" * len(cols))}) '
+        f'ON CONFLICT("{key}") DO UPDATE SET {updates}',
+        db.encode_rows(df, table, conn))
+    return len(df)
+
+def delete_missing_rows(conn, name, table, touched=None):
+    """Remove rows whose key is no longer present in the source."""
+    removed = conn.execute(f"""
+        DELETE FROM {ROW_HASH_TABLE}
+        WHERE source = ? AND row_key NOT IN (SELECT row_key FROM _etl_seen)""", (name,)).rowcount
+    if removed:
+        key = db.primary_key(table)
+        missing = f'FROM "{table}" WHERE "{key}" NOT IN (SELECT row_key FROM _etl_seen)'
+        rows = db.read_sql(f"SELECT * {missing}", conn)
+        apply_summary_deltas(conn, table, rows, -1)
+        note_touched(touched, rows)
+        conn.execute(f"DELETE {missing}")
+    conn.execute("DELETE FROM _etl_seen")
+    return removed
+
+def existing_rows(conn, table, keys):
+    """Current DB rows for the given primary-key values (used to retract old summary contributions)."""
+    conn.execute("DELETE FROM _etl_keys")
+    conn.executemany("INSERT OR IGNORE INTO _etl_keys (row_key) VALUES (?)", ((str(k),) for k in keys))
+    key = db.primary_key(table)
+    return db.read_sql(f'SELECT * FROM "{table}" WHERE "{key}" IN (SELECT row_key FROM _etl_keys)', conn)
+
+# Machines, WIP steps and parts of the linked-source rows a load changed (their old and
+# new values), so the derived tables are only rebuilt for those (see build_genealogy,
+# build_interval_analytics); None means everything
+TOUCHED_COLUMNS = ["Machine_ID", "WIP_Step", "Part_ID"]
+
+def note_touched(touched, df):
+    if touched is None:
+        return
+    for col in TOUCHED_COLUMNS:
+        if col in df.columns:
+            touched[col].update(df[col].dropna().astype(str))
+
+def transform_source(name, raw, part_ids):
+    if name == "inventory":
+        return transform_inventory(raw)
+    if name == "procurement":
+        return transform_procurement(raw, part_ids)
+    return transform_production(raw, part_ids)
+
+def check_part_links(conn, touched=None):
+    """(sorted inventory Part_IDs, {linked source: rows relinked}) for this load.
+
+    link_parts() depends on the part list, so when it changed since the last load the
+    stored links of the linked sources are re-derived (see relink_parts); on the ring
+    only the rows of added or removed parts move.
+    """
+    part_ids = [r[0] for r in conn.execute("SELECT Part_ID FROM inventory ORDER BY Part_ID")]
+    # The ring layout is part of the digest, so changing it relinks too
+    layout = [f"ring:{PART_LINK_REPLICAS}"] + [str(p) for p in part_ids]
+    digest = hashlib.sha256("\n".join(layout).encode()).hexdigest()
+    row = conn.execute(f"SELECT sha256 FROM {STATE_TABLE} WHERE source = 'part_links'").fetchone()
+    if row is not None and row[0] == digest:
+        return part_ids, {}
+    relinked = {name: relink_parts(conn, name, part_ids, touched) for name in LINKED_SOURCES}
+    save_fingerprint(conn, {"source": "part_links", "path": None, "size": len(part_ids), "mtime_ns": None,
+                            "sha256": digest})
+    return part_ids, relinked
+
+def relink_parts(conn, table, part_ids, touched=None):
+    """Re-derive the Part_ID of every stored row of `table`; only rows whose link moved are rewritten.
+
+    The link depends on the key alone, so the source file is not re-read; the moved rows'
+    summary contributions are retracted and re-added under the new part. Returns their count.
+    """
+    key = db.primary_key(table)
+    links = db.read_sql(f'SELECT "{key}", Part_ID FROM "{table}"', conn)
+    moved = links[link_parts(links[key], part_ids).to_numpy() != links['Part_ID'].astype(str).to_numpy()]
+    if moved.empty:
+        return 0
+    rows = existing_rows(conn, table, moved[key])
+    apply_summary_deltas(conn, table, rows, -1)
+    note_touched(touched, rows[['Part_ID']])  # only the link moves
+    rows['Part_ID'] = link_parts(rows[key], part_ids)
+    apply_summary_deltas(conn, table, rows, +1)
+    note_touched(touched, rows[['Part_ID']])
+    conn.executemany(f'UPDATE "{table}" SET Part_ID = ? WHERE "{key}" = ?',
+                     zip(rows['Part_ID'].tolist(), rows[key].astype(str).tolist()))
+    return len(rows)
+
+def incremental_load(full=False, chunksize=None, refresh_cache=False, run=None, engine="fast"):
+    """Load only added/changed rows of changed sources, in a single transaction.
+
+    CSV sources are streamed in bounded chunks; each chunk is diffed, transformed
+    and upserted on its own, so memory stays flat regardless of file size. Every
+    changed source is parsed on its own background thread (a few chunks ahead), so
+    reading overlaps across sources and with the writes; the writes stay serial.
+    Per-stage timings are recorded on `run` (an instrumentation.PipelineRun).
+    Returns the names of the sources that changed.
+    """
+    print(f"Incremental load into {db.DB_PATH}...")
+    run = run or instrumentation.PipelineRun()
+    conn = db.connect()
+    changed_sources = []
+    try:
+        with conn:
+            # Explicit: DDL (the --full drops, layout rebuilds, summary rebuilds) must be
+            # part of the transaction, which sqlite3 only opens implicitly before DML
+            conn.execute("BEGIN IMMEDIATE")
+            init_state(conn)
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _etl_stage (row_key TEXT PRIMARY KEY, row_hash INTEGER)")
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _etl_seen (row_key TEXT PRIMARY KEY)")
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _etl_keys (row_key TEXT PRIMARY KEY)")
+            if full:
+                # Source and summary tables only; pipeline_runs keeps its history
+                for table in list(FILES) + list(SUMMARIES):
+                    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            # Tables created (or rebuilt for a new layout) start empty, so reload their sources
+            created = db.init_schema(conn)
+            for name in created:
+                conn.execute(f"DELETE FROM {STATE_TABLE} WHERE source = ?", (name,))
+                conn.execute(f"DELETE FROM {ROW_HASH_TABLE} WHERE source = ?", (name,))
+                # ...and its summaries, which would otherwise count the reloaded rows twice
+                for table, spec in SUMMARIES.items():
+                    if spec["source"] == name:
+                        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            with run.stage("init_summaries"):
+                # A summary built from an unchanged source still changes what is derived from it
+                summarized = {SUMMARIES[table]["source"] for table in init_summaries(conn)}
+            # Reloaded fact tables rebuild everything derived from them
+            touched = None if set(LINKED_SOURCES) & set(created) else {col: set() for col in TOUCHED_COLUMNS}
+            origin = data_clock(conn)
+            fingerprints, readers = {}, {}
+            for name in FILES:
+                with run.stage(f"{name}.fingerprint"):
+                    fingerprints[name], changed = source_fingerprint(conn, name)
+                run.fingerprints[name] = fingerprints[name]["sha256"]
+                if changed:
+                    readers[name] = Prefetch(iter_source(name, chunksize, refresh=refresh_cache, engine=engine))
+            try:
+                part_ids, relinked = None, {}
+                for name in FILES:
+                    if name in LINKED_SOURCES and part_ids is None:
+                        # FILES lists inventory first, so links are made against the loaded part list
+                        with run.stage("relink_parts") as stage:
+                            part_ids, relinked = check_part_links(conn, touched)
+                            stage.rows_out = sum(relinked.values())
+                    fingerprint = fingerprints[name]
+                    if name not in readers:
+                        save_fingerprint(conn, fingerprint)
+                        if relinked.get(name):
+                            print(f"  {name}: unchanged, {relinked[name]} rows relinked to new parts")
+                            changed_sources.append(name)
+                        elif name in summarized:
+                            print(f"  {name}: unchanged, summaries rebuilt")
+                            changed_sources.append(name)
+                        else:
+                            print(f"  {name}: unchanged, skipped")
+                        continue
+                    scope = touched if name in LINKED_SOURCES else None
+                    rows_read = upserted = 0
+                    for raw in run.iter_stage(f"{name}.read", readers[name]):
+                        with run.stage(f"{name}.diff") as stage:
+                            stage.rows_in = len(raw)
+                            raw_delta = diff_rows(conn, name, raw)
+                            stage.rows_out = len(raw_delta)
+                        with run.stage(f"{name}.transform") as stage:
+                            stage.rows_in = len(raw_delta)
+                            delta = transform_source(name, raw_delta, part_ids)
+                            stage.rows_out = len(delta)
+                        if not delta.empty:
+                            with run.stage(f"{name}.summaries") as stage:
+                                stage.rows_in = len(delta)
+                                old = existing_rows(conn, name, delta[db.primary_key(name)])
+                                apply_summary_deltas(conn, name, old, -1)
+                                apply_summary_deltas(conn, name, delta, +1)
+                                note_touched(scope, old)
+                                note_touched(scope, delta)
+                        with run.stage(f"{name}.upsert") as stage:
+                            stage.rows_in = len(delta)
+                            stage.rows_out = upsert_rows(conn, name, delta)
+                        upserted += stage.rows_out
+                        rows_read += len(raw)
+                    with run.stage(f"{name}.delete") as stage:
+                        removed = stage.rows_out = delete_missing_rows(conn, name, name, scope)
+                    save_fingerprint(conn, fingerprint, row_count=rows_read)
+                    print(f"  {name}: {rows_read} rows read, {upserted} upserted, {removed} removed"
+                          + (f", {relinked[name]} relinked" if relinked.get(name) else ""))
+                    changed_sources.append(name)
+            finally:
+                for reader in readers.values():
+                    reader.close()
+            if changed_sources:
+                # ABC needs every SKU's value, XYZ the production demand, safety stock the lead times
+                with run.stage("inventory_analytics") as stage:
+                    stage.rows_out = build_inventory_analytics(conn)
+                print(f"  inventory analytics: {stage.rows_out} SKUs classified")
+            if "procurement" in changed_sources or "supplier_scorecard" in created:
+                with run.stage("supplier_scorecard") as stage:
+                    stage.rows_out = build_supplier_scorecard(conn)
+                print(f"  supplier scorecard: {stage.rows_out} supplier/window rows")
+            if {"procurement", "production"} & set(changed_sources) or set(GENEALOGY_TABLES) & set(created):
+                parts = None if touched is None or set(GENEALOGY_TABLES) & set(created) else touched["Part_ID"]
+                with run.stage("genealogy") as stage:
+                    stage.rows_out = build_genealogy(conn, parts)
+                print(f"  genealogy: {stage.rows_out} jobs traced"
+                      + (f" ({len(parts)} parts changed)" if parts is not None else ""))
+            if "production" in changed_sources or "batch_plan" in created:
+                with run.stage("batch_plan") as stage:
+                    stage.rows_out = build_batch_plan(conn)
+                print(f"  batch_plan: {stage.rows_out} pending jobs scheduled")
+            if "production" in changed_sources or set(INTERVAL_TABLES) & set(created):
+                scoped = touched is not None and not set(INTERVAL_TABLES) & set(created)
+                with run.stage("interval_analytics") as stage:
+                    if scoped:
+                        stage.rows_in = build_interval_analytics(conn, touched["Machine_ID"], touched["WIP_Step"], origin)
+                    else:
+                        stage.rows_in = build_interval_analytics(conn)
+                print(f"  interval analytics: {stage.rows_in} jobs swept")
+    finally:
+        conn.close()
+    return changed_sources
+
+# --- 3c. Summary Tables ---
+# Small pre-aggregated tables the dashboards read instead of scanning the fact tables.
+# Every measure is additive, so a changed row is applied as a (-old, +new) delta and a
+# refresh only touches the rows that arrived. Means are stored as Sum/Count pairs.
+DELAY_BIN_MINUTES = 5
+ON_TIME_DAYS = 14  # deliveries within this many days of the order count as on time
+
+def _month(df):
+    return df['Order_Date'].dt.to_period('M').astype(str)
+
+def _delay_bin(df):
+    return (df['Delay_Hours'] * 60 // DELAY_BIN_MINUTES) * DELAY_BIN_MINUTES / 60
+
+# keys: {column: (declared type, source column or function)}; measures: {column: function}
+SUMMARIES = {
+    "summary_wip": {
+        "source": "production",
+        "keys": {"WIP_Step": ("TEXT", "WIP_Step"), "Job_Status": ("TEXT", "Job_Status"),
+                 "Delay_Status": ("TEXT", "Delay_Status")},
+        "measures": {
+            "Processing_Time_Sum": lambda df: df['Processing_Time'].fillna(0),
+            "Processing_Time_Count": lambda df: df['Processing_Time'].notna(),
+        },
+    },
+    # Which WIP steps each machine runs, and its availability (used by build_batch_plan)
+    "summary_machine_steps": {
+        "source": "production",
+        "keys": {"Machine_ID": ("TEXT", "Machine_ID"), "WIP_Step": ("TEXT", "WIP_Step")},
+        "measures": {
+            "Availability_Sum": lambda df: df['Machine_Availability'].fillna(0),
+            "Availability_Count": lambda df: df['Machine_Availability'].notna(),
+        },
+    },
+    # Jobs per part per day: the demand series behind XYZ classes and safety stock
+    "summary_part_demand": {
+        "source": "production",
+        "keys": {"Part_ID": ("TEXT", "Part_ID"), "Day": ("TEXT", lambda df: df['Scheduled_Start'].dt.strftime('%Y-%m-%d'))},
+        "measures": {},
+    },
+    # Delivery times of the POs linked to each part: the lead times behind safety stock
+    "summary_part_lead_time": {
+        "source": "procurement",
+        "filter": lambda df: df['Days_To_Deliver'].notna(),
+        "keys": {"Part_ID": ("TEXT", "Part_ID")},
+        "measures": {"Days_To_Deliver_Sum": lambda df: df['Days_To_Deliver']},
+    },
+    # Daily per-supplier PO buckets; supplier_scorecard rolls them up into 30/90/365-day windows
+    "summary_supplier_daily": {
+        "source": "procurement",
+        "filter": lambda df: df['Order_Date'].notna(),
+        "keys": {"Supplier": ("TEXT", "Supplier"), "Day": ("TEXT", lambda df: df['Order_Date'].dt.strftime('%Y-%m-%d'))},
+        "measures": {
+            "Deliveries": lambda df: df['Days_To_Deliver'].notna(),
+            "On_Time": lambda df: df['Days_To_Deliver'] <= ON_TIME_DAYS,
+            "Quantity": lambda df: df['Quantity'].fillna(0),
+            "Defective_Units": lambda df: df['Defective_Units'].fillna(0),
+            "Spend": lambda df: (df['Unit_Price'] * df['Quantity']).fillna(0),
+            "Negotiated_Spend": lambda df: (df['Negotiated_Price'] * df['Quantity']).fillna(0),
+            "Compliance_Known": lambda df: df['Compliance'].notna(),
+            "Non_Compliant": lambda df: df['Compliance'] == 'No',
+        },
+    },
+    "summary_delays": {
+        "source": "production",
+        "filter": lambda df: df['Delay_Hours'] > 0,
+        "keys": {"Delay_Bin_Hours": ("REAL", _delay_bin)},
+        "measures": {},
+    },
+    "summary_inventory_category": {
+        "source": "inventory",
+        "keys": {"Category": ("TEXT", "Category")},
+        "measures": {
+            "Stock_Quantity": lambda df: df['Stock_Quantity'].fillna(0),
+            "Total_Value": lambda df: df['Total_Value'].fillna(0),
+        },
+    },
+    "summary_monthly_quality": {
+        "source": "procurement",
+        "filter": lambda df: df['Order_Date'].notna(),  # no month to chart them under
+        "keys": {"Month": ("TEXT", _month)},
+        "measures": {"Defective_Units": lambda df: df['Defective_Units'].fillna(0)},
+    },
+    "summary_supplier_quality": {
+        "source": "procurement",
+        "keys": {"Supplier": ("TEXT", "Supplier")},
+        "measures": {
+            "Defective_Units": lambda df: df['Defective_Units'].fillna(0),
+            "Compliance_Known": lambda df: df['Compliance'].notna(),
+            "Compliant": lambda df: df['Compliance'] == 'Yes',
+            "Non_Compliant": lambda df: df['Compliance'] == 'No',
+            "Discrepancies": lambda df: df['Discrepancy_Flag'],
+            "Discrepant_Defective_Units": lambda df: df['Defective_Units'].fillna(0).where(df['Discrepancy_Flag'], 0),
+            "Days_To_Deliver_Sum": lambda df: df['Days_To_Deliver'].fillna(0),
+            "Days_To_Deliver_Count": lambda df: df['Days_To_Deliver'].notna(),
+        },
+    },
+}
+
+def summary_columns(spec):
+    return [(k, decl) for k, (decl, _) in spec["keys"].items()] + \
+           [("Rows", "INTEGER")] + [(m, "REAL") for m in spec["measures"]]
+
+def init_summaries(conn):
+    """Create summary tables; new or re-laid-out ones are built once from their fact table.
+
+    Returns the tables that were (re)built.
+    """
+    rebuilt = []
+    for table, spec in SUMMARIES.items():
+        expected = summary_columns(spec)
+        actual = [(r[1], r[2]) for r in conn.execute(f'PRAGMA table_info("{table}")')]
+        if actual == expected:
+            continue
+        rebuilt.append(table)
+        cols = ", ".join(f'"{c}" {decl}' for c, decl in expected)
+        keys = ", ".join(f'"{k}"' for k in spec["keys"])
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'CREATE TABLE "{table}" ({cols}, PRIMARY KEY ({keys}))')
+        for chunk in pd.read_sql(f'SELECT * FROM "{spec["source"]}"', conn, chunksize=CHUNK_SIZE):
+            apply_summary_deltas(conn, spec["source"], db.decode_frame(chunk, conn), +1, tables=[table])
+    return rebuilt
+
+def apply_summary_deltas(conn, source, df, sign, tables=None):
+    """Add (sign=+1) or retract (sign=-1) the contribution of `df` rows to the source's summaries."""
+    if df.empty:
+        return
+    for table, spec in SUMMARIES.items():
+        if spec["source"] != source or (tables and table not in tables):
+            continue
+        rows = df[spec["filter"](df)] if "filter" in spec else df
+        if rows.empty:
+            continue
+        frame = pd.DataFrame(index=rows.index)
+        for key, (decl, expr) in spec["keys"].items():
+            values = rows[expr] if isinstance(expr, str) else expr(rows)
+            frame[key] = values.astype(object).fillna('Unknown') if decl == "TEXT" else values
+        frame["Rows"] = sign
+        for measure, func in spec["measures"].items():
+            frame[measure] = func(rows).astype(float) * sign
+        agg = frame.groupby(list(spec["keys"]), dropna=False).sum().reset_index()
+        cols = list(agg.columns)
+        col_list = ", ".join(f'"{c}"' for c in cols)
+        key_list = ", ".join(f'"{k}"' for k in spec["keys"])
+        updates = ", ".join(f'"{c}" = "{c}" + excluded."{c}"' for c in cols if c not in spec["keys"])
+        conn.executemany(
+            f'INSERT INTO "{table}" ({col_list}) VALUES ({", ".join("?" * len(cols))}) '
+            f'ON CONFLICT ({key_list}) DO UPDATE SET {updates}',
+            agg.astype(object).where(agg.notna(), None).itertuples(index=False, name=None))
+        conn.execute(f'DELETE FROM "{table}" WHERE "Rows" <= 0')
+
+# --- 3d. Inventory Analytics ---
+# ABC: classes by cumulative share of stock value (A up to 80%, B up to 95%, C the rest).
+# XYZ: classes by the coefficient of variation of daily demand (jobs using the part).
+# Reorder point: expected demand over the lead time plus safety stock
+# z * sigma_daily * sqrt(lead time), with a service level set by ABC class. A part's lead
+# time is the mean delivery time of the POs linked to it (the overall mean if it has none).
+ABC_THRESHOLDS = (80, 95)
+XYZ_THRESHOLDS = (0.5, 1.0)
+SERVICE_LEVEL_Z = {'A': 2.33, 'B': 1.65, 'C': 1.28}  # 99% / 95% / 90%
+DEFAULT_LEAD_TIME_DAYS = 7
+
+def classify_inventory(inventory, demand, days, lead_times):
+    """Vectorized ABC/XYZ classes and safety-stock reorder points.
+
+    inventory: Part_ID, Stock_Quantity, Total_Value, Min Nos.
+    demand: Part_ID, Demand (total jobs), Demand_Sq (sum of squared daily job counts).
+    days: length of the demand history in days; lead_times: {Part_ID: days}, None for the default.
+    """
+    out = inventory[['Part_ID']].copy()
+    value = inventory['Total_Value'].fillna(0).clip(lower=0)
+    order = value.sort_values(ascending=False, kind='stable').index
+    cumulative = 100 * value.loc[order].cumsum() / value.sum() if value.sum() > 0 else pd.Series(100.0, index=order)
+    out['ABC_Class'] = pd.Series(np.select([cumulative <= ABC_THRESHOLDS[0], cumulative <= ABC_THRESHOLDS[1]],
+                                           ['A', 'B'], 'C'), index=order)
+
+    stats = out[['Part_ID']].merge(demand, on='Part_ID', how='left').fillna({'Demand': 0, 'Demand_Sq': 0})
+    stats.index = out.index
+    days = max(days, 1)
+    mean = stats['Demand'] / days
+    std = np.sqrt((stats['Demand_Sq'] / days - mean ** 2).clip(lower=0))
+    cv = (std / mean).where(mean > 0)
+    out['Avg_Daily_Demand'] = mean.round(4)
+    out['Demand_CV'] = cv.round(4)
+    out['XYZ_Class'] = np.select([cv <= XYZ_THRESHOLDS[0], cv <= XYZ_THRESHOLDS[1]], ['X', 'Y'], 'Z')
+
+    lead = inventory['Part_ID'].astype(object).map(lead_times).fillna(lead_times.get(None, DEFAULT_LEAD_TIME_DAYS)).clip(lower=1)
+    out['Lead_Time_Days'] = lead.round(2)
+    out['Safety_Stock'] = (out['ABC_Class'].map(SERVICE_LEVEL_Z) * std * np.sqrt(lead)).round(2)
+    reorder = np.ceil(mean * lead + out['Safety_Stock'])
+    out['Reorder_Point'] = np.maximum(reorder, pd.to_numeric(inventory['Min Nos'], errors='coerce').fillna(0)).astype(int)
+    out['Reorder_Status'] = np.where(inventory['Stock_Quantity'].fillna(0) <= out['Reorder_Point'], 'Reorder Now', 'OK')
+    return out
+
+def build_inventory_analytics(conn):
+    """Recompute the inventory analytics columns for every SKU; returns the number of SKUs."""
+    inventory = db.read_sql('SELECT Part_ID, Stock_Quantity, Total_Value, "Min Nos" FROM inventory', conn)
+    demand = pd.read_sql("SELECT Part_ID, SUM(Rows) AS Demand, SUM(Rows * Rows) AS Demand_Sq "
+                         "FROM summary_part_demand WHERE Day != 'Unknown' GROUP BY Part_ID", conn)
+    days = conn.execute("SELECT julianday(MAX(Day)) - julianday(MIN(Day)) + 1 FROM summary_part_demand "
+                        "WHERE Day != 'Unknown'").fetchone()[0] or 1
+    # Average delivery time per part; None holds the overall average for parts without deliveries
+    lead_times = dict(conn.execute("SELECT Part_ID, Days_To_Deliver_Sum / Rows FROM summary_part_lead_time"))
+    lead_times[None] = conn.execute("SELECT SUM(Days_To_Deliver_Sum) / SUM(Rows) "
+                                    "FROM summary_part_lead_time").fetchone()[0] or DEFAULT_LEAD_TIME_DAYS
+    result = classify_inventory(inventory, demand, days, lead_times)
+    cols = [c for c in result.columns if c != 'Part_ID']
+    rows = result[cols + ['Part_ID']].astype(object)
+    assignments = ", ".join(f'"{c}" = ?' for c in cols)
+    conn.executemany(f"UPDATE inventory SET {assignments} WHERE Part_ID = ?",
+                     rows.where(rows.notna(), None).itertuples(index=False, name=None))
+    return len(result)
+
+# --- 3e. Supplier Scorecard ---
+# Rolling-window KPIs per supplier, summed from the daily buckets in summary_supplier_daily
+# (which new POs update by delta), so a refresh costs O(suppliers x days), not O(POs).
+# Windows end at the latest order date on record.
+SCORECARD_WINDOWS = [30, 90, 365]
+
+def build_supplier_scorecard(conn):
+    """Rebuild supplier_scorecard from the daily buckets; returns the number of rows."""
+    conn.execute("DELETE FROM supplier_scorecard")
+    windows = " UNION ALL ".join(f"SELECT {days} AS Days" for days in SCORECARD_WINDOWS)
+    return conn.execute(f"""
+        INSERT INTO supplier_scorecard (Supplier, Window_Days, As_Of, Orders, Deliveries, On_Time_Rate, Quantity,
+                                        Defective_Units, Defect_Rate, Price_Variance_Pct, Non_Compliance_Rate)
+        SELECT s.Supplier, w.Days, CAST(strftime('%s', a.As_Of) AS INTEGER), SUM(s.Rows), SUM(s.Deliveries),
+               SUM(s.On_Time) / NULLIF(SUM(s.Deliveries), 0), SUM(s.Quantity), SUM(s.Defective_Units),
+               SUM(s.Defective_Units) / NULLIF(SUM(s.Quantity), 0),
+               100 * (SUM(s.Spend) - SUM(s.Negotiated_Spend)) / NULLIF(SUM(s.Negotiated_Spend), 0),
+               SUM(s.Non_Compliant) / NULLIF(SUM(s.Compliance_Known), 0)
+        FROM summary_supplier_daily s
+        CROSS JOIN ({windows}) w
+        CROSS JOIN (SELECT MAX(Day) AS As_Of FROM summary_supplier_daily WHERE Day != 'Unknown') a
+        WHERE s.Day > date(a.As_Of, '-' || w.Days || ' days') AND s.Day <= a.As_Of
+        GROUP BY s.Supplier, w.Days""").rowcount
+
+# --- 3f. Lot Genealogy ---
+# Job -> Part_ID -> PO/Supplier, materialized for recall queries in both directions.
+# A job consumes the lot of its part received most recently before it was scheduled to
+# start; lot_genealogy has one row per job (with its status, indexed by PO, part and
+# supplier/receipt date), po_genealogy one row per PO with the jobs it fed and how many
+# of them failed, so recall queries never join the fact tables.
+GENEALOGY_TABLES = ["lot_genealogy", "po_genealogy"]
+RECEIVED_STATUSES = ('Delivered', 'Partially Delivered')
+
+def build_genealogy(conn, parts=None):
+    """Rebuild lot_genealogy and po_genealogy in SQL; returns the number of jobs traced.
+
+    With `parts` (Part_IDs) only the jobs and POs of those parts are rebuilt: a job's lot
+    is always a PO of its own part, so no other rows can change.
+    """
+    if parts is None:
+        # Bulk rebuild: indexes are dropped during the inserts and rebuilt in one pass afterwards
+        for table in GENEALOGY_TABLES:
+            db.drop_indexes(conn, table)
+            conn.execute(f'DELETE FROM "{table}"')
+        scope = ""
+    else:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS _etl_parts (Part_ID TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM _etl_parts")
+        conn.executemany("INSERT OR IGNORE INTO _etl_parts (Part_ID) VALUES (?)", ((str(p),) for p in parts))
+        scope = "AND Part_ID IN (SELECT Part_ID FROM _etl_parts)"
+        for table in GENEALOGY_TABLES:
+            conn.execute(f'DELETE FROM "{table}" WHERE 1 {scope}')
+    statuses = ", ".join(f"'{s}'" for s in RECEIVED_STATUSES)
+    jobs = conn.execute(f"""
+        INSERT INTO lot_genealogy (Job_ID, Part_ID, Job_Status, Scheduled_Start, PO_ID, Supplier, Received)
+        SELECT j.Job_ID, j.Part_ID, js.Value, j.Scheduled_Start, p.PO_ID, s.Value, p.Delivery_Date
+        FROM (SELECT Job_ID, Part_ID, Job_Status, Scheduled_Start,
+                     (SELECT r.PO_ID FROM procurement r
+                      WHERE r.Part_ID = production.Part_ID AND r.Delivery_Date <= production.Scheduled_Start
+                        AND r.Order_Status IN ({statuses})
+                      ORDER BY r.Delivery_Date DESC, r.PO_ID DESC LIMIT 1) AS Lot_PO
+              FROM production WHERE 1 {scope}) j
+        LEFT JOIN dim_job_status js ON js.Code = j.Job_Status
+        LEFT JOIN procurement p ON p.PO_ID = j.Lot_PO
+        LEFT JOIN dim_supplier s ON s.Code = p.Supplier""").rowcount
+    conn.execute(f"""
+        INSERT INTO po_genealogy (PO_ID, Supplier, Part_ID, Delivery_Date, Compliance, Jobs, Failed_Jobs,
+                                  First_Job_Start, Last_Job_Start)
+        SELECT p.PO_ID, s.Value, p.Part_ID, p.Delivery_Date, c.Value, COALESCE(g.Jobs, 0), COALESCE(g.Failed_Jobs, 0),
+               g.First_Job_Start, g.Last_Job_Start
+        FROM (SELECT * FROM procurement WHERE 1 {scope}) p
+        LEFT JOIN (SELECT PO_ID, COUNT(*) AS Jobs, SUM(Job_Status = 'Failed') AS Failed_Jobs,
+                          MIN(Scheduled_Start) AS First_Job_Start, MAX(Scheduled_Start) AS Last_Job_Start
+                   FROM lot_genealogy WHERE PO_ID IS NOT NULL {scope} GROUP BY PO_ID) g ON g.PO_ID = p.PO_ID
+        LEFT JOIN dim_supplier s ON s.Code = p.Supplier
+        LEFT JOIN dim_compliance c ON c.Code = p.Compliance""")
+    if parts is None:
+        for table in GENEALOGY_TABLES:
+            db.create_indexes(conn, table)
+    return jobs
+
+# --- 3g. Batch Plan ---
+def data_clock(conn):
+    """Latest recorded activity (the data's "now") in epoch seconds, or the wall clock."""
+    return conn.execute("SELECT MAX(Actual_Start) FROM production").fetchone()[0] or int(time.time())
+
+def build_batch_plan(conn):
+    """Re-plan every pending job into batch_plan (see scheduler.py); returns the number of jobs planned."""
+    pending = db.read_sql("SELECT Job_ID, Part_ID, Operation_Type, WIP_Step, Processing_Time, Scheduled_End AS Due "
+                          "FROM production WHERE Job_Status = (SELECT Code FROM dim_job_status WHERE Value = 'Pending')",
+                          conn)
+    # Machines can run the WIP steps they have run before; work already started holds a
+    # machine until its scheduled end
+    machines = db.read_sql("SELECT Machine_ID, WIP_Step, Availability_Sum / Availability_Count AS Availability "
+                           "FROM summary_machine_steps WHERE Machine_ID != 'Unknown'", conn)
+    busy = db.read_sql("SELECT Machine_ID, Scheduled_End AS Busy_Until FROM production "
+                       "WHERE Actual_Start IS NOT NULL AND Actual_End IS NULL", conn)
+    machines = machines.merge(busy.groupby('Machine_ID', as_index=False)['Busy_Until'].max(), on='Machine_ID', how='left')
+    plan = scheduler.plan(pending, machines, data_clock(conn))
+    conn.execute("DELETE FROM batch_plan")
+    insert_rows(conn, "batch_plan", plan)
+    return len(plan)
+
+# --- 3h. Interval Analytics ---
+# Machine utilization, double bookings and idle gaps are swept one machine at a time,
+# and queue depth one WIP step at a time, so memory is bounded by the largest group.
+INTERVAL_TABLES = ["machine_utilization", "machine_conflicts", "machine_idle_gaps", "wip_queue_depth"]
+INTERVAL_BASES = {"Scheduled": ("Scheduled_Start", "Scheduled_End"), "Actual": ("Actual_Start", "Actual_End")}
+
+def _from_epoch(df, cols):
+    for col in cols:
+        df[col] = pd.to_datetime(df[col], unit='s')
+    return df
+
+def _interval_scope(conn, column, labels, open_jobs):
+    """Dimension codes of `column` to rebuild: every code in production, or those of `labels`
+    plus the ones that have `open_jobs` (jobs measured up to the data clock)."""
+    if labels is None:
+        return [r[0] for r in conn.execute(f"SELECT DISTINCT {column} FROM production WHERE {column} IS NOT NULL")]
+    codes = {code for code, label in db.dimension(conn, column).items() if label in labels}
+    if open_jobs:
+        codes |= {r[0] for r in conn.execute(f"SELECT DISTINCT {column} FROM production "
+                                             f"WHERE {column} IS NOT NULL AND ({open_jobs})")}
+    return sorted(codes)
+
+def _delete_scope(conn, table, column, labels):
+    if labels is None:
+        conn.execute(f'DELETE FROM "{table}"')
+    elif labels:
+        conn.execute(f'DELETE FROM "{table}" WHERE "{column}" IN ({", ".join("?" * len(labels))})', labels)
+
+def build_interval_analytics(conn, machines=None, steps=None, origin=None):
+    """Rebuild the INTERVAL_TABLES from production; returns the number of jobs swept.
+
+    With `machines` / `steps` (labels) only their rows are rebuilt. Jobs still running or
+    pending are measured up to data_clock(), so if it moved from `origin` (its value
+    before the load) the machines and steps with such jobs are rebuilt as well.
+    """
+    clock = data_clock(conn)
+    running = "Actual_Start IS NOT NULL AND Actual_End IS NULL"
+    pending = "Job_Status = (SELECT Code FROM dim_job_status WHERE Value = 'Pending')"
+    moved = machines is not None and origin != clock
+    machine_codes = _interval_scope(conn, "Machine_ID", machines, moved and running)
+    step_codes = _interval_scope(conn, "WIP_Step", steps, moved and f"{running} OR {pending}")
+    # Fact tables are read by dimension code; TIMESTAMP columns stay epoch seconds (pd.read_sql)
+    machine_labels = db.dimension(conn, "Machine_ID")
+    scope = None if machines is None else [machine_labels[code] for code in machine_codes]
+    for table in ["machine_utilization", "machine_conflicts", "machine_idle_gaps"]:
+        _delete_scope(conn, table, "Machine_ID", scope)
+    swept = 0
+    for code in machine_codes:
+        machine = machine_labels[code]
+        jobs = pd.read_sql("SELECT Job_ID, Scheduled_Start, Scheduled_End, Actual_Start, Actual_End "
+                           "FROM production WHERE Machine_ID = ?", conn, params=[code])
+        swept += len(jobs)
+        for basis, (start_col, end_col) in INTERVAL_BASES.items():
+            starts, ends = jobs[start_col], jobs[end_col]
+            if basis == "Actual":
+                ends = ends.where(ends.notna() | starts.isna(), clock)  # still running
+            valid = (starts.notna() & ends.notna() & (ends > starts)).to_numpy()
+            if not valid.any():
+                continue
+            ids = jobs['Job_ID'].to_numpy()[valid]
+            starts, ends = starts.to_numpy()[valid].astype(np.int64), ends.to_numpy()[valid].astype(np.int64)
+            stats, gaps = intervals.machine_profile(ids, starts, ends)
+            clashes = intervals.conflicts(ids, starts, ends)
+            clashes['Overlap_Minutes'] = (clashes['Overlap_End'] - clashes['Overlap_Start']) / 60
+            stats.update(Machine_ID=machine, Basis=basis, Conflicting_Jobs=len(clashes), Idle_Gaps=len(gaps))
+            insert_rows(conn, "machine_utilization", _from_epoch(pd.DataFrame([stats]), ['Span_Start', 'Span_End']))
+            insert_rows(conn, "machine_conflicts",
+                        _from_epoch(clashes.assign(Machine_ID=machine, Basis=basis), ['Overlap_Start', 'Overlap_End']))
+            insert_rows(conn, "machine_idle_gaps",
+                        _from_epoch(gaps.assign(Machine_ID=machine, Basis=basis), ['Gap_Start', 'Gap_End']))
+    step_labels, statuses = db.dimension(conn, "WIP_Step"), db.dimension(conn, "Job_Status")
+    scope = None if steps is None else [step_labels[code] for code in step_codes]
+    _delete_scope(conn, "wip_queue_depth", "WIP_Step", scope)
+    for code in step_codes:
+        step = step_labels[code]
+        jobs = pd.read_sql("SELECT Scheduled_Start, Actual_Start, Actual_End, Job_Status FROM production WHERE WIP_Step = ?",
+                           conn, params=[code])
+        jobs['Job_Status'] = jobs['Job_Status'].map(statuses)
+        depth = intervals.queue_depth(jobs, clock)
+        insert_rows(conn, "wip_queue_depth", _from_epoch(depth.assign(WIP_Step=step), ['Period_Start']))
+    return swept
+
 # --- 4. Generate Reports ---
-def generate_reports(inventory, procurement, production):
+# Each workbook is a list of (sheet, query). Workbooks are written concurrently in a
+# process pool, each streaming its query results row by row through xlsxwriter's
+# constant_memory mode, so memory stays flat regardless of table size.
+EXCEL_MAX_ROWS = 1_048_576  # per sheet, including the header row
+EPOCH = datetime(1970, 1, 1)
+REPORTS = {
+    "Production_Schedule": [
+        ("Schedule", "SELECT Job_ID, Part_ID, WIP_Step, Scheduled_Start, Scheduled_End, Delay_Status FROM production"),
+        # Pending jobs by planned start, grouped into sterilization batches (scheduler.py)
+        ("Batch_Recommendations", "SELECT Batch_ID, Machine_ID, WIP_Step, Job_ID, Part_ID, Operation_Type, Processing_Time, "
+                                  "Planned_Start, Planned_End, Due_Date, Lateness_Hours FROM batch_plan "
+                                  "ORDER BY Planned_Start, Batch_ID, Job_ID"),
+    ],
+    "Lot_Status_Tracker": [
+        ("Lot_Tracker", "SELECT Job_ID, Part_ID, WIP_Step, Job_Status, Delay_Hours FROM production ORDER BY Job_ID, WIP_Step"),
+    ],
+    "PO_Discrepancies": [
+        ("Discrepancies", "SELECT * FROM procurement WHERE Discrepancy_Flag = 1"),
+        # Work Schedule (Top 10 urgents)
+        ("Work_Queue", "SELECT * FROM procurement WHERE Discrepancy_Flag = 1 LIMIT 10"),
+    ],
+    "Inventory_Master": [
+        ("Master_List", "SELECT Part_ID, Description, Category, Stock_Quantity, Reorder_Point, Reorder_Status, Total_Value, "
+                        "ABC_Class, XYZ_Class, Avg_Daily_Demand, Safety_Stock, Lead_Time_Days FROM inventory"),
+        # Low Stock
+        ("Reorder_List", "SELECT Part_ID, Description, Category, Stock_Quantity, Reorder_Point, Reorder_Status, Total_Value, "
+                         "ABC_Class, XYZ_Class, Safety_Stock FROM inventory WHERE Reorder_Status = 'Reorder Now'"),
+    ],
+    "Compliance_Report": [
+        ("Non_Compliant_POs", "SELECT * FROM procurement "
+                              "WHERE Compliance = (SELECT Code FROM dim_compliance WHERE Value = 'No')"),
+        # Failed Jobs (Quarantine)
+        ("Quarantined_Lots", "SELECT * FROM production "
+                             "WHERE Job_Status = (SELECT Code FROM dim_job_status WHERE Value = 'Failed')"),
+    ],
+}
+
+def write_report(name, sheets, db_path, reports_dir):
+    """Write one workbook, timed as stage `report.<name>`; returns (name, rows written, stage record)."""
+    with instrumentation.Stage(f"report.{name}") as stage:
+        stage.rows_out = write_workbook(name, sheets, db_path, reports_dir)
+    return name, stage.rows_out, stage.record()
+
+def write_workbook(name, sheets, db_path, reports_dir):
+    """Stream the given queries into one workbook; sheets over Excel's row limit continue on Sheet_2, Sheet_3, ..."""
+    path = os.path.join(reports_dir, f"{name}.xlsx")
+    tmp = path + ".tmp"
+    conn = db.connect(db_path)
+    workbook = xlsxwriter.Workbook(tmp, {'constant_memory': True})
+    date_fmt = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    header_fmt = workbook.add_format({'bold': True, 'border': 1})
+    rows_written = 0
+    try:
+        for sheet, sql in sheets:
+            cursor = conn.execute(sql)
+            header = [d[0] for d in cursor.description]
+            kinds = [db.COLUMN_TYPES.get(col) for col in header]
+            # Dimension columns of fact tables come back as codes; derived tables hold the text
+            labels = {col: db.dimension(conn, col) for col in header if col in db.DIMENSIONS}
+            part, row = 1, EXCEL_MAX_ROWS
+            for record in cursor:
+                if row == EXCEL_MAX_ROWS:
+                    worksheet = workbook.add_worksheet(sheet if part == 1 else f"{sheet[:28]}_{part}")
+                    worksheet.write_row(0, 0, header, header_fmt)
+                    part, row = part + 1, 1
+                for col, (value, kind) in enumerate(zip(record, kinds)):
+                    if value is None:
+                        continue
+                    if header[col] in labels and isinstance(value, int):
+                        worksheet.write(row, col, labels[header[col]].get(value, value))
+                    elif kind == "TIMESTAMP":
+                        worksheet.write_datetime(row, col, EPOCH + timedelta(seconds=value), date_fmt)
+                    elif kind == "BOOLEAN":
+                        worksheet.write_boolean(row, col, bool(value))
+                    else:
+                        worksheet.write(row, col, value)
+                row += 1
+                rows_written += 1
+            if part == 1:
+                # Empty result: still emit the sheet with its header
+                workbook.add_worksheet(sheet).write_row(0, 0, header, header_fmt)
+        workbook.close()
+        os.replace(tmp, path)
+    finally:
+        conn.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return rows_written
+
+def generate_reports(workers=None, run=None):
+    """Build every workbook in REPORTS from the current database; `workers=1` runs serially.
+
+    Each workbook's timing (measured in the process that wrote it) is added to `run`.
+    """
     print("Generating Excel reports...")
     if not os.path.exists(REPORTS_DIR):
         os.makedirs(REPORTS_DIR)
 
-    # 1. Production Schedule
-    with pd.ExcelWriter(f"{REPORTS_DIR}/Production_Schedule.xlsx", engine='xlsxwriter') as writer:
-        sched = production[['Job_ID', 'Part_ID', 'WIP_Step', 'Scheduled_Start', 'Scheduled_End', 'Delay_Status']]
-        sched.to_excel(writer, sheet_name='Schedule', index=False)
-        # Recommendations (Simulated)
-        recs = production[production['Job_Status'] == 'Pending'].head(20)
-        recs.to_excel(writer, sheet_name='Batch_Recommendations', index=False)
-
-    # 2. Lot Status Tracker
-    with pd.ExcelWriter(f"{REPORTS_DIR}/Lot_Status_Tracker.xlsx", engine='xlsxwriter') as writer:
-        lot_status = production[['Job_ID', 'Part_ID', 'WIP_Step', 'Job_Status', 'Delay_Hours']]
-        lot_status.sort_values(['Job_ID', 'WIP_Step']).to_excel(writer, sheet_name='Lot_Tracker', index=False)
-
-    # 3. PO Discrepancies
-    with pd.ExcelWriter(f"{REPORTS_DIR}/PO_Discrepancies.xlsx", engine='xlsxwriter') as writer:
-        issues = procurement[procurement['Discrepancy_Flag'] == True]
-        issues.to_excel(writer, sheet_name='Discrepancies', index=False)
-        # Work Schedule (Top 10 urgents)
-        issues.head(10).to_excel(writer, sheet_name='Work_Queue', index=False)
+    jobs = [(name, sheets, db.DB_PATH, REPORTS_DIR) for name, sheets in REPORTS.items()]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers == 1:
+        results = [write_report(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(write_report, *zip(*jobs)))
+    for name, rows, record in results:
+        if run:
+            run.add(record)
+        audit.log("Report Generated", source="etl", detail={"report": f"{name}.xlsx", "rows": rows,
+                                                            "run_id": run.run_id if run else None})
+        print(f"  {name}.xlsx: {rows} rows")
 
-    # 4. Inventory Master
-    with pd.ExcelWriter(f"{REPORTS_DIR}/Inventory_Master.xlsx", engine='xlsxwriter') as writer:
-        inv_view = inventory[['Part_ID', 'Description', 'Category', 'Stock_Quantity', 'Reorder_Point', 'Reorder_Status', 'Total_Value']]
-        inv_view.to_excel(writer, sheet_name='Master_List', index=False)
-        # Low Stock
-        low_stock = inv_view[inv_view['Stock_Quantity'] <= inv_view['Reorder_Point']]
-        low_stock.to_excel(writer, sheet_name='Reorder_List', index=False)
+    print(f"Reports generated in {REPORTS_DIR}/")
 
-    # 5. Compliance Report
-    with pd.ExcelWriter(f"{REPORTS_DIR}/Compliance_Report.xlsx", engine='xlsxwriter') as writer:
-        non_compliant = procurement[procurement['Compliance'] == 'No']
-        non_compliant.to_excel(writer, sheet_name='Non_Compliant_POs', index=False)
-        # Failed Jobs (Quarantine)
-        failed_jobs = production[production['Job_Status'] == 'Failed']
-        failed_jobs.to_excel(writer, sheet_name='Quarantined_Lots', index=False)
+# --- 5. Publish Dashboard Snapshot ---
+# Tables the dashboard reads whole are published as a memory-mapped Arrow snapshot
+# (see snapshot.py); everything else is still queried from SQLite.
+SNAPSHOT_TABLES = list(FILES) + list(SUMMARIES) + ["supplier_scorecard"]
+# The sources each snapshot table is built from: a refresh only rewrites the tables of changed
+# sources. inventory also holds the analytics columns, which every changed source recomputes.
+SNAPSHOT_SOURCES = {**{table: (table,) for table in FILES},
+                    **{table: (spec["source"],) for table, spec in SUMMARIES.items()},
+                    "inventory": tuple(FILES),
+                    "supplier_scorecard": ("procurement",)}
 
-    print(f"Reports generated in {REPORTS_DIR}/")
+def snapshot_stale():
+    manifest = snapshot.current()
+    return manifest is None or set(manifest["tables"]) != set(SNAPSHOT_TABLES)
 
-def main():
-    inv, proc, prod = load_data()
-    if inv is not None:
-        inv, proc, prod = transform_data(inv, proc, prod)
-        save_to_db(inv, proc, prod)
-        generate_reports(inv, proc, prod)
-        print("Data processing complete! Ready for Streamlit.")
+def publish_snapshot(run, changed_sources=None):
+    """Publish SNAPSHOT_TABLES as a new snapshot version; returns the rows written.
+
+    With `changed_sources`, the tables of the other sources are carried over from the
+    live version unchanged.
+    """
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{run.run_id}"
+    unchanged = []
+    if changed_sources is not None and not snapshot_stale():
+        unchanged = [table for table in SNAPSHOT_TABLES if not set(SNAPSHOT_SOURCES[table]) & set(changed_sources)]
+    rows = snapshot.publish(SNAPSHOT_TABLES, version, unchanged=unchanged)
+    audit.log("Snapshot Published", source="etl", detail={"version": version, "rows": rows, "run_id": run.run_id})
+    print(f"Snapshot {version} published to {snapshot.SNAPSHOT_DIR}/ ({rows} rows written)")
+    return rows
+
+def main(full=False, chunksize=None, refresh_cache=False, workers=None, reports_only=False, engine="fast",
+         reports=True):
+    """Run the pipeline; returns the sources that changed. reports=False leaves the Excel
+    reports to the caller (watch mode regenerates them on its own cadence)."""
+    # Every run (including failed ones) is recorded in pipeline_runs
+    run = instrumentation.PipelineRun()
+    event, status = {"run_id": run.run_id, "full": full, "reports_only": reports_only}, "Failed"
+    try:
+        if reports_only:
+            with run.stage("generate_reports"):
+                generate_reports(workers=workers, run=run)
+            status = "Success"
+            return
+        with run.stage("incremental_load"):
+            changed = incremental_load(full=full, chunksize=chunksize, refresh_cache=refresh_cache, run=run,
+                                       engine=engine)
+        event["changed_sources"] = changed
+        if changed or snapshot_stale():
+            with run.stage("publish_snapshot") as stage:
+                stage.rows_out = publish_snapshot(run, changed)
+        if changed:
+            if reports:
+                with run.stage("generate_reports"):
+                    generate_reports(workers=workers, run=run)
+            print("Data processing complete! Ready for Streamlit.")
+        else:
+            print("Sources unchanged; database and reports are up to date.")
+        status = "Success"
+        return changed
+    finally:
+        run.save()
+        print(f"Run {run.run_id}: {len(run.stages)} stage timings saved to pipeline_runs")
+        audit.log("ETL Run", status=status, source="etl", detail=event)
+        audit.flush()
+
+# --- 6. Watch Mode ---
+# A long-running refresher: the source paths in FILES are polled (stat only, so no
+# extra dependency and no cost while idle), a burst of changes is debounced until the
+# files stop changing, and the incremental ETL then runs. Dashboards keep reading
+# throughout (WAL, atomic snapshot swap) and pick the new snapshot version up by polling
+# data_access.data_stamp(). The Excel reports are not part of a refresh: they are
+# regenerated at most every WATCH_REPORT_SECONDS, while the sources are quiet.
+WATCH_POLL_SECONDS = 1.0
+WATCH_DEBOUNCE_SECONDS = 2.0
+WATCH_REPORT_SECONDS = 300.0
+
+def source_stats():
+    """{source: (size, mtime_ns)} of every source file, None for missing ones."""
+    stats = {}
+    for name, path in FILES.items():
+        try:
+            stat = os.stat(path)
+            stats[name] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stats[name] = None
+    return stats
+
+def missing_sources(stats):
+    missing = [name for name, stat in stats.items() if stat is None]
+    if missing:
+        print(f"Waiting for missing sources: {', '.join(missing)}")
+    return missing
+
+def watch(poll=WATCH_POLL_SECONDS, debounce=WATCH_DEBOUNCE_SECONDS, report_every=WATCH_REPORT_SECONDS, **options):
+    """Run main(**options) whenever a source file changes, until interrupted."""
+    print(f"Watching {len(FILES)} sources (poll every {poll}s, debounce {debounce}s, "
+          f"reports at most every {report_every}s); Ctrl+C to stop.")
+    seen = source_stats()
+    audit.log("Watch Started", source="etl", detail={"sources": list(FILES), "poll": poll, "debounce": debounce,
+                                                     "report_every": report_every})
+    # Catch up on anything that changed while nothing was watching; with a source missing,
+    # the first refresh runs once it appears
+    if not missing_sources(seen):
+        try:
+            main(**options)
+        except Exception as exc:  # keep watching; the failed run is recorded in pipeline_runs
+            print(f"Initial refresh failed: {exc!r}")
+    reports_due, reported_at = False, time.monotonic()
+    try:
+        while True:
+            time.sleep(poll)
+            current = source_stats()
+            if current == seen:
+                if reports_due and time.monotonic() - reported_at >= report_every:
+                    try:
+                        main(reports_only=True, workers=options.get("workers"))
+                        reports_due = False
+                    except Exception as exc:  # retried after the next interval
+                        print(f"Report generation failed: {exc!r}")
+                    reported_at = time.monotonic()
+                continue
+            # Wait for the files to settle: copies still in progress, several files dropped at once
+            while True:
+                time.sleep(debounce)
+                settled = source_stats()
+                if settled == current:
+                    break
+                current = settled
+            changed = [name for name in FILES if current[name] != seen.get(name)]
+            seen = current
+            if missing_sources(current):
+                continue
+            audit.log("Source Change Detected", source="etl", detail={"sources": changed})
+            print(f"\n[{datetime.now():%H:%M:%S}] Change detected in {', '.join(changed)}; refreshing...")
+            try:
+                reports_due = bool(main(**options, reports=False)) or reports_due
+            except Exception as exc:  # keep watching; the failed run is recorded in pipeline_runs
+                print(f"Refresh failed: {exc!r}")
+    except KeyboardInterrupt:
+        audit.log("Watch Stopped", source="etl")
+        print("Stopped watching." + (" Reports are out of date: run with --reports-only." if reports_due else ""))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Globus Sterile Ops ETL pipeline")
+    parser.add_argument("--full", action="store_true", help="Ignore stored fingerprints and reload every row")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help="Rows per chunk when streaming CSV sources")
+    parser.add_argument("--refresh-cache", action="store_true", help="Re-parse sources instead of using the Parquet cache")
+    parser.add_argument("--reports-only", action="store_true", help="Only regenerate the Excel reports from the existing DB")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used for report generation (default: one per report)")
+    parser.add_argument("--engine", choices=ENGINES, default="fast",
+                        help="Source parsers: pyarrow/calamine (fast) or the default pandas readers")
+    parser.add_argument("--watch", action="store_true", help="Keep running and refresh whenever a source file changes")
+    parser.add_argument("--poll", type=float, default=WATCH_POLL_SECONDS, help="Seconds between source checks in --watch mode")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE_SECONDS,
+                        help="Seconds the sources must stay unchanged before a --watch refresh starts")
+    parser.add_argument("--report-every", type=float, default=WATCH_REPORT_SECONDS,
+                        help="Minimum seconds between Excel report rebuilds in --watch mode")
+    args = parser.parse_args()
+    if args.watch:
+        watch(poll=args.poll, debounce=args.debounce, report_every=args.report_every, chunksize=args.chunksize,
+              refresh_cache=args.refresh_cache, workers=args.workers, engine=args.engine)
+    else:
+        main(full=args.full, chunksize=args.chunksize, refresh_cache=args.refresh_cache, workers=args.workers,
+             reports_only=args.reports_only, engine=args.engine)
@@ -0,0 +1,419 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+DB_PATH = "globus_sterile.db"
+
+# --- Schema ---
+# Column types are SQLite declared types. TIMESTAMP columns hold Unix epoch seconds
+# (INTEGER), BOOLEAN columns hold 0/1 and CATEGORY columns hold integer codes into a
+# dimension table (see DIMENSIONS); read_sql() decodes them back to pandas
+# datetime64/bool/categorical so pages never re-parse date strings.
+SCHEMA = {
+    "inventory": {
+        "columns": {
+            "Item Code": "TEXT",
+            "Item Description": "TEXT",
+            "Part_ID": "TEXT PRIMARY KEY",
+            "Description": "TEXT",
+            "Category": "TEXT",
+            "Unit Of Measurement": "TEXT",
+            "Spare Part Type": "TEXT",
+            "Bin_Location": "TEXT",
+            "Specify": "TEXT",
+            "Part Category": "TEXT",
+            "Is Expiry date Required": "TEXT",
+            "Min Nos": "INTEGER",
+            "Max Nos": "INTEGER",
+            "Unit_Cost": "REAL",
+            "Maximum Price Per Nos (RM)": "REAL",
+            "Supplier": "CATEGORY",
+            "Status": "TEXT",
+            "Expiry Age (In Month)": "REAL",
+            "Stock_Quantity": "INTEGER",
+            "Total_Value": "REAL",
+            "Reorder_Point": "INTEGER",
+            "Reorder_Status": "TEXT",
+            # Inventory analytics (data_processor.build_inventory_analytics)
+            "ABC_Class": "TEXT",
+            "XYZ_Class": "TEXT",
+            "Avg_Daily_Demand": "REAL",
+            "Demand_CV": "REAL",
+            "Lead_Time_Days": "REAL",
+            "Safety_Stock": "REAL",
+        },
+        "indexes": [["Supplier"], ["Category"], ["Reorder_Status"], ["ABC_Class", "XYZ_Class"]],
+    },
+    "procurement": {
+        "columns": {
+            "PO_ID": "TEXT PRIMARY KEY",
+            "Supplier": "CATEGORY",
+            "Order_Date": "TIMESTAMP",
+            "Delivery_Date": "TIMESTAMP",
+            "Item_Category": "CATEGORY",
+            "Order_Status": "TEXT",
+            "Quantity": "INTEGER",
+            "Unit_Price": "REAL",
+            "Negotiated_Price": "REAL",
+            "Defective_Units": "REAL",
+            "Compliance": "CATEGORY",
+            "Discrepancy_Flag": "BOOLEAN NOT NULL DEFAULT 0 CHECK (Discrepancy_Flag IN (0, 1))",
+            "Days_To_Deliver": "INTEGER",
+            "Part_ID": "TEXT",
+        },
+        "indexes": [["Supplier"], ["Compliance"], ["Order_Date"], ["Discrepancy_Flag", "Supplier"],
+                    # Covers the received-lot lookup in data_processor.build_genealogy
+                    ["Part_ID", "Delivery_Date", "PO_ID", "Order_Status"]],
+    },
+    "production": {
+        "columns": {
+            "Job_ID": "TEXT PRIMARY KEY",
+            "Machine_ID": "CATEGORY",
+            "Operation_Type": "CATEGORY",
+            "Material_Used": "REAL",
+            "Processing_Time": "INTEGER",
+            "Energy_Consumption": "REAL",
+            "Machine_Availability": "INTEGER",
+            "Scheduled_Start": "TIMESTAMP",
+            "Scheduled_End": "TIMESTAMP",
+            "Actual_Start": "TIMESTAMP",
+            "Actual_End": "TIMESTAMP",
+            "Job_Status": "CATEGORY",
+            "Optimization_Category": "TEXT",
+            "WIP_Step": "CATEGORY",
+            "Delay_Hours": "REAL",
+            "Delay_Status": "CATEGORY",
+            "Part_ID": "TEXT",
+        },
+        "indexes": [["Machine_ID", "Job_Status"], ["Job_Status"], ["WIP_Step", "Job_Status"], ["Part_ID"],
+                    ["Machine_ID", "Scheduled_Start"], ["Machine_ID", "Job_ID"]],
+        # FTS5 trigram index for substring lot search (see init_search)
+        "search": ["Job_ID", "Part_ID"],
+    },
+    # Rolling 30/90/365-day KPIs per supplier (data_processor.build_supplier_scorecard)
+    "supplier_scorecard": {
+        "columns": {
+            "Supplier": "TEXT",
+            "Window_Days": "INTEGER",
+            "As_Of": "TIMESTAMP",
+            "Orders": "INTEGER",
+            "Deliveries": "INTEGER",
+            "On_Time_Rate": "REAL",
+            "Quantity": "REAL",
+            "Defective_Units": "REAL",
+            "Defect_Rate": "REAL",
+            "Price_Variance_Pct": "REAL",
+            "Non_Compliance_Rate": "REAL",
+        },
+        "indexes": [["Window_Days", "Supplier"]],
+    },
+    # Job -> Part_ID -> PO/Supplier genealogy (data_processor.build_genealogy), rebuilt
+    # whenever procurement or production changes. PO_ID is NULL for jobs whose part had
+    # no receipt on record before the job was scheduled.
+    "lot_genealogy": {
+        "columns": {
+            "Job_ID": "TEXT PRIMARY KEY",
+            "Part_ID": "TEXT",
+            "Job_Status": "TEXT",
+            "Scheduled_Start": "TIMESTAMP",
+            "PO_ID": "TEXT",
+            "Supplier": "TEXT",
+            "Received": "TIMESTAMP",
+        },
+        "indexes": [["PO_ID"], ["Part_ID"], ["Supplier", "Received"]],
+    },
+    "po_genealogy": {
+        "columns": {
+            "PO_ID": "TEXT PRIMARY KEY",
+            "Supplier": "TEXT",
+            "Part_ID": "TEXT",
+            "Delivery_Date": "TIMESTAMP",
+            "Compliance": "TEXT",
+            "Jobs": "INTEGER",
+            "Failed_Jobs": "INTEGER",
+            "First_Job_Start": "TIMESTAMP",
+            "Last_Job_Start": "TIMESTAMP",
+        },
+        "indexes": [["Supplier", "Delivery_Date"], ["Failed_Jobs"], ["Supplier", "Failed_Jobs"], ["Part_ID"]],
+    },
+    # Pending jobs assigned to machines and sterilization batches (see scheduler.py);
+    # rebuilt by the ETL whenever production changes
+    "batch_plan": {
+        "columns": {
+            "Job_ID": "TEXT PRIMARY KEY",
+            "Batch_ID": "INTEGER",
+            "WIP_Step": "TEXT",
+            "Operation_Type": "TEXT",
+            "Part_ID": "TEXT",
+            "Machine_ID": "TEXT",
+            "Processing_Time": "INTEGER",
+            "Planned_Start": "TIMESTAMP",
+            "Planned_End": "TIMESTAMP",
+            "Due_Date": "TIMESTAMP",
+            "Lateness_Hours": "REAL",
+        },
+        "indexes": [["Batch_ID"], ["Planned_Start"]],
+    },
+    # Sweep-line interval analytics (see intervals.py), rebuilt by the ETL whenever
+    # production changes. Basis is 'Scheduled' or 'Actual' (which timestamps were used).
+    "machine_utilization": {
+        "columns": {
+            "Machine_ID": "TEXT",
+            "Basis": "TEXT",
+            "Jobs": "INTEGER",
+            "Span_Start": "TIMESTAMP",
+            "Span_End": "TIMESTAMP",
+            "Busy_Hours": "REAL",
+            "Idle_Hours": "REAL",
+            "Utilization": "REAL",
+            "Double_Booked_Hours": "REAL",
+            "Max_Concurrency": "INTEGER",
+            "Conflicting_Jobs": "INTEGER",
+            "Idle_Gaps": "INTEGER",
+        },
+        "indexes": [["Basis", "Machine_ID"]],
+    },
+    "machine_conflicts": {
+        "columns": {
+            "Machine_ID": "TEXT",
+            "Basis": "TEXT",
+            "Job_ID": "TEXT",
+            "Conflicting_Job_ID": "TEXT",
+            "Overlap_Start": "TIMESTAMP",
+            "Overlap_End": "TIMESTAMP",
+            "Overlap_Minutes": "REAL",
+        },
+        "indexes": [["Basis", "Overlap_Minutes"], ["Job_ID"]],
+    },
+    "machine_idle_gaps": {
+        "columns": {
+            "Machine_ID": "TEXT",
+            "Basis": "TEXT",
+            "Gap_Start": "TIMESTAMP",
+            "Gap_End": "TIMESTAMP",
+            "Gap_Hours": "REAL",
+        },
+        "indexes": [["Basis", "Gap_Hours"], ["Machine_ID", "Gap_Start"]],
+    },
+    "wip_queue_depth": {
+        "columns": {
+            "WIP_Step": "TEXT",
+            "Period_Start": "TIMESTAMP",
+            "Avg_Queue": "REAL",
+            "Max_Queue": "INTEGER",
+            "Avg_In_Process": "REAL",
+            "Max_In_Process": "INTEGER",
+        },
+        "indexes": [["WIP_Step", "Period_Start"], ["Period_Start"]],
+    },
+    # One row per ETL stage per run, written by instrumentation.PipelineRun
+    "pipeline_runs": {
+        "columns": {
+            "Id": "INTEGER PRIMARY KEY",
+            "Run_ID": "TEXT NOT NULL",
+            "Started_At": "TIMESTAMP",
+            "Stage": "TEXT NOT NULL",
+            "Duration_Seconds": "REAL",
+            "Rows_In": "INTEGER",
+            "Rows_Out": "INTEGER",
+            "Peak_RSS_MB": "REAL",
+            "Status": "TEXT",
+            "Source_Fingerprints": "TEXT",
+        },
+        "indexes": [["Started_At"], ["Stage", "Started_At"], ["Run_ID"]],
+    },
+}
+
+# --- Dimensions ---
+# Low-cardinality labels repeated on every fact row are stored once in dim_<column>
+# (Code INTEGER PRIMARY KEY, Value TEXT) and referenced by code from CATEGORY columns.
+# Codes are append-only, so they stay valid across --full reloads. Derived and summary
+# tables keep these columns as TEXT; read_sql() returns both forms as categoricals.
+DIMENSIONS = ["Supplier", "Machine_ID", "Operation_Type", "Job_Status", "WIP_Step", "Compliance",
+              "Item_Category", "Delay_Status"]
+
+def dimension_table(column):
+    return f"dim_{column.lower()}"
+
+for _column in DIMENSIONS:
+    SCHEMA[dimension_table(_column)] = {
+        "columns": {"Code": "INTEGER PRIMARY KEY", "Value": "TEXT NOT NULL"},
+        "indexes": [["Value"]],
+    }
+
+def coded_columns(table):
+    return [col for col, decl in SCHEMA[table]["columns"].items() if decl.split()[0] == "CATEGORY"]
+
+# Declared type of every known column, e.g. {"Order_Date": "TIMESTAMP", ...}
+COLUMN_TYPES = {col: decl.split()[0] for spec in SCHEMA.values() for col, decl in spec["columns"].items()}
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")  # readers are never blocked by an ETL write
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def primary_key(table):
+    return next(col for col, decl in SCHEMA[table]["columns"].items() if "PRIMARY KEY" in decl)
+
+def _create_sql(table):
+    cols = ",\n    ".join(f'"{col}" {decl}' for col, decl in SCHEMA[table]["columns"].items())
+    return f'CREATE TABLE "{table}" (\n    {cols}\n)'
+
+def init_schema(conn, tables=None):
+    """Create missing tables/indexes; tables whose layout differs from SCHEMA are rebuilt.
+
+    Returns the names of the tables that were (re)created empty.
+    """
+    created = []
+    tables = list(tables or SCHEMA)
+    # Dimensions first: a new dimension invalidates the codes stored in existing fact tables
+    dims = [dimension_table(c) for t in tables for c in coded_columns(t)]
+    for table in list(dict.fromkeys(dims + tables)):
+        expected = [(col, decl.split()[0], int("PRIMARY KEY" in decl)) for col, decl in SCHEMA[table]["columns"].items()]
+        actual = [(r[1], r[2], r[5]) for r in conn.execute(f'PRAGMA table_info("{table}")')]
+        stale = any(dimension_table(c) in created for c in coded_columns(table))
+        if actual != expected or stale:
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            conn.execute(_create_sql(table))
+            created.append(table)
+        create_indexes(conn, table)
+        if "search" in SCHEMA[table]:
+            init_search(conn, table, rebuild=table in created)
+    return created
+
+def _index_name(table, cols):
+    return f"ix_{table}_" + "_".join(c.lower() for c in cols)
+
+def create_indexes(conn, table):
+    for cols in SCHEMA[table]["indexes"]:
+        col_list = ", ".join(f'"{c}"' for c in cols)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{_index_name(table, cols)}" ON "{table}" ({col_list})')
+
+def drop_indexes(conn, table):
+    """Drop the SCHEMA indexes of `table` (before a bulk rebuild; restore with create_indexes)."""
+    for cols in SCHEMA[table]["indexes"]:
+        conn.execute(f'DROP INDEX IF EXISTS "{_index_name(table, cols)}"')
+
+def search_table(table):
+    return f"{table}_search"
+
+def init_search(conn, table, rebuild=False):
+    """Create the external-content FTS5 trigram index over SCHEMA[table]["search"], kept in sync by triggers.
+
+    Skipped (and searches fall back to prefix lookups) if SQLite lacks FTS5/trigram.
+    """
+    fts = search_table(table)
+    cols = SCHEMA[table]["search"]
+    col_list = ", ".join(cols)
+    new_vals = ", ".join(f"new.{c}" for c in cols)
+    old_vals = ", ".join(f"old.{c}" for c in cols)
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone()
+    if exists and not rebuild:
+        return
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {fts}")
+        conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({col_list}, content='{table}', content_rowid='rowid', tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" BEGIN
+            INSERT INTO {fts} (rowid, {col_list}) VALUES (new.rowid, {new_vals});
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_vals});
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON "{table}" BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_vals});
+            INSERT INTO {fts} (rowid, {col_list}) VALUES (new.rowid, {new_vals});
+        END""")
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+# --- Encoding / decoding ---
+def dimension(conn, column):
+    """{code: label} of a dimension."""
+    return dict(conn.execute(f'SELECT Code, Value FROM "{dimension_table(column)}"'))
+
+def encode_category(conn, column, values):
+    """Map labels to dimension codes, adding labels not seen before."""
+    values = values.astype(object).where(values.notna(), None)
+    labels = values.dropna().astype(str)
+    table = dimension_table(column)
+    codes = {value: code for code, value in dimension(conn, column).items()}
+    new = [v for v in labels.unique() if v not in codes]
+    if new:
+        conn.executemany(f'INSERT INTO "{table}" (Value) VALUES (?)', ((v,) for v in new))
+        codes = {value: code for code, value in dimension(conn, column).items()}
+    return labels.map(codes).astype("Int64").reindex(values.index)
+
+def encode_rows(df, table, conn):
+    """Convert a frame to DB-ready tuples in SCHEMA column order (CATEGORY labels are coded via `conn`)."""
+    out = df.reindex(columns=list(SCHEMA[table]["columns"]))
+    for col in out.columns:
+        kind = SCHEMA[table]["columns"][col].split()[0]
+        if kind == "CATEGORY":
+            out[col] = encode_category(conn, col, out[col])
+        elif kind == "TIMESTAMP":
+            ts = pd.to_datetime(out[col], errors="coerce")
+            out[col] = ts.astype("datetime64[s]").astype("int64").astype("Int64").where(ts.notna())
+        elif kind == "BOOLEAN":
+            out[col] = out[col].fillna(False).astype(bool).astype("int64")
+    out = out.astype(object).where(out.notna(), None)
+    return out.itertuples(index=False, name=None)
+
+def decode_category(values, labels=None):
+    """Categorical of a dimension column, from codes (with their `labels`) or from text."""
+    if labels is None or not pd.api.types.is_numeric_dtype(values):
+        return values.astype("category")
+    codes = values.to_numpy(dtype=float)
+    known = ~np.isnan(codes)
+    present = np.unique(codes[known]).astype(np.int64)
+    names = np.array([labels.get(code, str(code)) for code in present], dtype=object)
+    order = np.argsort(names.astype(str), kind="stable")
+    position = np.full(present.max() + 1 if len(present) else 1, -1, dtype=np.int64)
+    position[present[order]] = np.arange(len(present))
+    cat_codes = np.where(known, position[np.where(known, codes, 0).astype(np.int64)], -1)
+    return pd.Series(pd.Categorical.from_codes(cat_codes, categories=names[order]), index=values.index, name=values.name)
+
+def decode_frame(df, conn=None):
+    """Restore TIMESTAMP, BOOLEAN and CATEGORY columns of a query result to pandas types.
+
+    Dimension columns become categoricals whether they were read as codes (fact tables,
+    decoded through `conn`) or as text (derived tables).
+    """
+    for col in df.columns:
+        kind = COLUMN_TYPES.get(col)
+        if col in DIMENSIONS:
+            numeric = pd.api.types.is_numeric_dtype(df[col])
+            df[col] = decode_category(df[col], dimension(conn, col) if numeric and conn else None)
+        elif kind == "TIMESTAMP":
+            df[col] = pd.to_datetime(df[col], unit="s")
+        elif kind == "BOOLEAN":
+            df[col] = df[col].fillna(0).astype(bool)
+    return df
+
+def compact_frame(df):
+    """Downcast numeric columns where it is lossless: integers to int32, floats to float32."""
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values) or not pd.api.types.is_numeric_dtype(values) or len(values) == 0:
+            continue
+        if pd.api.types.is_integer_dtype(values) and values.dtype.itemsize > 4:
+            if values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max:
+                df[col] = values.astype(np.int32)
+        elif pd.api.types.is_float_dtype(values) and values.dtype.itemsize > 4:
+            narrow = values.astype(np.float32)
+            if (narrow.astype(np.float64) == values)[values.notna()].all():
+                df[col] = narrow
+    return df
+
+def read_sql(sql, conn, params=None, compact=False):
+    """Query into a decoded frame; `compact` also downcasts numerics (see compact_frame)."""
+    df = decode_frame(pd.read_sql(sql, conn, params=params), conn)
+    return compact_frame(df) if compact else df
@@ -0,0 +1,114 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import db
+
+# --- ETL instrumentation ---
+# PipelineRun.stage() wraps a block and records its duration, rows in/out and peak
+# RSS (sampled every 10 ms). Entering the same stage name again (e.g. once per CSV
+# chunk) accumulates into one record. save() writes the records to pipeline_runs.
+SAMPLE_INTERVAL = 0.01
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # No /proc (macOS): fall back to the process high-water mark
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class Stage:
+    """Times a block and samples peak RSS; `rows_in`/`rows_out` may be set inside the block."""
+
+    def __init__(self, name, on_exit=None):
+        self.name, self.on_exit = name, on_exit
+        self.rows_in = self.rows_out = None
+
+    def _sample(self):
+        while not self._done.wait(SAMPLE_INTERVAL):
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def __enter__(self):
+        self.peak_rss = self.start_rss = rss_bytes()
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        self._done.set()
+        self._sampler.join()
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+        self.status = "ok" if exc_type is None else "error"
+        if self.on_exit:
+            self.on_exit(self.record())
+        return False
+
+    def record(self):
+        return {"stage": self.name, "seconds": self.seconds, "rows_in": self.rows_in, "rows_out": self.rows_out,
+                "peak_rss_mb": self.peak_rss / 2**20, "status": self.status}
+
+
+class PipelineRun:
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.fingerprints = {}
+
+    def stage(self, name):
+        return Stage(name, on_exit=self.add)
+
+    def iter_stage(self, name, iterable):
+        """Yield from `iterable`, timing each fetch as stage `name` (rows_out = items' lengths)."""
+        items = iter(iterable)
+        while True:
+            with self.stage(name) as stage:
+                item = next(items, None)
+                stage.rows_out = 0 if item is None else len(item)
+            if item is None:
+                return
+            yield item
+
+    def add(self, record):
+        """Merge a stage record (also used for records returned by report worker processes)."""
+        current = self.stages.get(record["stage"])
+        if current is None:
+            self.stages[record["stage"]] = dict(record)
+            return
+        current["seconds"] += record["seconds"]
+        current["peak_rss_mb"] = max(current["peak_rss_mb"], record["peak_rss_mb"])
+        for key in ("rows_in", "rows_out"):
+            if record[key] is not None:
+                current[key] = (current[key] or 0) + record[key]
+        if record["status"] != "ok":
+            current["status"] = record["status"]
+
+    def save(self, conn=None):
+        own = conn is None
+        conn = conn or db.connect()
+        try:
+            with conn:
+                db.init_schema(conn, ["pipeline_runs"])
+                # Naive local time stored as epoch seconds, like every TIMESTAMP column (see db.encode_rows)
+                started = int(self.started_at.replace(tzinfo=timezone.utc).timestamp())
+                fingerprints = json.dumps(self.fingerprints, sort_keys=True)
+                conn.executemany(
+                    "INSERT INTO pipeline_runs (Run_ID, Started_At, Stage, Duration_Seconds, Rows_In, Rows_Out, "
+                    "Peak_RSS_MB, Status, Source_Fingerprints) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(self.run_id, started, r["stage"], round(r["seconds"], 4), r["rows_in"], r["rows_out"],
+                      round(r["peak_rss_mb"], 1), r["status"], fingerprints) for r in self.stages.values()])
+        finally:
+            if own:
+                conn.close()
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# --- Interval analytics (sweep line) ---
+# Each analysis sorts the interval endpoints once and makes one linear pass over them,
+# so it is O(n log n) in the number of jobs. Times are epoch seconds, as stored in the DB.
+MIN_IDLE_GAP_MINUTES = 30   # shorter gaps between jobs are not listed as idle time
+QUEUE_BIN_SECONDS = 3600    # resolution of the queue-depth time series
+
+
+def sweep(starts, ends):
+    """Return (times, levels) where levels[i] intervals are open from times[i] until times[i + 1].
+
+    Intervals must have end > start.
+    """
+    times = np.concatenate([starts, ends]).astype(np.int64)
+    deltas = np.concatenate([np.ones(len(starts), np.int64), -np.ones(len(ends), np.int64)])
+    order = np.lexsort((deltas, times))  # at equal times ends come first, so back-to-back jobs don't overlap
+    return times[order], np.cumsum(deltas[order])
+
+
+def conflicts(ids, starts, ends):
+    """Jobs that start before an earlier job on the same machine has ended (double bookings).
+
+    Each conflicting job is paired with the open job that ends last.
+    """
+    order = np.lexsort((ends, starts))
+    ids, starts, ends = ids[order], starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+    owner = np.maximum.accumulate(np.where(ends == running_end, np.arange(len(ends)), 0))
+    clash = np.flatnonzero(starts[1:] < running_end[:-1]) + 1
+    prev = owner[clash - 1]
+    return pd.DataFrame({
+        'Job_ID': ids[clash],
+        'Conflicting_Job_ID': ids[prev],
+        'Overlap_Start': starts[clash],
+        'Overlap_End': np.minimum(ends[clash], running_end[clash - 1]),
+    })
+
+
+def machine_profile(ids, starts, ends):
+    """Utilization, double-booked time, peak concurrency and idle gaps of one machine's jobs."""
+    times, levels = sweep(starts, ends)
+    seg, level = np.diff(times), levels[:-1]
+    span = times[-1] - times[0]
+    busy = seg[level > 0].sum()
+    idle = (level == 0) & (seg >= MIN_IDLE_GAP_MINUTES * 60)
+    stats = {
+        'Jobs': len(starts),
+        'Span_Start': times[0],
+        'Span_End': times[-1],
+        'Busy_Hours': busy / 3600,
+        'Idle_Hours': (span - busy) / 3600,
+        'Utilization': busy / span if span else 0.0,
+        'Double_Booked_Hours': seg[level > 1].sum() / 3600,
+        'Max_Concurrency': int(levels.max()),
+    }
+    gaps = pd.DataFrame({'Gap_Start': times[:-1][idle], 'Gap_End': times[1:][idle]})
+    gaps['Gap_Hours'] = (gaps['Gap_End'] - gaps['Gap_Start']) / 3600
+    return stats, gaps
+
+
+def binned_levels(starts, ends, edges):
+    """Time-weighted mean and maximum number of open intervals in each [edges[i], edges[i + 1]) bin."""
+    nbins = len(edges) - 1
+    if len(starts) == 0:
+        return np.zeros(nbins), np.zeros(nbins, np.int64)
+    times, levels = sweep(starts, ends)
+    # The integral of the level is piecewise linear between events, so interpolating it at
+    # the bin edges gives each bin's exact time-weighted mean
+    rel = times - edges[0]
+    area = np.concatenate([[0.0], np.cumsum(np.diff(rel) * levels[:-1], dtype=float)])
+    mean = np.diff(np.interp(edges - edges[0], rel, area)) / np.diff(edges)
+    # Max = level in force at the bin start, or any level reached by an event inside the bin
+    at_start = np.searchsorted(times, edges[:-1], side='right') - 1
+    peak = np.where(at_start >= 0, levels[np.maximum(at_start, 0)], 0)
+    bins = np.searchsorted(edges, times, side='right') - 1
+    inside = (bins >= 0) & (bins < nbins)
+    bins, inner = bins[inside], levels[inside]
+    if len(bins):
+        first = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        peak[bins[first]] = np.maximum(peak[bins[first]], np.maximum.reduceat(inner, first))
+    return mean, peak
+
+
+def queue_depth(jobs, origin, bin_seconds=QUEUE_BIN_SECONDS):
+    """Jobs waiting (Scheduled_Start -> Actual_Start) and in process (Actual_Start -> Actual_End) per time bin.
+
+    Pending jobs count as waiting, and started jobs without an end as in process, until
+    `origin`; jobs that never started for another reason (e.g. Failed) are not queued.
+    """
+    sched = jobs['Scheduled_Start'].to_numpy(float)
+    start = jobs['Actual_Start'].to_numpy(float)
+    end = jobs['Actual_End'].to_numpy(float)
+    pending = (jobs['Job_Status'] == 'Pending').to_numpy()
+    wait_end = np.where(np.isnan(start), np.where(pending, origin, np.nan), start)
+    waiting = ~np.isnan(sched) & (wait_end > sched)
+    run_end = np.where(np.isnan(end), origin, end)
+    running = ~np.isnan(start) & (run_end > start)
+    bounds = np.concatenate([sched[waiting], start[running], wait_end[waiting], run_end[running]])
+    if len(bounds) == 0:
+        return pd.DataFrame(columns=['Period_Start', 'Avg_Queue', 'Max_Queue', 'Avg_In_Process', 'Max_In_Process'])
+    first = int(bounds.min()) // bin_seconds * bin_seconds
+    edges = np.arange(first, int(bounds.max()) + bin_seconds + 1, bin_seconds, dtype=np.int64)
+    avg_queue, max_queue = binned_levels(sched[waiting], wait_end[waiting], edges)
+    avg_run, max_run = binned_levels(start[running], run_end[running], edges)
+    return pd.DataFrame({'Period_Start': edges[:-1], 'Avg_Queue': avg_queue.round(3), 'Max_Queue': max_queue,
+                         'Avg_In_Process': avg_run.round(3), 'Max_In_Process': max_run})
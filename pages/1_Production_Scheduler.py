@@ -1,50 +1,159 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import sqlite3
-import plotly.express as px
+from data_access import query, in_filter, distinct_values, auto_refresh, audit_action
 
 st.set_page_config(page_title="Production Scheduler", page_icon="🗓️", layout="wide")
+auto_refresh()
+audit_action("Page View", "Production Scheduler", once=True)
 
 st.title("🗓️ Production & Batch Scheduler")
 
-# Load Data
-conn = sqlite3.connect("globus_sterile.db")
-df = pd.read_sql("SELECT * FROM production", conn)
-conn.close()
-
 # Filters
+machines = distinct_values("production", "Machine_ID")
+statuses = distinct_values("production", "Job_Status")
 col1, col2 = st.columns(2)
 with col1:
-    machine_filter = st.multiselect("Machine ID", options=df['Machine_ID'].unique(), default=df['Machine_ID'].unique())
+    machine_filter = st.multiselect("Machine ID", options=machines, default=machines)
 with col2:
-    status_filter = st.multiselect("Job Status", options=df['Job_Status'].unique(), default=df['Job_Status'].unique())
+    status_filter = st.multiselect("Job Status", options=statuses, default=statuses)
+
+# --- Viewport ---
+# Only jobs overlapping the selected time window are fetched, and the window opens on
+# the last DEFAULT_WINDOW of the schedule, so the first render does not grow with the
+# history. Up to DETAIL_MAX_BARS jobs are drawn as Gantt bars; larger windows are
+# aggregated in SQL into per-machine utilization bins, so the figure size depends on
+# the viewport, not the table.
+DETAIL_MAX_BARS = 2_000
+UTILIZATION_BINS = 200
+DEFAULT_WINDOW = pd.Timedelta(days=7)
+
+def to_epoch(ts):
+    return int(pd.Timestamp(ts).timestamp())
 
-filtered_df = df[df['Machine_ID'].isin(machine_filter) & df['Job_Status'].isin(status_filter)]
+# Cached per data version, so the full-table MAX() scans run once per ETL refresh
+bounds = query("SELECT MIN(Scheduled_Start) AS Scheduled_Start, MAX(Scheduled_End) AS Scheduled_End, "
+               "MAX(Scheduled_End - Scheduled_Start) AS Max_Span FROM production")
+first, last = bounds['Scheduled_Start'].iloc[0], bounds['Scheduled_End'].iloc[0]
 
-# Gantt Chart
 st.subheader("Production Timeline")
-if not filtered_df.empty:
-    # Ensure dates are datetime
-    filtered_df['Scheduled_Start'] = pd.to_datetime(filtered_df['Scheduled_Start'])
-    filtered_df['Scheduled_End'] = pd.to_datetime(filtered_df['Scheduled_End'])
-    
+if pd.isna(first) or pd.isna(last):
+    st.warning("No scheduled jobs in the database.")
+    st.stop()
+
+first, last = first.floor('h'), last.ceil('h')
+default_start = max(first, last - DEFAULT_WINDOW).to_pydatetime()
+first, last = first.to_pydatetime(), last.to_pydatetime()
+window_start, window_end = st.slider("Time window", min_value=first, max_value=last, value=(default_start, last),
+                                     step=pd.Timedelta(hours=1).to_pytimedelta(), format="YYYY-MM-DD HH:mm")
+start, end = to_epoch(window_start), max(to_epoch(window_end), to_epoch(window_start) + 3600)
+
+# Overlap test (start < window_end AND end > window_start); the lower bound on
+# Scheduled_Start (window_start - longest job) lets the (Machine_ID, Scheduled_Start)
+# index turn it into one range scan per machine
+machine_sql, machine_params = in_filter("production", "Machine_ID", machine_filter)
+status_sql, status_params = in_filter("production", "Job_Status", status_filter)
+max_span = int(bounds['Max_Span'].fillna(0).iloc[0])
+window_sql = (f"Scheduled_Start >= ? AND Scheduled_Start < ? AND Scheduled_End > ? AND {machine_sql} AND {status_sql}")
+window_params = [start - max_span, end, start] + machine_params + status_params
+in_window = query(f"SELECT COUNT(*) AS Jobs FROM production WHERE {window_sql}", window_params)['Jobs'].iloc[0]
+
+if in_window == 0:
+    st.warning("No data matches the filters.")
+elif in_window <= DETAIL_MAX_BARS:
+    # Gantt Chart (plotly is imported by the branch that draws, after the filters have rendered)
+    import plotly.express as px
+    filtered_df = query("SELECT Job_ID, Machine_ID, Job_Status, Operation_Type, Part_ID, Scheduled_Start, Scheduled_End "
+                        f"FROM production WHERE {window_sql}", window_params)
     fig = px.timeline(filtered_df, x_start="Scheduled_Start", x_end="Scheduled_End", 
                       y="Machine_ID", color="Job_Status",
                       hover_data=["Job_ID", "Operation_Type", "Part_ID"],
                       title="Gantt Chart: Machine Schedules",
                       color_discrete_sequence=px.colors.qualitative.Plotly)
     fig.update_yaxes(categoryorder="total ascending")
+    fig.update_xaxes(range=[window_start, window_end])
     st.plotly_chart(fig, use_container_width=True)
 else:
-    st.warning("No data matches the filters.")
+    # Utilization heatmap: scheduled time per machine per bin. SQL groups the jobs by the
+    # bins their window-clipped start and end fall in; a sweep over those groups then splits
+    # each job's time across every bin it spans: the busy time up to an edge is the sum of
+    # (edge - start) over the starts before it minus (edge - end) over the ends before it.
+    import plotly.graph_objects as go
+    bin_seconds = max(60, -(-(end - start) // UTILIZATION_BINS))
+    nbins = -(-(end - start) // bin_seconds)
+    usage = query(
+        "SELECT Machine_ID, (MAX(Scheduled_Start, ?) - ?) / ? AS Start_Bin, (MIN(Scheduled_End, ?) - ?) / ? AS End_Bin, "
+        "COUNT(*) AS Jobs, SUM(MAX(Scheduled_Start, ?)) AS Start_Sum, SUM(MIN(Scheduled_End, ?)) AS End_Sum "
+        f"FROM production WHERE {window_sql} GROUP BY Machine_ID, Start_Bin, End_Bin",
+        [start, start, bin_seconds, end, start, bin_seconds, start, end] + window_params)
+    rows, machine_ids = pd.factorize(usage['Machine_ID'].astype(str))
+    # Ends at the window end land in bin nbins, past the last bin
+    opened = np.zeros((len(machine_ids), nbins + 1), np.int64)
+    opened_at = np.zeros_like(opened)
+    jobs, start_bins, end_bins = (usage[c].to_numpy(np.int64) for c in ['Jobs', 'Start_Bin', 'End_Bin'])
+    np.add.at(opened, (rows, start_bins), jobs)
+    np.add.at(opened, (rows, end_bins), -jobs)
+    np.add.at(opened_at, (rows, start_bins), usage['Start_Sum'].to_numpy(np.int64))
+    np.add.at(opened_at, (rows, end_bins), -usage['End_Sum'].to_numpy(np.int64))
+    edges = start + bin_seconds * np.arange(nbins + 1, dtype=np.int64)
+    busy_to_edge = edges[1:] * opened.cumsum(axis=1)[:, :nbins] - opened_at.cumsum(axis=1)[:, :nbins]
+    busy = np.diff(busy_to_edge, axis=1, prepend=0)
+    grid = pd.DataFrame((100 * busy / bin_seconds).round(1), index=machine_ids,
+                        columns=pd.to_datetime(edges[:-1], unit='s'))
+    st.caption(f"{in_window:,} jobs in this window (more than {DETAIL_MAX_BARS:,}): showing machine utilization "
+               f"in {bin_seconds // 60:,}-minute bins. Narrow the window to see individual jobs.")
+    fig = go.Figure(go.Heatmap(z=grid.values, x=grid.columns, y=grid.index, colorscale="Viridis",
+                               colorbar=dict(title="Utilization %"),
+                               hovertemplate="%{y}<br>%{x}<br>%{z}% scheduled<extra></extra>"))
+    fig.update_layout(title="Machine Utilization (% of bin scheduled)")
+    fig.update_yaxes(categoryorder="category descending")
+    fig.update_xaxes(range=[window_start, window_end])
+    st.plotly_chart(fig, use_container_width=True)
+
+# Machine Utilization (sweep-line analysis materialized by the ETL)
+st.subheader("🏭 Machine Utilization & Double Bookings")
+basis = st.radio("Timestamps", ["Scheduled", "Actual"], horizontal=True)
+utilization = query("SELECT * FROM machine_utilization WHERE Basis = ? ORDER BY Machine_ID", (basis,))
+if not utilization.empty:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Avg Utilization", f"{utilization['Utilization'].mean():.1%}")
+    col2.metric("Double-Booked Hours", f"{utilization['Double_Booked_Hours'].sum():,.1f}")
+    col3.metric("Conflicting Jobs", f"{utilization['Conflicting_Jobs'].sum():,}")
+    import plotly.express as px
+    fig_util = px.bar(utilization, x="Machine_ID", y=["Busy_Hours", "Idle_Hours", "Double_Booked_Hours"],
+                      barmode="group", title=f"Busy, Idle and Double-Booked Hours per Machine ({basis})")
+    st.plotly_chart(fig_util, use_container_width=True)
+    # Queried only while expanded (on_change="rerun" reruns the page when one opens)
+    conflicts = st.expander("Largest double bookings", on_change="rerun")
+    if conflicts.open:
+        conflicts.dataframe(query("SELECT Machine_ID, Job_ID, Conflicting_Job_ID, Overlap_Start, Overlap_End, "
+                                  "Overlap_Minutes FROM machine_conflicts WHERE Basis = ? "
+                                  "ORDER BY Overlap_Minutes DESC LIMIT 100", (basis,)), use_container_width=True)
+    gaps = st.expander("Longest idle gaps", on_change="rerun")
+    if gaps.open:
+        gaps.dataframe(query("SELECT Machine_ID, Gap_Start, Gap_End, Gap_Hours FROM machine_idle_gaps "
+                             "WHERE Basis = ? ORDER BY Gap_Hours DESC LIMIT 100", (basis,)), use_container_width=True)
+else:
+    st.info("No machine utilization data yet; run data_processor.py.")
 
 # Batch Recommendations
 st.subheader("⚡ Recommended Batches (Prioritized)")
-st.markdown("Jobs with high priority due to stockouts or efficiency:")
+st.markdown("Pending jobs grouped into sterilization loads by WIP step and dispatched earliest-due-first "
+            "to the machine that frees up first:")
 
-# Simple logic: Pending jobs + High efficiency or Random priority
-recommendations = df[df['Job_Status'] == 'Pending'].copy()
-if not recommendations.empty:
-    st.dataframe(recommendations[['Job_ID', 'Part_ID', 'Operation_Type', 'Scheduled_Start', 'Optimization_Category']], use_container_width=True)
+# Planned by the ETL (scheduler.py); one row per batch, earliest start first
+batches = query("SELECT Batch_ID, Machine_ID, WIP_Step, COUNT(*) AS Jobs, MAX(Processing_Time) AS Cycle_Minutes, "
+                "MIN(Planned_Start) AS Planned_Start, MAX(Planned_End) AS Planned_End, MIN(Due_Date) AS Due_Date, "
+                "MAX(Lateness_Hours) AS Max_Lateness_Hours, GROUP_CONCAT(Job_ID, ', ') AS Job_IDs "
+                "FROM batch_plan GROUP BY Batch_ID ORDER BY Planned_Start, Batch_ID LIMIT 100")
+if not batches.empty:
+    totals = query("SELECT COUNT(*) AS Jobs, COUNT(DISTINCT Batch_ID) AS Batches, "
+                   "SUM(Lateness_Hours > 0) AS Late_Jobs, MAX(Planned_End) AS Planned_End FROM batch_plan")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Pending Jobs", f"{totals['Jobs'].iloc[0]:,}")
+    col2.metric("Batches", f"{totals['Batches'].iloc[0]:,}")
+    col3.metric("Jobs Past Due", f"{int(totals['Late_Jobs'].iloc[0] or 0):,}")
+    col4.metric("Plan Completes", totals['Planned_End'].iloc[0].strftime('%Y-%m-%d %H:%M'))
+    st.dataframe(batches, use_container_width=True)
 else:
     st.info("No pending batches to schedule.")
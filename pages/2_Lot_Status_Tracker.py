@@ -1,30 +1,43 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-import plotly.express as px
+from data_access import query, search_lots, auto_refresh, audit_action
 
 st.set_page_config(page_title="Lot Status Tracker", page_icon="🏷️", layout="wide")
+auto_refresh()
+audit_action("Page View", "Lot Status Tracker", once=True)
 
 st.title("🏷️ Lot Status & WIP Tracker")
 
 # Load Data
-conn = sqlite3.connect("globus_sterile.db")
-df = pd.read_sql("SELECT * FROM production", conn)
-conn.close()
+PAGE_SIZE = 50
 
 # KPI Row
 st.markdown("### Process Bottlenecks")
-cols = st.columns(len(df['WIP_Step'].unique()))
-avg_times = df.groupby('WIP_Step')['Processing_Time'].mean().sort_values(ascending=False)
+# Queue depth per WIP step (jobs scheduled to start but not yet started), from the
+# ETL's sweep-line analysis in wip_queue_depth
+bottlenecks = query("SELECT WIP_Step, AVG(Avg_Queue) AS Avg_Queue, MAX(Max_Queue) AS Max_Queue, "
+                    "AVG(Avg_In_Process) AS Avg_In_Process FROM wip_queue_depth "
+                    "GROUP BY WIP_Step ORDER BY Avg_Queue DESC")
 
-# Display avg processing time per step
-for step, time_val in avg_times.items():
-    st.metric(f"Avg Time: {step}", f"{time_val:.1f} mins")
+if not bottlenecks.empty:
+    cols = st.columns(len(bottlenecks))
+    for col, row in zip(cols, bottlenecks.itertuples()):
+        col.metric(f"Queue: {row.WIP_Step}", f"{row.Avg_Queue:.2f} jobs", f"peak {row.Max_Queue}", delta_color="off",
+                   help=f"Average jobs waiting to start; {row.Avg_In_Process:.2f} in process on average")
+
+    # Daily view of the hourly series keeps the chart size independent of history length;
+    # plotly is imported here, after the KPI row has rendered
+    import plotly.express as px
+    depth = query("SELECT WIP_Step, Period_Start / 86400 * 86400 AS Period_Start, AVG(Avg_Queue) AS Avg_Queue, "
+                  "MAX(Max_Queue) AS Max_Queue FROM wip_queue_depth GROUP BY WIP_Step, Period_Start / 86400")
+    fig_queue = px.line(depth, x="Period_Start", y="Avg_Queue", color="WIP_Step", hover_data=["Max_Queue"],
+                        title="Queue Depth per WIP Step (daily average of jobs waiting)")
+    st.plotly_chart(fig_queue, use_container_width=True)
 
 # Heatmap: Job Count by Step and Status
 st.subheader("WIP Heatmap Concentration")
-heatmap_data = df.groupby(['WIP_Step', 'Job_Status']).size().reset_index(name='Count')
+heatmap_data = query("SELECT WIP_Step, Job_Status, SUM(Rows) AS Count FROM summary_wip GROUP BY WIP_Step, Job_Status")
 if not heatmap_data.empty:
+    import plotly.express as px
     fig_heat = px.density_heatmap(heatmap_data, x="WIP_Step", y="Job_Status", z="Count", 
                                   title="Job Concentration (Step vs Status)",
                                   color_continuous_scale="Viridis", text_auto=True)
@@ -32,12 +45,30 @@ if not heatmap_data.empty:
 
 # Detailed Lot Search
 st.subheader("🔍 Trace Lot / Job")
-search_id = st.text_input("Enter Job ID or Lot Number (Data is simulated)", "")
-if search_id:
-    result = df[df['Job_ID'].astype(str).str.contains(search_id, case=False)]
-    if not result.empty:
-        st.dataframe(result, use_container_width=True)
-    else:
-        st.warning("Lot ID not found.")
-else:
-    st.dataframe(df[['Job_ID', 'Part_ID', 'WIP_Step', 'Job_Status', 'Actual_Start', 'Actual_End', 'Delay_Status']], use_container_width=True)
+search_id = st.text_input("Enter Job ID, Part ID or Machine ID (Data is simulated)", "")
+
+# Keyset pagination: the stack holds the last Job_ID of each previous page
+if st.session_state.get('lot_search') != search_id:
+    st.session_state['lot_search'] = search_id
+    st.session_state['lot_cursors'] = [""]
+    if search_id:
+        audit_action("Lot Search", "Lot Status Tracker", {"term": search_id})
+cursors = st.session_state['lot_cursors']
+
+columns = "*" if search_id else "Job_ID, Part_ID, WIP_Step, Job_Status, Actual_Start, Actual_End, Delay_Status"
+result = search_lots(search_id, after=cursors[-1], limit=PAGE_SIZE, columns=columns)
+has_next = len(result) > PAGE_SIZE
+result = result.head(PAGE_SIZE)
+
+if not result.empty:
+    st.dataframe(result, use_container_width=True)
+    prev_col, page_col, next_col = st.columns([1, 4, 1])
+    if prev_col.button("◀ Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Next ▶", disabled=not has_next):
+        cursors.append(result['Job_ID'].iloc[-1])
+        st.rerun()
+elif search_id:
+    st.warning("Lot ID not found.")
@@ -1,42 +1,72 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-import plotly.express as px
+from data_access import query, table, auto_refresh, audit_action
 
 st.set_page_config(page_title="PO Management", page_icon="📝", layout="wide")
+auto_refresh()
+audit_action("Page View", "PO Management", once=True)
 
 st.title("📝 Procurement & PO Management")
 
-conn = sqlite3.connect("globus_sterile.db")
-df = pd.read_sql("SELECT * FROM procurement", conn)
-conn.close()
-
-# Discrepancy Dashboard
-discrepancies = df[df['Discrepancy_Flag'] == 1]
+# Discrepancy Dashboard (read from the shared Arrow snapshot, projected to the columns shown)
+DISCREPANCY_COLUMNS = ['PO_ID', 'Supplier', 'Order_Date', 'Item_Category', 'Defective_Units', 'Order_Status', 'Compliance']
+discrepancies = table("procurement", where={"Discrepancy_Flag": [True]}, columns=DISCREPANCY_COLUMNS)
 st.error(f"⚠️ {len(discrepancies)} Active Discrepancies Found!")
 
-tab1, tab2 = st.tabs(["🔥 Critical/Discrepancies", "📋 All Orders"])
-
-with tab1:
-    st.markdown("### Action Required: Discrepant POs")
-    st.markdown("Rules: Defective Units > 0 OR Status != Delivered (if past due)")
-    
-    if not discrepancies.empty:
-        st.dataframe(
-            discrepancies[['PO_ID', 'Supplier', 'Order_Date', 'Item_Category', 'Defective_Units', 'Order_Status', 'Compliance']]
-            .style.applymap(lambda x: 'background-color: #ffcccc' if x > 0 else '', subset=['Defective_Units']),
-            use_container_width=True
-        )
-        
-        # Vendor Analysis for Issues
-        st.subheader("Worst Offenders (By Defective Units)")
-        vendor_issues = discrepancies.groupby('Supplier')['Defective_Units'].sum().reset_index().sort_values('Defective_Units', ascending=False)
-        fig_bar = px.bar(vendor_issues.head(10), x='Supplier', y='Defective_Units', 
-                         title="Top Suppliers with Quality Issues", color='Defective_Units', color_continuous_scale='Reds')
-        st.plotly_chart(fig_bar, use_container_width=True)
-    else:
-        st.success("No discrepancies found. Good job!")
-
-with tab2:
-    st.markdown("### Full PO History")
-    st.dataframe(df, use_container_width=True)
+# Only the open tab is loaded; switching tabs reruns the page
+tab1, tab2, tab3 = st.tabs(["🔥 Critical/Discrepancies", "📋 All Orders", "🏅 Supplier Scorecard"], on_change="rerun")
+
+if tab1.open:
+    with tab1:
+        st.markdown("### Action Required: Discrepant POs")
+        st.markdown("Rules: Defective Units > 0 OR Status != Delivered (if past due)")
+
+        if not discrepancies.empty:
+            # pandas refuses to style more than styler.render.max_elements cells
+            styled = discrepancies.size <= pd.get_option("styler.render.max_elements")
+            st.dataframe(
+                discrepancies.style.map(lambda x: 'background-color: #ffcccc' if x > 0 else '', subset=['Defective_Units'])
+                if styled else discrepancies,
+                use_container_width=True
+            )
+
+            # Vendor Analysis for Issues
+            import plotly.express as px
+            st.subheader("Worst Offenders (By Defective Units)")
+            vendor_issues = query("SELECT Supplier, Discrepant_Defective_Units AS Defective_Units FROM summary_supplier_quality "
+                                  "ORDER BY Defective_Units DESC LIMIT 10")
+            fig_bar = px.bar(vendor_issues.head(10), x='Supplier', y='Defective_Units', 
+                             title="Top Suppliers with Quality Issues", color='Defective_Units', color_continuous_scale='Reds')
+            st.plotly_chart(fig_bar, use_container_width=True)
+        else:
+            st.success("No discrepancies found. Good job!")
+
+if tab2.open:
+    with tab2:
+        st.markdown("### Full PO History")
+        # Handed to st.dataframe as Arrow straight from the snapshot, without a pandas copy
+        st.dataframe(table("procurement", arrow=True), use_container_width=True)
+
+if tab3.open:
+    with tab3:
+        # Rolling windows maintained by the ETL (supplier_scorecard)
+        window = st.radio("Window", [30, 90, 365], index=1, horizontal=True, format_func=lambda d: f"Last {d} days")
+        scorecard = table("supplier_scorecard", where={"Window_Days": [window]},
+                          columns=["Supplier", "As_Of", "Orders", "On_Time_Rate", "Defect_Rate", "Price_Variance_Pct",
+                                   "Non_Compliance_Rate"])
+        scorecard = scorecard.sort_values("On_Time_Rate", ascending=False, ignore_index=True)
+        if scorecard.empty:
+            st.info("No orders in this window.")
+        else:
+            st.caption(f"Window ending {scorecard['As_Of'].max():%Y-%m-%d}. On time = delivered within 14 days of the order.")
+            st.dataframe(
+                scorecard.drop(columns=['As_Of']).style.format({
+                    'On_Time_Rate': '{:.1%}', 'Defect_Rate': '{:.2%}',
+                    'Price_Variance_Pct': '{:+.2f}%', 'Non_Compliance_Rate': '{:.1%}'}, na_rep='-'),
+                use_container_width=True
+            )
+            import plotly.express as px
+            fig_score = px.bar(scorecard.melt(id_vars='Supplier', value_vars=['On_Time_Rate', 'Defect_Rate', 'Non_Compliance_Rate'],
+                                              var_name='Metric', value_name='Rate'),
+                               x='Supplier', y='Rate', color='Metric', barmode='group', title=f"Supplier KPIs (Last {window} days)")
+            st.plotly_chart(fig_score, use_container_width=True)
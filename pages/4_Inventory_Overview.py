@@ -1,15 +1,15 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-import plotly.express as px
+from data_access import table, auto_refresh, audit_action
 
 st.set_page_config(page_title="Inventory Master", page_icon="📦", layout="wide")
+auto_refresh()
+audit_action("Page View", "Inventory Master", once=True)
 
 st.title("📦 Inventory Master & Warehouse")
 
-conn = sqlite3.connect("globus_sterile.db")
-df = pd.read_sql("SELECT * FROM inventory", conn)
-conn.close()
+# Only the columns the metrics, reorder list and charts use
+df = table("inventory", columns=['Part_ID', 'Description', 'Supplier', 'Bin_Location', 'Stock_Quantity', 'Total_Value',
+                                 'Reorder_Point', 'Safety_Stock', 'Reorder_Status', 'ABC_Class', 'XYZ_Class'])
 
 # Summary Metrics
 col1, col2, col3 = st.columns(3)
@@ -20,22 +20,15 @@ col3.metric("Items to Reorder", reorder_count, delta=f"-{reorder_count}", delta_
 
 # Reorder List
 if reorder_count > 0:
-    st.warning("⚠️ CRITICAL: The following items are below reorder point (30% of stock)")
+    st.warning("⚠️ CRITICAL: The following items are at or below their reorder point (lead-time demand + safety stock)")
     reorder_list = df[df['Reorder_Status'] == 'Reorder Now']
-    st.dataframe(reorder_list[['Part_ID', 'Description', 'Stock_Quantity', 'Reorder_Point', 'Supplier', 'Bin_Location']], use_container_width=True)
+    st.dataframe(reorder_list[['Part_ID', 'Description', 'Stock_Quantity', 'Reorder_Point', 'Safety_Stock', 'ABC_Class',
+                               'XYZ_Class', 'Supplier', 'Bin_Location']], use_container_width=True)
 
-# ABC Analysis
+# ABC Analysis (classes computed by the ETL: data_processor.classify_inventory)
 st.subheader("ABC Analysis (Pareto Principle)")
-df_sorted = df.sort_values('Total_Value', ascending=False)
-df_sorted['Cumulative_Value'] = df_sorted['Total_Value'].cumsum()
-df_sorted['Cumulative_Percent'] = 100 * df_sorted['Cumulative_Value'] / df_sorted['Total_Value'].sum()
-
-def get_abc_class(x):
-    if x <= 80: return 'A'
-    elif x <= 95: return 'B'
-    else: return 'C'
-
-df_sorted['ABC_Class'] = df_sorted['Cumulative_Percent'].apply(get_abc_class)
+df_sorted = df.sort_values('ABC_Class')
+import plotly.express as px  # deferred until the metrics and reorder list have rendered
 
 fig_abc = px.scatter(df_sorted, x='Stock_Quantity', y='Total_Value', color='ABC_Class', 
                      hover_data=['Part_ID', 'Description'], log_x=True, log_y=True,
@@ -43,6 +36,14 @@ fig_abc = px.scatter(df_sorted, x='Stock_Quantity', y='Total_Value', color='ABC_
                      color_discrete_map={'A': 'red', 'B': 'orange', 'C': 'green'})
 st.plotly_chart(fig_abc, use_container_width=True)
 
+# ABC-XYZ Matrix
+st.subheader("ABC-XYZ Matrix (Value vs Demand Variability)")
+matrix = df.pivot_table(index='ABC_Class', columns='XYZ_Class', values='Part_ID', aggfunc='count', fill_value=0)
+fig_matrix = px.imshow(matrix, text_auto=True, color_continuous_scale='Blues',
+                       labels=dict(x="XYZ Class (X = steady demand, Z = erratic/none)", y="ABC Class", color="SKUs"),
+                       title="SKUs per ABC-XYZ Segment")
+st.plotly_chart(fig_matrix, use_container_width=True)
+
 # Warehouse View
 st.subheader("Warehouse Layout View")
 if 'Bin_Location' in df.columns:
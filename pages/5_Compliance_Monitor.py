@@ -1,46 +1,150 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-import plotly.express as px
+from datetime import date, timedelta
+from data_access import query, table, distinct_values, auto_refresh, audit_action, audit_events, audit_labels, audit_cursor
 
 st.set_page_config(page_title="Compliance Monitor", page_icon="🛡️", layout="wide")
+auto_refresh()
+audit_action("Page View", "Compliance Monitor", once=True)
 
 st.title("🛡️ FDA / AdvaMed Compliance Monitor")
 
-conn = sqlite3.connect("globus_sterile.db")
-procurement = pd.read_sql("SELECT * FROM procurement", conn)
-production = pd.read_sql("SELECT * FROM production", conn)
-conn.close()
+# Filtered and projected on the shared Arrow snapshot, so only the matching rows and
+# the columns shown become DataFrames
+non_comp_pos = table("procurement", where={"Compliance": ["No"]},
+                     columns=['PO_ID', 'Supplier', 'Order_Date', 'Compliance', 'Defective_Units'])
+failed_jobs = table("production", where={"Job_Status": ["Failed"]},
+                    columns=['Job_ID', 'Part_ID', 'WIP_Step', 'Machine_ID', 'Job_Status'])
 
 # KPI Cards
 col1, col2 = st.columns(2)
 
-non_comp_pos = procurement[procurement['Compliance'] == 'No']
-failed_jobs = production[production['Job_Status'] == 'Failed']
-
 col1.metric("Non-Compliant POs", len(non_comp_pos), delta="Critical", delta_color="inverse")
 col2.metric("Quarantined Lots (Failed)", len(failed_jobs), delta="Action Needed", delta_color="inverse")
 
 # Report 1: Supplier Compliance
 st.subheader("🚫 Non-Compliant Supplier Orders")
 if not non_comp_pos.empty:
-    st.dataframe(non_comp_pos[['PO_ID', 'Supplier', 'Order_Date', 'Compliance', 'Defective_Units']], use_container_width=True)
+    st.dataframe(non_comp_pos, use_container_width=True)
 else:
     st.success("100% Supplier Compliance Achieved!")
 
+# Rolling supplier non-compliance (supplier_scorecard, maintained by the ETL)
+scorecard = table("supplier_scorecard", columns=["Supplier", "Window_Days", "Non_Compliance_Rate"]).sort_values(
+    ["Supplier", "Window_Days"], ignore_index=True)
+if not scorecard.empty:
+    scorecard['Window'] = "Last " + scorecard['Window_Days'].astype(str) + " days"
+    import plotly.express as px  # deferred until the KPIs and tables above have rendered
+    fig_nc = px.bar(scorecard, x='Supplier', y='Non_Compliance_Rate', color='Window', barmode='group',
+                    title="Supplier Non-Compliance Rate by Rolling Window")
+    fig_nc.update_yaxes(tickformat='.0%')
+    st.plotly_chart(fig_nc, use_container_width=True)
+
 # Report 2: Production Quality / Quarantine
 st.subheader("☣️ Quarantined / Failed Production Jobs")
 if not failed_jobs.empty:
-    st.dataframe(failed_jobs[['Job_ID', 'Part_ID', 'WIP_Step', 'Machine_ID', 'Job_Status']], use_container_width=True)
+    st.dataframe(failed_jobs, use_container_width=True)
 else:
     st.success("No Failed Jobs in Production.")
 
-# Audit Trail (Mock)
-st.subheader("📋 System Audit Trail (Last 5 Entries)")
-audit_data = {
-    "Timestamp": ["2026-01-05 08:00:01", "2026-01-05 09:12:33", "2026-01-05 10:45:10", "2026-01-05 14:20:00", "2026-01-05 16:55:42"],
-    "User": ["System", "J.Doe", "Admin", "System", "A.Kasu"],
-    "Action": ["Batch Schedule Update", "Inv Adjustment", "User Access Revoke", "PO Sync", "Report Gen"],
-    "Status": ["Success", "Success", "Success", "Success", "Success"]
-}
-st.table(pd.DataFrame(audit_data))
+# Recall Impact (Job -> Part -> PO/Supplier genealogy materialized by the ETL: build_genealogy)
+st.subheader("🔎 Recall Impact")
+RECALL_MAX_LOTS = 1_000
+# Only the open tab is queried; switching tabs reruns the page
+tab_supplier, tab_quarantine, tab_trace = st.tabs(["Lots by Supplier", "POs Feeding Quarantined Lots", "Trace"],
+                                                  on_change="rerun")
+
+if tab_supplier.open:
+    with tab_supplier:
+        suppliers = distinct_values("procurement", "Supplier")
+        received = query("SELECT MIN(Delivery_Date) AS First, MAX(Delivery_Date) AS Last FROM po_genealogy")
+        if suppliers and received['First'].notna().iloc[0]:
+            # Aliased aggregates come back as raw epoch seconds
+            first, last = (pd.to_datetime(received[c].iloc[0], unit='s').date() for c in ('First', 'Last'))
+            col1, col2 = st.columns([1, 2])
+            supplier = col1.selectbox("Supplier", suppliers)
+            window = col2.date_input("Received between", value=(first, last), min_value=first, max_value=last)
+            start, end = (window + (window[0],))[:2] if len(window) < 2 else window
+            params = [supplier, int(pd.Timestamp(start).timestamp()), int((pd.Timestamp(end) + pd.Timedelta(days=1)).timestamp())]
+            audit_action("Recall Query", "Compliance Monitor", {"supplier": supplier, "from": str(start), "to": str(end)},
+                         once=True)
+            pos = query("SELECT PO_ID, Part_ID, Delivery_Date, Compliance, Jobs, Failed_Jobs FROM po_genealogy "
+                        "WHERE Supplier = ? AND Delivery_Date >= ? AND Delivery_Date < ? ORDER BY Delivery_Date, PO_ID", params)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("POs Received", f"{len(pos):,}")
+            col2.metric("Lots Affected", f"{int(pos['Jobs'].sum()):,}")
+            col3.metric("Of Which Quarantined", f"{int(pos['Failed_Jobs'].sum()):,}")
+            st.dataframe(pos, use_container_width=True)
+            lots = query("SELECT * FROM lot_genealogy WHERE Supplier = ? AND Received >= ? AND Received < ? "
+                         f"ORDER BY Received, Job_ID LIMIT {RECALL_MAX_LOTS}", params)
+            if len(lots) == RECALL_MAX_LOTS:
+                st.caption(f"Showing the first {RECALL_MAX_LOTS:,} affected lots; the full list is in lot_genealogy.")
+            st.dataframe(lots, use_container_width=True)
+        else:
+            st.info("No received POs to trace yet; run data_processor.py.")
+
+if tab_quarantine.open:
+    with tab_quarantine:
+        feeding = query("SELECT PO_ID, Supplier, Part_ID, Delivery_Date, Compliance, Jobs, Failed_Jobs FROM po_genealogy "
+                        "WHERE Failed_Jobs > 0 ORDER BY Failed_Jobs DESC, PO_ID LIMIT 500")
+        if not feeding.empty:
+            by_supplier = query("SELECT Supplier, COUNT(*) AS POs, SUM(Failed_Jobs) AS Failed_Jobs FROM po_genealogy "
+                                "WHERE Failed_Jobs > 0 GROUP BY Supplier ORDER BY Failed_Jobs DESC")
+            import plotly.express as px
+            fig_feed = px.bar(by_supplier, x='Supplier', y='Failed_Jobs', hover_data=['POs'],
+                              title="Quarantined Lots by Supplier of the Consumed Part")
+            st.plotly_chart(fig_feed, use_container_width=True)
+            st.dataframe(feeding, use_container_width=True)
+        else:
+            st.success("No quarantined lot consumed a received PO.")
+
+if tab_trace.open:
+    with tab_trace:
+        trace_id = st.text_input("Job ID, PO ID or Part ID", "").strip()
+        if trace_id:
+            audit_action("Recall Trace", "Compliance Monitor", {"id": trace_id}, once=True)
+            lots = query("SELECT * FROM lot_genealogy WHERE Job_ID = ? OR PO_ID = ? OR Part_ID = ? "
+                         f"ORDER BY Job_ID LIMIT {RECALL_MAX_LOTS}", [trace_id] * 3)
+            pos = query("SELECT * FROM po_genealogy WHERE PO_ID = ? OR Part_ID = ? "
+                        "OR PO_ID = (SELECT PO_ID FROM lot_genealogy WHERE Job_ID = ?) ORDER BY Delivery_Date", [trace_id] * 3)
+            if lots.empty and pos.empty:
+                st.warning(f"No lot, PO or part '{trace_id}' found.")
+            else:
+                st.markdown("**Purchase orders**")
+                st.dataframe(pos, use_container_width=True)
+                st.markdown("**Lots**")
+                st.dataframe(lots, use_container_width=True)
+
+# Audit Trail (append-only log of ETL runs, reports and dashboard actions: audit.py)
+st.subheader("📋 System Audit Trail")
+AUDIT_PAGE_SIZE = 50
+col1, col2, col3 = st.columns([2, 1, 1])
+today = date.today()
+window = col1.date_input("Between", value=(today - timedelta(days=30), today), key="audit_window")
+audit_user = col2.selectbox("User", ["All"] + audit_labels("User"))
+audit_action_filter = col3.selectbox("Action", ["All"] + audit_labels("Action"))
+start, end = (window + (window[0],))[:2] if len(window) < 2 else window
+filters = (int(pd.Timestamp(start).timestamp()), int((pd.Timestamp(end) + pd.Timedelta(days=1)).timestamp()),
+           None if audit_user == "All" else audit_user, None if audit_action_filter == "All" else audit_action_filter)
+
+# Keyset pagination: the stack holds the (Timestamp, Id) the next page starts before
+if st.session_state.get('audit_filters') != filters:
+    st.session_state['audit_filters'] = filters
+    st.session_state['audit_cursors'] = [None]
+cursors = st.session_state['audit_cursors']
+events = audit_events(*filters, before=cursors[-1], limit=AUDIT_PAGE_SIZE + 1)
+has_next = len(events) > AUDIT_PAGE_SIZE
+events = events.head(AUDIT_PAGE_SIZE)
+
+if not events.empty:
+    st.dataframe(events.drop(columns=['Id']), use_container_width=True, hide_index=True)
+    prev_col, page_col, next_col = st.columns([1, 4, 1])
+    if prev_col.button("◀ Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Older ▶", disabled=not has_next):
+        cursors.append(audit_cursor(events))
+        st.rerun()
+else:
+    st.info("No audit events in this range.")
@@ -0,0 +1,80 @@
+import json
+import streamlit as st
+import pandas as pd
+from data_access import query, auto_refresh, audit_action
+
+st.set_page_config(page_title="Pipeline Health", page_icon="⏱️", layout="wide")
+auto_refresh()
+audit_action("Page View", "Pipeline Health", once=True)
+
+st.title("⏱️ ETL Pipeline Health")
+
+# Load Data (one row per stage per data_processor.py run); the top-level stages make up a run's total,
+# and a run failed if any of its stages did
+RUN_STAGES = ["incremental_load", "publish_snapshot", "generate_reports"]
+top_level = ", ".join(f"'{stage}'" for stage in RUN_STAGES)
+runs = query("SELECT Run_ID, MIN(Started_At) AS Started_At, "
+             "CASE WHEN SUM(Status != 'ok') > 0 THEN 'error' ELSE 'ok' END AS Status, "
+             f"SUM(CASE WHEN Stage IN ({top_level}) THEN Duration_Seconds END) AS Duration_Seconds, "
+             "MAX(Peak_RSS_MB) AS Peak_RSS_MB "
+             "FROM pipeline_runs GROUP BY Run_ID ORDER BY Started_At")
+
+if runs.empty:
+    st.info("No pipeline runs recorded yet. Run `python data_processor.py` to populate pipeline_runs.")
+    st.stop()
+
+latest = runs.iloc[-1]
+failed = runs[runs['Status'] != 'ok']
+
+# KPI Row
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("Recorded Runs", len(runs))
+col2.metric("Failed Runs", len(failed))
+col3.metric("Last Run", latest['Started_At'].strftime('%Y-%m-%d %H:%M'))
+col4.metric("Last Run Duration", f"{latest['Duration_Seconds']:.2f} s")
+col5.metric("Last Run Peak RSS", f"{latest['Peak_RSS_MB']:.0f} MB")
+
+if not failed.empty:
+    st.warning(f"⚠️ {len(failed)} run(s) had a failed stage:")
+    st.dataframe(failed.iloc[::-1], use_container_width=True, hide_index=True)
+
+# Plotly Express is imported only once the KPI row has been sent to the browser
+import plotly.express as px
+
+# Stage latency trend across runs
+st.subheader("Stage Latency Trend")
+stages = query("SELECT DISTINCT Stage FROM pipeline_runs ORDER BY Stage")['Stage'].tolist()
+default = [s for s in stages if s in RUN_STAGES] or stages[:5]
+selected = st.multiselect("Stages", stages, default=default)
+window = len(runs)
+if len(runs) > 5:
+    window = st.slider("Runs to show", 5, len(runs), min(50, len(runs)))
+
+if selected:
+    first_run = runs['Started_At'].iloc[-window]
+    trend = query(f"SELECT Run_ID, Started_At, Stage, Duration_Seconds, Rows_In, Rows_Out, Peak_RSS_MB "
+                  f"FROM pipeline_runs WHERE Stage IN ({', '.join('?' * len(selected))}) AND Started_At >= ? "
+                  f"ORDER BY Started_At", selected + [int(first_run.timestamp())])
+    fig_trend = px.line(trend, x="Started_At", y="Duration_Seconds", color="Stage", markers=True,
+                        hover_data=["Run_ID", "Rows_In", "Rows_Out", "Peak_RSS_MB"],
+                        title="Stage Duration per Run (seconds)")
+    st.plotly_chart(fig_trend, use_container_width=True)
+
+    fig_mem = px.line(trend, x="Started_At", y="Peak_RSS_MB", color="Stage", markers=True,
+                      title="Peak Memory per Stage (MB)")
+    st.plotly_chart(fig_mem, use_container_width=True)
+
+# Breakdown of the latest run
+st.subheader(f"Latest Run Breakdown ({latest['Run_ID']})")
+breakdown = query("SELECT Stage, Duration_Seconds, Rows_In, Rows_Out, Peak_RSS_MB, Status, Source_Fingerprints "
+                  "FROM pipeline_runs WHERE Run_ID = ? ORDER BY Id", (latest['Run_ID'],))
+leaf = breakdown[~breakdown['Stage'].isin(RUN_STAGES)]
+if not leaf.empty:
+    fig_bar = px.bar(leaf.sort_values('Duration_Seconds'), x="Duration_Seconds", y="Stage", orientation='h',
+                     title="Time Spent per Stage (seconds)")
+    st.plotly_chart(fig_bar, use_container_width=True)
+st.dataframe(breakdown.drop(columns=['Source_Fingerprints']), use_container_width=True)
+
+fingerprints = st.expander("Source fingerprints (SHA-256)", on_change="rerun")
+if fingerprints.open:
+    fingerprints.table(pd.Series(json.loads(breakdown['Source_Fingerprints'].iloc[0] or "{}"), name="sha256", dtype=str))
@@ -0,0 +1,91 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# --- Batch scheduling engine ---
+# Pending jobs are grouped by WIP_Step into sterilization loads of up to BATCH_CAPACITY
+# jobs (earliest due first), so one cycle on one machine runs the whole load and takes as
+# long as its longest job. Loads are then dispatched in earliest-due-date order, each to
+# the eligible machine that frees up first (list scheduling over a min-heap of machine
+# ready times). Cycle time is stretched by the machine's availability.
+BATCH_CAPACITY = 8
+
+
+def form_batches(pending, capacity=BATCH_CAPACITY):
+    """Assign Batch_ID to pending jobs and return (jobs, batches).
+
+    `pending` needs Job_ID, WIP_Step, Processing_Time (minutes) and Due (epoch seconds).
+    """
+    jobs = pending.sort_values(['WIP_Step', 'Due', 'Job_ID'], kind='stable').reset_index(drop=True)
+    slot = jobs.groupby('WIP_Step', sort=False).cumcount() // capacity
+    new_batch = (jobs['WIP_Step'] != jobs['WIP_Step'].shift()) | (slot != slot.shift())
+    jobs['Batch_ID'] = new_batch.cumsum()
+    batches = jobs.groupby('Batch_ID', sort=True).agg(
+        WIP_Step=('WIP_Step', 'first'), Jobs=('Job_ID', 'size'),
+        Cycle_Minutes=('Processing_Time', 'max'), Due=('Due', 'min'))
+    return jobs, batches
+
+
+def dispatch(batches, eligible, ready, availability):
+    """List-schedule batches (EDD) onto machines; returns (Machine_ID, start, end) lists aligned with `batches`.
+
+    eligible: {WIP_Step: [Machine_ID, ...]}; ready: {Machine_ID: epoch seconds the machine is free};
+    availability: {Machine_ID: percent}.
+    """
+    ready = dict(ready)
+    all_machines = tuple(sorted(ready))
+    # Steps with the same eligible machines share one heap; entries only go stale for
+    # machines shared between different sets
+    pools = {step: tuple(machines) for step, machines in eligible.items()}
+    heaps = {}
+    order = np.lexsort((batches['Cycle_Minutes'].to_numpy(), batches['Due'].to_numpy())).tolist()
+    steps = batches['WIP_Step'].tolist()
+    cycles = batches['Cycle_Minutes'].tolist()
+    machine, start, end = [None] * len(batches), [0] * len(batches), [0] * len(batches)
+    for i in order:
+        pool = pools.get(steps[i]) or all_machines
+        heap = heaps.get(pool)
+        if heap is None:
+            heap = heaps[pool] = [(ready[m], m) for m in pool]
+            heapq.heapify(heap)
+        while True:
+            free_at, m = heap[0]
+            if free_at == ready[m]:
+                break
+            heapq.heapreplace(heap, (ready[m], m))
+        duration = int(cycles[i] * 6000 / max(availability.get(m, 100), 1))
+        machine[i], start[i], end[i] = m, free_at, free_at + duration
+        ready[m] = free_at + duration
+        heapq.heapreplace(heap, (ready[m], m))
+    return machine, start, end
+
+
+def plan(pending, machines, origin, capacity=BATCH_CAPACITY):
+    """Build the batch plan for pending jobs.
+
+    pending: Job_ID, Part_ID, Operation_Type, WIP_Step, Processing_Time, Due (epoch seconds).
+    machines: one row per (Machine_ID, WIP_Step) the machine has run, with Availability
+    (percent) and Busy_Until (epoch seconds its in-progress work ends, or NaN).
+    origin: epoch seconds the plan starts from.
+    """
+    if pending.empty or machines.empty:
+        return pd.DataFrame(columns=['Job_ID', 'Part_ID', 'Operation_Type', 'WIP_Step', 'Batch_ID', 'Machine_ID',
+                                     'Planned_Start', 'Planned_End', 'Due_Date', 'Lateness_Hours', 'Processing_Time'])
+    eligible = {step: sorted(set(group)) for step, group in machines.groupby('WIP_Step', observed=True)['Machine_ID']}
+    per_machine = machines.groupby('Machine_ID', observed=True).agg(Availability=('Availability', 'mean'),
+                                                     Busy_Until=('Busy_Until', 'max'))
+    ready = per_machine['Busy_Until'].fillna(origin).clip(lower=origin).astype(np.int64).to_dict()
+    availability = per_machine['Availability'].fillna(100).to_dict()
+
+    # Jobs without a due date sort last (NaN) in both batching and dispatch order
+    pending = pending.assign(Processing_Time=pending['Processing_Time'].fillna(0), Due=pending['Due'].astype(float))
+    jobs, batches = form_batches(pending, capacity)
+    machine, start, end = dispatch(batches, eligible, ready, availability)
+    slots = pd.DataFrame({'Machine_ID': machine, 'Planned_Start': start, 'Planned_End': end}, index=batches.index)
+    jobs = jobs.join(slots, on='Batch_ID')
+    jobs['Lateness_Hours'] = ((jobs['Planned_End'] - jobs['Due']) / 3600).round(2)
+    for col in ['Planned_Start', 'Planned_End']:
+        jobs[col] = pd.to_datetime(jobs[col], unit='s')
+    jobs['Due_Date'] = pd.to_datetime(jobs['Due'], unit='s')
+    return jobs.drop(columns=['Due']).sort_values(['Planned_Start', 'Batch_ID', 'Job_ID'], ignore_index=True)
@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import db
+
+# --- Configuration ---
+# After each ETL run the dashboard tables are published as uncompressed Arrow IPC
+# files in an immutable, versioned directory. Readers memory-map them, so every
+# session (and every server process) shares the same OS pages instead of holding its
+# own deserialized copy. CURRENT names the live version and is swapped atomically
+# (os.replace) once a version is complete; readers never see a partial snapshot.
+SNAPSHOT_DIR = os.path.join(".cache", "snapshots")
+CURRENT_FILE = os.path.join(SNAPSHOT_DIR, "CURRENT")
+KEEP_VERSIONS = 2      # the live version and the one before it (sessions may still map it)
+CHUNK_SIZE = 200_000   # rows per record batch when streaming a table out of SQLite
+
+ARROW_TYPES = {
+    "TEXT": pa.string(),
+    "INTEGER": pa.int64(),
+    "REAL": pa.float64(),
+    "TIMESTAMP": pa.timestamp("s"),
+    "BOOLEAN": pa.bool_(),
+    "CATEGORY": pa.dictionary(pa.int32(), pa.string()),
+}
+
+
+def table_path(version, table):
+    return os.path.join(SNAPSHOT_DIR, version, f"{table}.arrow")
+
+def current():
+    """The live snapshot manifest ({"version", "tables", ...}), or None if nothing is published."""
+    try:
+        with open(CURRENT_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def current_version():
+    manifest = current()
+    return manifest["version"] if manifest else None
+
+
+# --- Publishing ---
+def _schema(conn, table):
+    """Arrow schema from the declared column types, so every record batch has the same types.
+
+    Dimension columns (coded or text) become dictionary<int32, string>.
+    """
+    fields = []
+    for _, col, decl, *_ in conn.execute(f'PRAGMA table_info("{table}")'):
+        kind = "CATEGORY" if col in db.DIMENSIONS else (decl.split() or ["TEXT"])[0]
+        fields.append((col, ARROW_TYPES.get(kind, pa.string())))
+    return pa.schema(fields)
+
+def _write_table(conn, table, path):
+    schema = _schema(conn, table)
+    # Every batch of a dictionary column must carry the same dictionary, so it is fixed
+    # up front: the whole dimension for coded columns, the distinct values otherwise
+    coded = db.coded_columns(table) if table in db.SCHEMA else []
+    categories = {}
+    for col in schema.names:
+        if col in coded:
+            categories[col] = sorted(db.dimension(conn, col).values())
+        elif col in db.DIMENSIONS:
+            categories[col] = sorted(str(v) for (v,) in conn.execute(
+                f'SELECT DISTINCT "{col}" FROM "{table}" WHERE "{col}" IS NOT NULL'))
+    rows = 0
+    with ipc.new_file(path, schema) as writer:
+        for chunk in pd.read_sql(f'SELECT * FROM "{table}"', conn, chunksize=CHUNK_SIZE):
+            chunk = db.decode_frame(chunk, conn)
+            for col, labels in categories.items():
+                chunk[col] = chunk[col].astype(pd.CategoricalDtype(labels))
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+def _carry_over(manifest, table, path, schema):
+    """Link `table` of the live version into `path` if it is there with `schema`; False otherwise.
+
+    A hard link shares the file, so nothing is copied and sessions still mapping the old
+    version are unaffected when it is pruned (filesystems without links get a copy).
+    """
+    if manifest is None or table not in manifest["tables"]:
+        return False
+    source = table_path(manifest["version"], table)
+    try:
+        with pa.memory_map(source, "r") as f:
+            if not ipc.open_file(f).schema.equals(schema):
+                return False
+    except (OSError, pa.ArrowInvalid):
+        return False
+    try:
+        os.link(source, path)
+    except OSError:
+        shutil.copyfile(source, path)
+    return True
+
+def publish(tables, version, db_path=None, unchanged=()):
+    """Write a new snapshot version of `tables` and make it current; returns the rows written.
+
+    Tables in `unchanged` are carried over from the live version (see _carry_over) rather
+    than read out of SQLite again, unless their layout changed.
+    """
+    live = current()
+    final_dir = os.path.join(SNAPSHOT_DIR, version)
+    tmp_dir = final_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    conn = db.connect(db_path)
+    rows = {}
+    try:
+        # One read transaction, so all tables come from the same committed state
+        conn.execute("BEGIN")
+        written = 0
+        for table in tables:
+            path = os.path.join(tmp_dir, f"{table}.arrow")
+            if table in unchanged and _carry_over(live, table, path, _schema(conn, table)):
+                rows[table] = live["tables"][table]
+            else:
+                rows[table] = _write_table(conn, table, path)
+                written += rows[table]
+        conn.execute("COMMIT")
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+    os.replace(tmp_dir, final_dir)
+    tmp = CURRENT_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": version, "tables": rows}, f)
+    os.replace(tmp, CURRENT_FILE)
+    prune()
+    return written
+
+def prune(keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (open memory maps stay valid after unlink)."""
+    live = current_version()
+    versions = sorted(d for d in os.listdir(SNAPSHOT_DIR)
+                      if os.path.isdir(os.path.join(SNAPSHOT_DIR, d)) and not d.endswith(".tmp"))
+    for version in versions[:-keep]:
+        if version != live:
+            shutil.rmtree(os.path.join(SNAPSHOT_DIR, version), ignore_errors=True)
+
+
+# --- Reading ---
+def open_table(version, table):
+    """Memory-map one table of a snapshot version as a pyarrow.Table (zero-copy), or None if absent."""
+    path = table_path(version, table)
+    if not os.path.exists(path):
+        return None
+    return ipc.open_file(pa.memory_map(path, "r")).read_all()
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- Configuration ---
+# Parsed sources are cached as Parquet, keyed by the SHA-256 of the file contents,
+# so an unchanged workbook/CSV is never parsed twice.
+CACHE_DIR = os.path.join(".cache", "sources")
+INDEX_FILE = os.path.join(CACHE_DIR, "index.json")
+CACHE_VERSION = 2             # bump when reader options change the parsed output
+MAX_ENTRIES_PER_SOURCE = 2    # older versions of a source are evicted (LRU)
+MAX_CACHE_BYTES = 2 << 30     # total size cap across all sources (LRU)
+_lock = threading.Lock()      # sources may be read from several threads at once
+
+
+# --- Content hashing ---
+def _load_index():
+    try:
+        with open(INDEX_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = INDEX_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, INDEX_FILE)
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def content_hash(path):
+    """SHA-256 of a file, memoized on (size, mtime) so unchanged files are not re-read."""
+    stat = os.stat(path)
+    with _lock:
+        entry = _load_index().get(os.path.abspath(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    sha = file_sha256(path)
+    with _lock:
+        index = _load_index()
+        index[os.path.abspath(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+        _save_index(index)
+    return sha
+
+
+# --- Cache entries ---
+def cache_path(name, sha256):
+    return os.path.join(CACHE_DIR, f"{name}-{sha256[:16]}-v{CACHE_VERSION}.parquet")
+
+def _entries():
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    return [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith(".parquet")]
+
+def evict(keep=None):
+    """Drop least-recently-used entries beyond the per-source and total size limits."""
+    with _lock:
+        entries = sorted(_entries(), key=os.path.getmtime, reverse=True)
+        per_source, total = {}, 0
+        for entry in entries:
+            source = os.path.basename(entry).rsplit("-", 2)[0]
+            per_source[source] = per_source.get(source, 0) + 1
+            size = os.path.getsize(entry)
+            if entry != keep and (per_source[source] > MAX_ENTRIES_PER_SOURCE or total + size > MAX_CACHE_BYTES):
+                os.remove(entry)
+                continue
+            total += size
+
+def clear(name=None):
+    for entry in _entries():
+        if name is None or os.path.basename(entry).rsplit("-", 2)[0] == name:
+            os.remove(entry)
+
+def _hit(name, sha256, refresh):
+    entry = cache_path(name, sha256)
+    if refresh or not os.path.exists(entry):
+        return None
+    os.utime(entry)  # mark as recently used
+    return entry
+
+
+# --- Readers ---
+def read_cached(name, path, reader, refresh=False):
+    """Return `reader(path)`, served from the Parquet cache when the file is unchanged."""
+    sha = content_hash(path)
+    entry = _hit(name, sha, refresh)
+    if entry:
+        return pd.read_parquet(entry)
+    df = reader(path)
+    entry = cache_path(name, sha)
+    tmp = entry + ".tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, entry)
+        evict(keep=entry)
+    except (pa.ArrowException, OSError) as e:
+        print(f"Cache write skipped for {name}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return df
+
+def iter_cached(name, path, chunk_reader, chunksize, refresh=False):
+    """Yield `chunk_reader(path, chunksize)` chunks, writing the Parquet cache as they stream.
+
+    On a cache hit the chunks are read back from Parquet record batches instead.
+    """
+    sha = content_hash(path)
+    entry = _hit(name, sha, refresh)
+    if entry:
+        for batch in pq.ParquetFile(entry).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+
+    entry = cache_path(name, sha)
+    tmp = entry + ".tmp"
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    writer = None
+    try:
+        for chunk in chunk_reader(path, chunksize):
+            if tmp is not None:
+                try:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None, preserve_index=False)
+                    writer = writer or pq.ParquetWriter(tmp, table.schema)
+                    writer.write_table(table)
+                except (pa.ArrowException, ValueError) as e:
+                    # A later chunk inferred different types; give up caching this file
+                    print(f"Cache write skipped for {name}: {e}")
+                    if writer:
+                        writer.close()
+                        writer = None
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    tmp = None
+            yield chunk
+        if writer:
+            writer.close()
+            writer = None
+            os.replace(tmp, entry)
+            evict(keep=entry)
+    finally:
+        if writer:
+            writer.close()
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
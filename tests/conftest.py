@@ -0,0 +1,65 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import audit
+import data_processor
+import db
+import snapshot
+import source_cache
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """data_processor pointed at a scratch copy of the Dataset/ sources and an empty DB/cache.
+
+    The copies are returned as data_processor.FILES, so tests can edit them in place.
+    """
+    files = {}
+    for name, path in data_processor.FILES.items():
+        files[name] = str(tmp_path / os.path.basename(path))
+        shutil.copy(os.path.join(ROOT, path), files[name])
+    monkeypatch.setattr(data_processor, "FILES", files)
+    monkeypatch.setattr(data_processor, "REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(source_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(source_cache, "INDEX_FILE", str(tmp_path / "cache" / "index.json"))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(snapshot, "CURRENT_FILE", str(tmp_path / "snapshots" / "CURRENT"))
+    monkeypatch.setattr(audit, "AUDIT_DB_PATH", str(tmp_path / "audit.db"))
+    return data_processor
+
+
+def table_rows(table):
+    """Every row of `table` in the current test DB, sorted, for comparisons.
+
+    Floats are rounded to 6 places: sums built up in a different order differ in the last bits.
+    """
+    conn = db.connect()
+    try:
+        cols = [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+        rows = conn.execute(f'SELECT * FROM "{table}"').fetchall()
+    finally:
+        conn.close()
+    rows = [tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows]
+    return cols, sorted(rows, key=repr)
+
+
+def edit_csv(path, update=None, insert=None, delete=None):
+    """Rewrite a source CSV: replace the line keyed update[0] by update[1], append insert, drop the line keyed delete."""
+    with open(path, newline="") as f:
+        lines = f.read().splitlines(keepends=True)
+    ending = lines[0][len(lines[0].rstrip("\r\n")):]
+    if update:
+        lines = [update[1] + ending if line.startswith(update[0] + ",") else line for line in lines]
+    if delete:
+        lines = [line for line in lines if not line.startswith(delete + ",")]
+    if insert:
+        lines.append(insert + ending)
+    with open(path, "w", newline="") as f:
+        f.writelines(lines)
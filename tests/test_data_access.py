@@ -0,0 +1,40 @@
+import threading
+
+import data_access
+
+
+def test_query_runs_while_another_connection_is_busy(pipeline):
+    pipeline.incremental_load()
+    data_access._pool.clear()
+    data_access._version_connection.clear()
+    data_access._cached_query.clear()
+    done = threading.Event()
+
+    def reader():
+        data_access.query("SELECT COUNT(*) AS n FROM production")
+        done.set()
+
+    # One session holds a connection (a slow query); another still gets an answer
+    with data_access.get_connection():
+        worker = threading.Thread(target=reader)
+        worker.start()
+        assert done.wait(10)
+        worker.join()
+    assert data_access._pool().qsize() == data_access.POOL_SIZE
+
+
+def test_search_lots_broad_and_selective_branches_agree(pipeline):
+    pipeline.incremental_load()
+    data_access._pool.clear()
+    data_access._cached_query.clear()
+    sort_limit = data_access.SEARCH_SORT_LIMIT
+    for term in ["", "J", "M0", "00", "000", "zzz"]:
+        selective = data_access.search_lots(term, limit=20)
+        # Every branch treated as broad: filtered in Job_ID order instead of sorted
+        data_access.SEARCH_SORT_LIMIT = 1
+        try:
+            broad = data_access.search_lots(term, limit=20)
+        finally:
+            data_access.SEARCH_SORT_LIMIT = sort_limit
+        assert selective.equals(broad), term
+        assert selective["Job_ID"].is_monotonic_increasing
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+
+import pytest
+
+import db
+import snapshot
+from conftest import edit_csv, table_rows
+
+
+def row_counts(tables):
+    conn = db.connect()
+    try:
+        counts = {}
+        for table in tables:
+            try:
+                counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            except sqlite3.OperationalError:  # dropped
+                counts[table] = None
+        return counts
+    finally:
+        conn.close()
+
+
+def inventory_analytics(version=None):
+    """The analytics columns of inventory, from a snapshot version or (by default) the DB."""
+    cols = ["Part_ID", "ABC_Class", "XYZ_Class", "Lead_Time_Days", "Safety_Stock", "Reorder_Point", "Reorder_Status"]
+    if version:
+        frame = snapshot.open_table(version, "inventory").select(cols).to_pandas()
+    else:
+        conn = db.connect()
+        try:
+            frame = db.read_sql("SELECT " + ", ".join(f'"{c}"' for c in cols) + " FROM inventory", conn)
+        finally:
+            conn.close()
+    return frame.astype(str).sort_values("Part_ID", ignore_index=True)
+
+
+def test_failed_full_rebuild_keeps_previous_data(pipeline):
+    pipeline.incremental_load()
+    tables = list(pipeline.FILES) + list(pipeline.SUMMARIES)
+    before = row_counts(tables)
+
+    path = pipeline.FILES["production"]
+    with open(path, "rb") as f:
+        original = f.read()
+    with open(path, "ab") as f:
+        f.write(b"J-BROKEN,M01,Additive,not-a-number,1,2,3\n")  # too few fields: the parser rejects the file
+    with pytest.raises(Exception):
+        pipeline.incremental_load(full=True)
+    assert row_counts(tables) == before
+
+    # The fingerprints were rolled back with the data, so a normal run after the fix is a no-op
+    with open(path, "wb") as f:
+        f.write(original)
+    assert pipeline.incremental_load() == []
+    assert row_counts(tables) == before
+
+
+def test_incremental_derived_tables_match_full_rebuild(pipeline, capsys):
+    # A job still running on M05 is measured up to the data clock
+    edit_csv(pipeline.FILES["production"],
+             insert="J9000,M05,Drilling,1.0,60,3.0,80,2023-03-25 07:00:00,2023-03-25 08:00:00,"
+                    "2023-03-25 07:10:00,,Delayed,Low Efficiency")
+    pipeline.incremental_load()
+    # J002 moves from M01 to M03, the new job on M02 advances the data clock, J001 disappears
+    edit_csv(pipeline.FILES["production"],
+             update=("J002", "J002,M03,Milling,3.35,140,6.61,60,2023-03-19 08:10:00,2023-03-19 10:30:00,"
+                             "2023-03-19 08:20:00,2023-03-19 10:40:00,Completed,High Efficiency"),
+             insert="J9001,M02,Grinding,2.5,45,7.0,90,2023-03-26 08:00:00,2023-03-26 08:45:00,"
+                    "2023-03-26 08:05:00,,Pending,Low Efficiency",
+             delete="J001")
+    edit_csv(pipeline.FILES["procurement"],
+             update=("PO-00002", "PO-00002,Alpha_Inc,2022-05-01,2022-05-03,Office Supplies,Delivered,900,41.0,38.5,3.0,No"),
+             insert="PO-09001,Delta_Logistics,2023-01-05,2023-01-20,Office Supplies,Delivered,250,12.5,11.0,0.0,Yes",
+             delete="PO-00001")
+    capsys.readouterr()
+    pipeline.incremental_load()
+    assert "parts changed" in capsys.readouterr().out  # the genealogy was rebuilt for those parts only
+    tables = pipeline.GENEALOGY_TABLES + pipeline.INTERVAL_TABLES
+    incremental = {table: table_rows(table) for table in tables}
+
+    pipeline.incremental_load(full=True)
+    assert {table: table_rows(table) for table in tables} == incremental
+
+
+def test_snapshot_carries_over_unchanged_tables(pipeline):
+    pipeline.main(reports=False)
+    first = snapshot.current()
+    edit_csv(pipeline.FILES["production"],
+             insert="J9001,M02,Grinding,2.5,45,7.0,90,2023-03-26 08:00:00,2023-03-26 08:45:00,"
+                    "2023-03-26 08:05:00,,Pending,Low Efficiency")
+    assert pipeline.main(reports=False) == ["production"]
+    assert not os.path.exists(pipeline.REPORTS_DIR)  # left to the caller
+
+    second = snapshot.current()
+    assert second["tables"]["production"] == first["tables"]["production"] + 1
+    for table in pipeline.SNAPSHOT_TABLES:
+        shared = os.path.samefile(snapshot.table_path(first["version"], table),
+                                  snapshot.table_path(second["version"], table))
+        assert shared == ("production" not in pipeline.SNAPSHOT_SOURCES[table]), table
+        assert second["tables"][table] == snapshot.open_table(second["version"], table).num_rows
+
+    # New demand moves the reorder points of every SKU, so inventory is republished too
+    assert not inventory_analytics(first["version"]).equals(inventory_analytics())
+    assert inventory_analytics(second["version"]).equals(inventory_analytics())
+
+
+def test_watch_waits_for_missing_sources(pipeline, monkeypatch, capsys):
+    path = pipeline.FILES["procurement"]
+    os.rename(path, path + ".bak")
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:  # the export lands while the watcher is polling
+            os.rename(path + ".bak", path)
+        elif len(sleeps) == 10:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(pipeline.time, "sleep", sleep)
+
+    pipeline.watch(poll=1, debounce=2, report_every=3600)
+    out = capsys.readouterr().out
+    assert "Waiting for missing sources: procurement" in out
+    assert "Change detected in procurement" in out
+    assert "Refresh failed" not in out
+    assert row_counts(["procurement"])["procurement"] > 0
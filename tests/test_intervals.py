@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+import intervals
+
+
+def test_sweep_back_to_back_jobs_do_not_overlap():
+    times, levels = intervals.sweep(np.array([0, 10]), np.array([10, 20]))
+    assert times.tolist() == [0, 10, 10, 20]
+    assert levels.max() == 1
+    assert levels[-1] == 0
+
+
+def test_conflicts_pairs_each_clash_with_the_job_ending_last():
+    ids = np.array(["A", "B", "C", "D"])
+    starts = np.array([0, 5, 8, 20])
+    ends = np.array([30, 10, 12, 25])
+    found = intervals.conflicts(ids, starts, ends)
+    assert found["Job_ID"].tolist() == ["B", "C", "D"]
+    assert found["Conflicting_Job_ID"].tolist() == ["A", "A", "A"]
+    assert found["Overlap_Start"].tolist() == [5, 8, 20]
+    assert found["Overlap_End"].tolist() == [10, 12, 25]
+
+
+def test_conflicts_none_for_sequential_jobs():
+    found = intervals.conflicts(np.array(["A", "B"]), np.array([0, 10]), np.array([10, 20]))
+    assert found.empty
+
+
+def test_machine_profile():
+    # Two overlapping jobs, then an hour idle before the third
+    stats, gaps = intervals.machine_profile(np.array(["A", "B", "C"]), np.array([0, 300, 4500]),
+                                            np.array([600, 900, 5100]))
+    assert stats["Jobs"] == 3
+    assert (stats["Span_Start"], stats["Span_End"]) == (0, 5100)
+    assert stats["Busy_Hours"] == 1500 / 3600
+    assert stats["Idle_Hours"] == 1.0
+    assert stats["Utilization"] == 1500 / 5100
+    assert stats["Double_Booked_Hours"] == 300 / 3600
+    assert stats["Max_Concurrency"] == 2
+    assert gaps[["Gap_Start", "Gap_End", "Gap_Hours"]].values.tolist() == [[900, 4500, 1.0]]
+
+
+def test_machine_profile_skips_short_gaps():
+    _, gaps = intervals.machine_profile(np.array(["A", "B"]), np.array([0, 700]), np.array([600, 1200]))
+    assert gaps.empty
+
+
+def test_binned_levels_is_time_weighted():
+    edges = np.array([0, 100, 200, 300])
+    mean, peak = intervals.binned_levels(np.array([0, 50]), np.array([150, 100]), edges)
+    assert mean.tolist() == [1.5, 0.5, 0.0]
+    assert peak.tolist() == [2, 1, 0]
+
+
+def test_binned_levels_interval_spanning_a_whole_bin():
+    mean, peak = intervals.binned_levels(np.array([50]), np.array([250]), np.array([0, 100, 200, 300]))
+    assert mean.tolist() == [0.5, 1.0, 0.5]
+    assert peak.tolist() == [1, 1, 1]
+
+
+def test_binned_levels_without_intervals():
+    mean, peak = intervals.binned_levels(np.array([]), np.array([]), np.array([0, 100, 200]))
+    assert mean.tolist() == [0.0, 0.0]
+    assert peak.tolist() == [0, 0]
+
+
+def test_queue_depth_waiting_then_in_process():
+    jobs = pd.DataFrame({
+        "Scheduled_Start": [0.0, 0.0],
+        "Actual_Start": [3600.0, np.nan],
+        "Actual_End": [7200.0, np.nan],
+        "Job_Status": ["Completed", "Pending"],
+    })
+    depth = intervals.queue_depth(jobs, origin=7200, bin_seconds=3600)
+    # The last bin starts at the final endpoint and is empty
+    assert depth["Period_Start"].tolist() == [0, 3600, 7200]
+    # The completed job waits for its first hour and runs in the second; the pending one waits until origin
+    assert depth["Avg_Queue"].tolist() == [2.0, 1.0, 0.0]
+    assert depth["Avg_In_Process"].tolist() == [0.0, 1.0, 0.0]
+    assert depth["Max_Queue"].tolist() == [2, 1, 0]
+
+
+def test_queue_depth_ignores_jobs_that_never_started():
+    jobs = pd.DataFrame({"Scheduled_Start": [0.0], "Actual_Start": [np.nan], "Actual_End": [np.nan],
+                         "Job_Status": ["Failed"]})
+    assert intervals.queue_depth(jobs, origin=7200).empty
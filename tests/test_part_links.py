@@ -0,0 +1,79 @@
+import openpyxl
+import pandas as pd
+
+import db
+from conftest import table_rows
+
+PARTS = [f"P-{i:04d}" for i in range(500)]
+KEYS = pd.Series([f"J{i:06d}" for i in range(20_000)])
+NEW_PART = "99-9999-9999-999"
+
+
+def test_link_parts_ignores_part_order(pipeline):
+    assert pipeline.link_parts(KEYS, PARTS).equals(pipeline.link_parts(KEYS, PARTS[::-1]))
+
+
+def test_adding_a_part_only_moves_keys_to_it(pipeline):
+    before = pipeline.link_parts(KEYS, PARTS)
+    after = pipeline.link_parts(KEYS, PARTS + ["P-NEW"])
+    moved = before != after
+    assert (after[moved] == "P-NEW").all()
+    # About 1/501 of the keys (hash % len(parts) would move nearly all of them)
+    assert 0 < moved.mean() < 3 / len(PARTS)
+
+
+def test_removing_a_part_only_moves_its_keys(pipeline):
+    before = pipeline.link_parts(KEYS, PARTS)
+    after = pipeline.link_parts(KEYS, PARTS[1:])
+    assert ((before != after) == (before == PARTS[0])).all()
+
+
+def production_links():
+    conn = db.connect()
+    try:
+        return dict(conn.execute("SELECT Job_ID, Part_ID FROM production"))
+    finally:
+        conn.close()
+
+
+def test_new_sku_relinks_only_its_rows(pipeline, capsys):
+    pipeline.incremental_load()
+    links = production_links()
+
+    path = pipeline.FILES["inventory"]
+    workbook = openpyxl.load_workbook(path)
+    sheet = workbook.active
+    sheet.append([c.value for c in sheet[2]])
+    sheet.cell(sheet.max_row, 3).value = NEW_PART  # Part No.
+    workbook.save(path)
+    capsys.readouterr()
+    changed = pipeline.incremental_load()
+
+    # The production CSV is not read again: its moved rows are updated in place
+    assert "production: unchanged, " in capsys.readouterr().out
+    assert changed[0] == "inventory" and "production" in changed
+    relinked = production_links()
+    moved = [job for job in links if relinked[job] != links[job]]
+    assert 0 < len(moved) < 0.05 * len(links)
+    assert {relinked[job] for job in moved} == {NEW_PART}
+
+    # Links and summaries match a rebuild from scratch
+    tables = list(pipeline.FILES) + list(pipeline.SUMMARIES)
+    incremental = {table: table_rows(table) for table in tables}
+    pipeline.incremental_load(full=True)
+    assert {table: table_rows(table) for table in tables} == incremental
+
+
+def test_lead_times_follow_linked_pos(pipeline):
+    pipeline.incremental_load()
+    conn = db.connect()
+    try:
+        expected = dict(conn.execute("SELECT i.Part_ID, COALESCE(ROUND(MAX(AVG(p.Days_To_Deliver), 1), 2), 0) "
+                                     "FROM inventory i LEFT JOIN procurement p ON p.Part_ID = i.Part_ID "
+                                     "GROUP BY i.Part_ID"))
+        lead_times = dict(conn.execute("SELECT Part_ID, Lead_Time_Days FROM inventory"))
+    finally:
+        conn.close()
+    linked = {part for part, days in expected.items() if days}
+    assert linked and len({lead_times[part] for part in linked}) > 1
+    assert all(lead_times[part] == expected[part] for part in linked)
@@ -0,0 +1,50 @@
+import pandas as pd
+
+import scheduler
+
+
+def batches(steps, cycles, dues):
+    return pd.DataFrame({"WIP_Step": steps, "Cycle_Minutes": cycles, "Due": dues})
+
+
+def test_dispatch_earliest_due_first_to_the_first_free_machine():
+    plan = scheduler.dispatch(batches(["S", "S", "S"], [10, 10, 10], [3, 1, 2]),
+                              eligible={"S": ["M1", "M2"]}, ready={"M1": 0, "M2": 100}, availability={})
+    machine, start, end = plan
+    # Due 1 takes M1 at 0, due 2 takes M2 when it frees at 100, due 3 waits for M1
+    assert machine == ["M1", "M1", "M2"]
+    assert start == [600, 0, 100]
+    assert end == [1200, 600, 700]
+
+
+def test_dispatch_stretches_cycles_by_availability():
+    machine, start, end = scheduler.dispatch(batches(["S"], [10], [1]), eligible={"S": ["M1"]},
+                                             ready={"M1": 0}, availability={"M1": 50})
+    assert (machine, start, end) == (["M1"], [0], [1200])
+
+
+def test_dispatch_respects_eligibility_across_shared_machines():
+    # M1 runs both steps: after S1 books it, S2's heap holds a stale entry for M1
+    machine, start, end = scheduler.dispatch(batches(["S1", "S2", "S2"], [10, 10, 10], [1, 2, 3]),
+                                             eligible={"S1": ["M1"], "S2": ["M1", "M2"]},
+                                             ready={"M1": 0, "M2": 500}, availability={})
+    assert machine == ["M1", "M2", "M1"]
+    assert start == [0, 500, 600]
+    assert end == [600, 1100, 1200]
+
+
+def test_dispatch_step_without_eligible_machines_uses_all():
+    machine, start, _ = scheduler.dispatch(batches(["New"], [5], [1]), eligible={"S": ["M1"]},
+                                           ready={"M1": 900, "M2": 100}, availability={})
+    assert (machine, start) == (["M2"], [100])
+
+
+def test_form_batches_caps_loads_per_step():
+    pending = pd.DataFrame({"Job_ID": [f"J{i}" for i in range(5)], "WIP_Step": ["A", "A", "A", "B", "A"],
+                            "Processing_Time": [10, 30, 20, 5, 40], "Due": [5, 1, 3, 2, 4]})
+    jobs, loads = scheduler.form_batches(pending, capacity=2)
+    assert loads["WIP_Step"].tolist() == ["A", "A", "B"]
+    assert loads["Jobs"].tolist() == [2, 2, 1]
+    # Earliest due first within a step; a load takes as long as its longest job
+    assert loads["Cycle_Minutes"].tolist() == [30, 40, 5]
+    assert jobs.loc[jobs["WIP_Step"] == "A", "Job_ID"].tolist() == ["J1", "J2", "J4", "J0"]
@@ -0,0 +1,45 @@
+import db
+from conftest import edit_csv, table_rows
+
+
+def summary_rows(pipeline):
+    return {table: table_rows(table) for table in pipeline.SUMMARIES}
+
+
+def test_incremental_summaries_match_full_rebuild(pipeline):
+    pipeline.incremental_load()
+    edit_csv(pipeline.FILES["production"],
+             update=("J002", "J002,M03,Welding,3.35,140,6.61,60,2023-03-19 08:10:00,2023-03-19 10:30:00,"
+                             "2023-03-19 08:20:00,2023-03-19 10:40:00,Completed,High Efficiency"),
+             insert="J9001,M02,Grinding,2.5,45,7.0,90,2023-03-20 08:00:00,2023-03-20 08:45:00,,,Pending,Low Efficiency",
+             delete="J001")
+    edit_csv(pipeline.FILES["procurement"],
+             update=("PO-00002", "PO-00002,Alpha_Inc,2022-05-01,2022-05-03,Office Supplies,Delivered,900,41.0,38.5,3.0,No"),
+             insert="PO-09001,Delta_Logistics,2023-01-05,2023-01-20,Office Supplies,Delivered,250,12.5,11.0,0.0,Yes",
+             delete="PO-00001")
+    assert sorted(pipeline.incremental_load()) == ["procurement", "production"]
+    incremental = summary_rows(pipeline)
+
+    pipeline.incremental_load(full=True)
+    assert summary_rows(pipeline) == incremental
+
+
+def test_rebuilt_source_table_does_not_double_count_summaries(pipeline):
+    pipeline.incremental_load()
+    before = summary_rows(pipeline)
+    # A fact table created afresh (as for a new layout) is reloaded in full; its summaries must restart too
+    conn = db.connect()
+    with conn:
+        conn.execute("DROP TABLE production")
+    conn.close()
+    assert pipeline.incremental_load() == ["production"]
+    assert summary_rows(pipeline) == before
+
+
+def test_pos_without_order_date_stay_out_of_monthly_quality(pipeline):
+    pipeline.incremental_load()
+    before = table_rows("summary_monthly_quality")
+    edit_csv(pipeline.FILES["procurement"],
+             insert="PO-09002,Delta_Logistics,,2023-01-20,Office Supplies,Delivered,250,12.5,11.0,4.0,Yes")
+    assert pipeline.incremental_load() == ["procurement"]
+    assert table_rows("summary_monthly_quality") == before